@@ -0,0 +1,229 @@
+# coding=utf-8
+"""Streaming batch resolver. Reads JSON lines from stdin and writes JSON lines to stdout,
+loading the session only once.
+
+    $ find /mnt/projects -type d | python -m folderstructure parse --template asset_root
+    {"path": "/mnt/projects/MyProject/ART/Male", "values": {"asset": "Male", ...}}
+
+    $ cat records.jsonl | python -m folderstructure solve --template asset_root --workers 8
+    {"values": {"asset": "Male", ...}, "path": "/mnt/projects/MyProject/ART/Male"}
+"""
+from __future__ import absolute_import, print_function
+
+import sys
+import json
+import argparse
+import itertools
+import multiprocessing
+from collections import deque
+
+from folderstructure import folderstructure
+from folderstructure import roots
+from folderstructure.logger import logger
+
+ERRORS_SKIP, ERRORS_NULL, ERRORS_RAISE = ("skip", "null", "raise")
+
+__worker = {"template": None}
+# Chunks read and sent to the pool ahead of the one being written, per worker
+__CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+def parse_line(line, template=None):
+    """Parse the path in a line of input. Lines can be plain paths, JSON strings or
+    JSON objects with a "path" key.
+
+    Args:
+        ``line`` (str): Line of input.
+
+        ``template`` (str, optional): Template name. Defaults to None, active template.
+
+    Returns:
+        [dict]: {"path", "values"}
+    """
+    line = line.strip()
+    path = json.loads(line) if line[:1] in ('"', '{') else line
+    if isinstance(path, dict):
+        path = path["path"]
+    if template is None:
+        values = folderstructure.parse(path)
+    else:
+        values = folderstructure._get_template_object(template).parse(roots.map_path(path))
+    return {"path": path, "values": values}
+
+
+def solve_line(line, template=None):
+    """Solve a line of input with JSON object of token values.
+
+    Args:
+        ``line`` (str): Line of input. e.g.: {"project": "MyProject", "asset": "Male"}
+
+        ``template`` (str, optional): Template name. Defaults to None, active template.
+
+    Returns:
+        [dict]: {"values", "path"}
+    """
+    values = json.loads(line)
+    if template is None:
+        path = folderstructure.solve(**values)
+    else:
+        path = folderstructure.solve_template(template, **values)
+    return {"values": values, "path": path}
+
+
+def process_chunk(command, lines, template=None, errors=ERRORS_NULL):
+    """Run a command over a chunk of lines.
+
+    Args:
+        ``command`` (str): "parse" or "solve".
+
+        ``lines`` (list): Lines of input.
+
+        ``template`` (str, optional): Template name. Defaults to None, active template.
+
+        ``errors`` (str, optional): What to do with lines that fail, one of ERRORS_SKIP,
+        ERRORS_NULL or ERRORS_RAISE. Defaults to ERRORS_NULL.
+
+    Returns:
+        [list]: (output_line, error_message) for each line. Output is None for skipped lines.
+    """
+    function = parse_line if command == "parse" else solve_line
+    result = list()
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            output = json.dumps(function(line, template))
+            result.append((output, None))
+        except Exception as why:
+            message = "{}: {}".format(type(why).__name__, why)
+            if errors == ERRORS_NULL:
+                result.append((json.dumps({"input": line.rstrip("\n"), "error": message}), message))
+            else:
+                result.append((None, message))
+                if errors == ERRORS_RAISE:
+                    break
+    return result
+
+
+def run(command, lines, output, repo=None, template=None, workers=1, chunk_size=1000, errors=ERRORS_NULL):
+    """Stream lines through a command, writing results in the same order as input.
+
+    Args:
+        ``command`` (str): "parse" or "solve".
+
+        ``lines`` (iterable): Lines of input, e.g.: sys.stdin
+
+        ``output`` (file): Where to write output lines, e.g.: sys.stdout
+
+        ``repo`` (str, optional): Repo to load the session from. Defaults to None.
+
+        ``template`` (str, optional): Template name. Defaults to None, active template.
+
+        ``workers`` (int, optional): Worker processes, 1 runs in this process. Defaults to 1.
+
+        ``chunk_size`` (int, optional): Lines sent to a worker at once. Defaults to 1000.
+
+        ``errors`` (str, optional): ERRORS_SKIP, ERRORS_NULL or ERRORS_RAISE. Defaults to
+        ERRORS_NULL.
+
+    With many workers at most a couple of chunks per worker are read ahead of the one being
+    written, so memory stays bounded when input comes faster than output is consumed.
+
+    Returns:
+        [int]: Number of lines that failed.
+    """
+    chunks = __chunks(lines, chunk_size)
+    failed = 0
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, __init_worker, (repo, template))
+        try:
+            results = __imap_bounded(
+                pool, ((command, chunk, errors) for chunk in chunks),
+                workers * __CHUNKS_IN_FLIGHT_PER_WORKER
+            )
+            failed = __write(results, output, errors)
+        finally:
+            pool.terminate()
+    else:
+        folderstructure.load_session(repo)
+        results = (process_chunk(command, chunk, template, errors) for chunk in chunks)
+        failed = __write(results, output, errors)
+    return failed
+
+
+def __init_worker(repo, template):
+    folderstructure.load_session(repo)
+    __worker["template"] = template
+
+
+def __process_in_worker(args):
+    command, chunk, errors = args
+    return process_chunk(command, chunk, __worker["template"], errors)
+
+
+def __imap_bounded(pool, arguments, window):
+    """Like pool.imap(), in order, but submitting only window chunks at once. pool.imap()
+    consumes the whole input as fast as it can, holding every pending chunk and result.
+    """
+    pending = deque()
+    for each in arguments:
+        pending.append(pool.apply_async(__process_in_worker, (each,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def __chunks(lines, chunk_size):
+    iterator = iter(lines)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def __write(results, output, errors):
+    failed = 0
+    for chunk in results:
+        for line, message in chunk:
+            if message is not None:
+                failed += 1
+                logger.warning(message)
+                if errors == ERRORS_RAISE:
+                    output.flush()
+                    return failed
+            if line is not None:
+                output.write(line)
+                output.write("\n")
+        output.flush()
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m folderstructure",
+        description="Parse paths or solve token records streamed as JSON lines."
+    )
+    parser.add_argument("command", choices=("parse", "solve"))
+    parser.add_argument("--repo", default=None, help="Folder Structure repo path.")
+    parser.add_argument("--template", default=None, help="Template name, defaults to the active one.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes.")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Lines sent to a worker at once.")
+    parser.add_argument(
+        "--errors", choices=(ERRORS_SKIP, ERRORS_NULL, ERRORS_RAISE), default=ERRORS_NULL,
+        help="skip: drop failed lines, null: write them with an error key, raise: stop at the first one."
+    )
+    arguments = parser.parse_args(argv)
+    repo = folderstructure.get_repo(arguments.repo)
+    failed = run(
+        arguments.command, sys.stdin, sys.stdout, repo, arguments.template,
+        arguments.workers, arguments.chunk_size, arguments.errors
+    )
+    if failed and arguments.errors == ERRORS_RAISE:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
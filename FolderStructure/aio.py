@@ -0,0 +1,49 @@
+# coding=utf-8
+"""Coroutine versions of filesystem-facing functions, for asyncio based tools.
+Kept apart from folderstructure module because asyncio needs Python 3.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from folderstructure.folderstructure import _solve_records, _split_path, _build_existence_report
+from folderstructure.listing import get_listing_cache
+
+
+async def check_exists_async(records, template, workers=8, executor=None):
+    """Coroutine equivalent of folderstructure.check_exists(). Directories are listed with
+    loop.run_in_executor() so the event loop is never blocked.
+
+    Args:
+        ``records`` (list): Dictionaries with token values to solve given template with.
+
+        ``template`` (str or Template): Name of the template or Template object to solve.
+
+        ``workers`` (int, optional): Number of threads listing directories if no executor
+        is passed. Defaults to 8.
+
+        ``executor`` (concurrent.futures.Executor, optional): Executor to run the listings in.
+        Defaults to None, which creates a thread pool for this call.
+
+    Raises:
+        TemplateError: Given template name was not found in current session.
+
+        SolvingError: A record is missing values for required tokens.
+
+    Returns:
+        ExistenceReport: Named tuple with existing, missing and inaccessible lists of paths.
+    """
+    paths = _solve_records(records, template)
+    parents = sorted(set(_split_path(path)[0] for path in paths))
+    cache = get_listing_cache()
+    loop = asyncio.get_running_loop()
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        results = await asyncio.gather(
+            *[loop.run_in_executor(executor, cache.get_listing, parent) for parent in parents]
+        )
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+    return _build_existence_report(paths, dict(zip(parents, results)))
@@ -0,0 +1,139 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import json
+import heapq
+import tempfile
+from collections import namedtuple
+
+from folderstructure import scan
+from folderstructure import roots
+from folderstructure.folderstructure import _iter_product
+from folderstructure.logger import logger
+
+AuditEntry = namedtuple("AuditEntry", ["status", "path", "templates"])
+
+MISSING, UNMATCHED, MISPLACED = ("missing", "unmatched", "misplaced")
+
+
+def audit(root, template_names, workers=8, chunk_size=100000, **kwargs):
+    """Compare the directories expected by a set of templates with what actually exists
+    under root. Expected paths are solved for every combination of given token values
+    and merged, sorted, with a parallel walk of the real tree, so neither side has to be
+    held in memory.
+
+    Reported statuses:
+
+        MISSING: Expected path doesn't exist.
+
+        MISPLACED: Existing directory that matches a template pattern, but it's not expected
+        for given token values. e.g.: A typo in an asset name.
+
+        UNMATCHED: Existing directory that doesn't match any template and isn't a parent of
+        any expected path.
+
+    Contents of unexpected directories are not reported, only the top-most one is. Tokens
+    passed a single value are fixed, so only directories with that value are walked. Every
+    other token must match a single directory level.
+
+    Args:
+        ``root`` (str): Directory to audit. Expected paths outside of it are ignored.
+
+        ``template_names`` (list): Names of the templates that make the expected structure.
+
+        ``workers`` (int, optional): Number of threads listing directories. Defaults to 8.
+
+        ``chunk_size`` (int, optional): Expected paths sorted in memory at once. Bigger sets
+        are sorted in chunks written to temporary files. Defaults to 100000.
+
+        kwargs: {token_name: [option fullnames or values]} As in solve_product().
+
+    Yields:
+        AuditEntry: Named tuple with status, path and list of template names involved.
+    """
+    root = roots.map_path(root).replace("\\", "/").rstrip("/")
+    fixed = dict((name, value) for name, value in kwargs.items() if isinstance(value, str))
+    matcher = scan.TemplateMatcher(template_names, fixed, single_level=True, root=root)
+    expected = __group_expected(
+        __sorted_expected(root, template_names, kwargs, chunk_size)
+    )
+    head = next(expected, None)
+    reported = None
+    for path, entry in scan.walk(root, descend=matcher.can_descend, workers=workers):
+        key = path.split("/")
+        while head is not None and head[0] < key:
+            yield AuditEntry(MISSING, head[1], head[2])
+            head = next(expected, None)
+        if head is not None and head[0] == key:
+            head = next(expected, None)
+            continue
+        if reported is not None and path.startswith(reported + "/"):
+            continue
+        if not scan.is_dir(entry):
+            continue
+        if head is not None and head[1].startswith(path + "/"):
+            # Parent of expected paths
+            continue
+        matches = matcher.match(path)
+        if matches:
+            yield AuditEntry(MISPLACED, path, [name for name, values in matches])
+        else:
+            yield AuditEntry(UNMATCHED, path, list())
+        reported = path
+    while head is not None:
+        yield AuditEntry(MISSING, head[1], head[2])
+        head = next(expected, None)
+
+
+def __sorted_expected(root, template_names, kwargs, chunk_size):
+    prefix = root + "/"
+    chunk = list()
+    spilled = list()
+    for name in template_names:
+        for values, path in _iter_product(name, kwargs):
+            path = roots.map_path(path).rstrip("/")
+            if not path.startswith(prefix):
+                logger.debug("Expected path outside of audit root, ignoring: {}".format(path))
+                continue
+            chunk.append((path.split("/"), path, name))
+            if len(chunk) >= chunk_size:
+                spilled.append(__spill(chunk))
+                chunk = list()
+    chunk.sort()
+    if not spilled:
+        return iter(chunk)
+    logger.debug("Merging {} sorted chunks of expected paths.".format(len(spilled) + 1))
+    return heapq.merge(iter(chunk), *[__read_spilled(fp) for fp in spilled])
+
+
+def __spill(chunk):
+    chunk.sort()
+    fp = tempfile.TemporaryFile(mode="w+")
+    for key, path, name in chunk:
+        fp.write(json.dumps([path, name]))
+        fp.write("\n")
+    fp.seek(0)
+    return fp
+
+
+def __read_spilled(fp):
+    try:
+        for line in fp:
+            path, name = json.loads(line)
+            yield path.split("/"), path, name
+    finally:
+        fp.close()
+
+
+def __group_expected(stream):
+    current = None
+    for key, path, name in stream:
+        if current is not None and current[1] == path:
+            if name not in current[2]:
+                current[2].append(name)
+            continue
+        if current is not None:
+            yield current
+        current = (key, path, [name])
+    if current is not None:
+        yield current
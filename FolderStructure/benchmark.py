@@ -0,0 +1,359 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import itertools
+from timeit import default_timer
+
+from folderstructure import folderstructure
+from folderstructure import templates
+from folderstructure import tokens
+from folderstructure import roots
+from folderstructure import scan
+from folderstructure.logger import logger
+
+RESULTS_VERSION = 1
+MIN_ROUND_TIME = 0.005
+DEFAULT_PARAMS = {
+    "templates": 50,
+    "depth": 3,
+    "repeated": 1,
+    "tokens": 20,
+    "options": 10,
+    "seed": 0
+}
+
+
+def generate_repo(repo, templates_count=50, depth=3, repeated=1, tokens_count=20, options=10, seed=0):
+    """Create a synthetic Folder Structure repo and load it as the current session.
+    Existing session is reset.
+
+    Every leaf template references a chain of ``depth`` templates, each of them adding
+    one directory level, and ends with a file name using ``repeated`` tokens twice.
+    e.g.: depth=2, repeated=1
+    'bench_3_0': '{projects_root}/{project}/{token_4}'
+    'bench_3_1': '{@bench_3_0}/{token_9}'
+    'bench_3': '{@bench_3_1}/{token_2}/{token_2}_{token_7}'
+
+    Args:
+        ``repo`` (str): Directory to save the repo to. It's overridden.
+
+        ``templates_count`` (int, optional): Number of leaf templates. Defaults to 50.
+
+        ``depth`` (int, optional): Referenced templates nesting depth. Defaults to 3.
+
+        ``repeated`` (int, optional): Tokens used twice in each leaf template. Defaults to 1.
+
+        ``tokens_count`` (int, optional): Number of tokens with options. Defaults to 20.
+
+        ``options`` (int, optional): Options in each token. Defaults to 10.
+
+        ``seed`` (int, optional): Random seed, same values give the same repo. Defaults to 0.
+
+    Returns:
+        [list]: Names of the leaf templates.
+    """
+    rand = random.Random(seed)
+    tokens.reset_tokens()
+    templates.reset_templates()
+    roots.reset_roots()
+    tokens.add_token("projects_root")
+    tokens.add_token("project")
+    token_names = list()
+    for i in range(tokens_count):
+        name = "token_{}".format(i)
+        tokens.add_token(name, **dict(
+            ("option_{}".format(j), "O{}{}".format(i, j)) for j in range(options)
+        ))
+        token_names.append(name)
+
+    leaves = list()
+    for i in range(templates_count):
+        parent = "{projects_root}/{project}"
+        for level in range(depth):
+            name = "bench_{}_{}".format(i, level)
+            templates.add_template(name, "{}/{{{}}}".format(parent, rand.choice(token_names)))
+            parent = "{{@{}}}".format(name)
+        used = rand.sample(token_names, repeated + 1)
+        repeated_tokens = "/".join("{{{}}}".format(each) for each in used[:repeated])
+        file_name = "_".join("{{{}}}".format(each) for each in used)
+        name = "bench_{}".format(i)
+        pattern = "/".join(each for each in (parent, repeated_tokens, file_name) if each)
+        templates.add_template(name, pattern, anchor=templates.Template.ANCHOR_BOTH)
+        leaves.append(name)
+    templates.set_active_template(leaves[0])
+    if not os.path.isdir(repo):
+        os.makedirs(repo)
+    folderstructure.save_session(repo)
+    return leaves
+
+
+def sample_values(template, count=100, seed=0, projects_root="/projects"):
+    """Random token values to solve given template with.
+
+    Args:
+        ``template`` (str): Template name.
+
+        ``count`` (int, optional): Number of records. Defaults to 100.
+
+        ``seed`` (int, optional): Random seed. Defaults to 0.
+
+        ``projects_root`` (str, optional): Value for projects_root. Defaults to "/projects".
+
+    Returns:
+        [list]: {token_name: option_fullname} records.
+    """
+    rand = random.Random(seed)
+    fields = sorted(set(templates.get_template(template).fields))
+    records = list()
+    for i in range(count):
+        record = {"projects_root": projects_root, "project": "project_{}".format(i % 3)}
+        for field in fields:
+            if field not in record:
+                record[field] = rand.choice(sorted(tokens.get_token(field).options.keys()))
+        records.append(record)
+    return records
+
+
+def measure(function, rounds=20, min_round_time=MIN_ROUND_TIME):
+    """Time given function. Iterations per round are calibrated so each round takes at
+    least min_round_time, to keep timer resolution out of the results.
+
+    Args:
+        ``function`` (callable): Called without arguments.
+
+        ``rounds`` (int, optional): Number of rounds. Defaults to 20.
+
+        ``min_round_time`` (float, optional): Minimum seconds per round. Defaults to 0.005.
+
+    Returns:
+        [dict]: Seconds per call {"min", "max", "mean", "median", "stddev", "ops", "rounds",
+        "iterations"}
+    """
+    iterations = 1
+    while True:
+        start = default_timer()
+        for i in range(iterations):
+            function()
+        elapsed = default_timer() - start
+        if elapsed >= min_round_time or iterations >= 1 << 20:
+            break
+        iterations *= 2
+    timings = list()
+    for each in range(rounds):
+        start = default_timer()
+        for i in range(iterations):
+            function()
+        timings.append((default_timer() - start) / iterations)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    middle = len(timings) // 2
+    median = timings[middle] if len(timings) % 2 else (timings[middle - 1] + timings[middle]) / 2
+    stddev = math.sqrt(sum((t - mean) ** 2 for t in timings) / len(timings))
+    return {
+        "min": timings[0],
+        "max": timings[-1],
+        "mean": mean,
+        "median": median,
+        "stddev": stddev,
+        "ops": 1.0 / mean if mean else 0.0,
+        "rounds": rounds,
+        "iterations": iterations
+    }
+
+
+def run(directory=None, rounds=20, only=None, **kwargs):
+    """Generate a synthetic repo and run every benchmark scenario against it.
+
+    Args:
+        ``directory`` (str, optional): Working directory for the repo and the scanned tree.
+        Defaults to None, which uses a temporary directory removed afterwards.
+
+        ``rounds`` (int, optional): Rounds per scenario. Defaults to 20.
+
+        ``only`` (list, optional): Names of the scenarios to run. Defaults to None, all.
+
+        kwargs: Synthetic repo shape, see DEFAULT_PARAMS and generate_repo().
+
+    Returns:
+        [dict]: Machine readable results with machine info, params and benchmarks.
+    """
+    params = dict(DEFAULT_PARAMS)
+    params.update(kwargs)
+    own_directory = directory is None
+    directory = directory or tempfile.mkdtemp(prefix="folderstructure_bench_")
+    repo = os.path.join(directory, "repo")
+    tree = os.path.join(directory, "tree").replace("\\", "/")
+    try:
+        leaves = generate_repo(
+            repo, params["templates"], params["depth"], params["repeated"],
+            params["tokens"], params["options"], params["seed"]
+        )
+        benchmarks = list()
+        for name, function in __scenarios(repo, tree, leaves, params):
+            if only and name not in only:
+                continue
+            logger.info("Running benchmark: {}".format(name))
+            result = measure(function, rounds)
+            result["name"] = name
+            benchmarks.append(result)
+    finally:
+        if own_directory:
+            shutil.rmtree(directory, ignore_errors=True)
+    return {
+        "version": RESULTS_VERSION,
+        "datetime": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count()
+        },
+        "params": params,
+        "benchmarks": benchmarks
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """Compare two results, e.g.: from two releases, by median time per call.
+
+    Args:
+        ``baseline`` (dict): Results returned by run().
+
+        ``current`` (dict): Results returned by run().
+
+        ``threshold`` (float, optional): Relative slow down to report as a regression.
+        Defaults to 0.1, 10%.
+
+    Returns:
+        [list]: {"name", "baseline", "current", "change", "regression"} for every
+        scenario in both results. change is relative, positive means slower.
+    """
+    baseline_medians = dict((each["name"], each["median"]) for each in baseline["benchmarks"])
+    result = list()
+    for each in current["benchmarks"]:
+        before = baseline_medians.get(each["name"])
+        if not before:
+            continue
+        change = (each["median"] - before) / before
+        result.append({
+            "name": each["name"],
+            "baseline": before,
+            "current": each["median"],
+            "change": change,
+            "regression": change > threshold
+        })
+    return result
+
+
+def __scenarios(repo, tree, leaves, params):
+    leaf = leaves[0]
+    records = sample_values(leaf, 100, params["seed"], tree)
+    paths = [folderstructure.solve_template(leaf, **record) for record in records]
+    cycled_records = itertools.cycle(records)
+    cycled_paths = itertools.cycle(paths)
+    template = templates.get_template(leaf)
+    context = folderstructure.Context(records[0])
+    path_filter = template.compile_filter(project="project_0")
+    # Small product of values to build a real tree to scan
+    product_values = dict(
+        (field, sorted(tokens.get_token(field).options.keys())[:2])
+        for field in set(template.fields) if field not in ("projects_root", "project")
+    )
+    for path in itertools.islice(
+        folderstructure.solve_product(leaf, projects_root=tree, project="project_0", **product_values),
+        2000
+    ):
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        open(path, "w").close()
+
+    def load_session():
+        tokens.reset_tokens()
+        templates.reset_templates()
+        folderstructure.load_session(repo)
+
+    def scan_tree():
+        folderstructure.get_listing_cache().clear()
+        for each in scan.scan(tree, [leaf], workers=4):
+            pass
+
+    return [
+        ("load_session", load_session),
+        ("get_templates", lambda: templates.get_templates()),
+        ("parse", lambda: folderstructure.parse(next(cycled_paths))),
+        ("solve", lambda: folderstructure.solve(**next(cycled_records))),
+        ("solve_template", lambda: folderstructure.solve_template(leaf, **next(cycled_records))),
+        ("solve_batch_100", lambda: folderstructure.solve_batch(records, leaf)),
+        ("solve_product_100", lambda: list(itertools.islice(
+            folderstructure.solve_product(leaf, projects_root=tree, project="project_0"), 100
+        ))),
+        ("context_solve", lambda: context.solve(leaf)),
+        ("compile_filter_100", lambda: list(path_filter.filter(paths))),
+        ("check_exists_100", lambda: folderstructure.check_exists(records, leaf)),
+        ("scan", scan_tree),
+    ]
+
+
+def __print_results(results):
+    print("{:<22}{:>14}{:>14}{:>14}{:>12}".format("name", "median (us)", "mean (us)", "stddev (us)", "ops"))
+    for each in results["benchmarks"]:
+        print("{:<22}{:>14.2f}{:>14.2f}{:>14.2f}{:>12.0f}".format(
+            each["name"], each["median"] * 1e6, each["mean"] * 1e6, each["stddev"] * 1e6, each["ops"]
+        ))
+
+
+def __print_comparison(comparison):
+    print("{:<22}{:>14}{:>14}{:>10}".format("name", "before (us)", "after (us)", "change"))
+    for each in comparison:
+        print("{:<22}{:>14.2f}{:>14.2f}{:>9.1f}%{}".format(
+            each["name"], each["baseline"] * 1e6, each["current"] * 1e6, each["change"] * 100,
+            "  REGRESSION" if each["regression"] else ""
+        ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Folder Structure benchmark suite.")
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser("run", help="Run benchmarks on a synthetic repo.")
+    run_parser.add_argument("--output", help="Write JSON results to this file.")
+    run_parser.add_argument("--directory", help="Working directory, defaults to a temporary one.")
+    run_parser.add_argument("--rounds", type=int, default=20)
+    run_parser.add_argument("--only", nargs="*", help="Names of the scenarios to run.")
+    for key, value in DEFAULT_PARAMS.items():
+        run_parser.add_argument("--{}".format(key), type=int, default=value)
+    compare_parser = subparsers.add_parser("compare", help="Compare two JSON results.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    arguments = parser.parse_args()
+
+    if arguments.command == "run":
+        shape = dict((key, getattr(arguments, key)) for key in DEFAULT_PARAMS.keys())
+        results = run(arguments.directory, arguments.rounds, arguments.only, **shape)
+        __print_results(results)
+        if arguments.output:
+            with open(arguments.output, "w") as fp:
+                json.dump(results, fp, indent=4)
+        sys.exit(0)
+    elif arguments.command == "compare":
+        with open(arguments.baseline) as fp:
+            baseline_results = json.load(fp)
+        with open(arguments.current) as fp:
+            current_results = json.load(fp)
+        comparison = compare(baseline_results, current_results, arguments.threshold)
+        __print_comparison(comparison)
+        sys.exit(1 if any(each["regression"] for each in comparison) else 0)
+    parser.print_help()
+    sys.exit(2)
@@ -0,0 +1,184 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import errno
+import socket
+import threading
+
+from folderstructure import error
+from folderstructure.server import get_socket_path, send_message, receive_message
+
+# Errors meaning the server is not there, or the kept connection was closed by a server
+# restart. Nothing reached the server, so sending again is safe.
+RETRY_ERRNOS = (errno.ECONNREFUSED, errno.ECONNRESET, errno.EPIPE, errno.ENOENT)
+
+
+class Client(object):
+    """Thin client for a running resolver server, see server.py. It mirrors the
+    folderstructure module API, so it can replace it in short lived processes that
+    can't afford loading the repo on every start.
+
+    The connection is opened on first use and kept open, calls from several threads
+    are serialized through it.
+
+    Args:
+        ``socket_path`` (str, optional): Path of the server Unix socket. Defaults to None,
+        which uses get_socket_path().
+
+        ``timeout`` (float, optional): Seconds to wait for a response. Defaults to 30.0.
+    """
+    def __init__(self, socket_path=None, timeout=30.0):
+        self.socket_path = get_socket_path(socket_path)
+        self.timeout = timeout
+        self.__socket = None
+        self.__lock = threading.Lock()
+
+    def parse(self, path, template=None):
+        """Parse given path using a template.
+
+        Args:
+            ``path`` (str): Path to parse.
+
+            ``template`` (str, optional): Template name. Defaults to None, which uses the
+            server active template.
+
+        Returns:
+            [dict]: {token_name: option_fullname} Parsed values.
+        """
+        return self.request({"op": "parse", "path": path, "template": template})
+
+    def solve(self, *args, **kwargs):
+        """Solve the server active template with given values.
+
+        Returns:
+            [str]: Solved path.
+        """
+        return self.request({"op": "solve", "args": list(args), "kwargs": kwargs})
+
+    def solve_template(self, template, *args, **kwargs):
+        """Solve given template with given values.
+
+        Args:
+            ``template`` (str): Template name.
+
+        Returns:
+            [str]: Solved path.
+        """
+        return self.request(
+            {"op": "solve", "template": template, "args": list(args), "kwargs": kwargs}
+        )
+
+    def parse_batch(self, paths, template=None):
+        """Parse many paths in a single request.
+
+        Args:
+            ``paths`` (list): Paths to parse.
+
+            ``template`` (str, optional): Template name. Defaults to None, which uses the
+            server active template.
+
+        Returns:
+            [list]: Parsed values for each path, in the same order. None for paths that
+            couldn't be parsed.
+        """
+        return self.__batch({"op": "parse_batch", "paths": list(paths), "template": template})
+
+    def solve_batch(self, records, template=None):
+        """Solve many sets of values in a single request.
+
+        Args:
+            ``records`` (list): {token_name: value} dictionaries to solve.
+
+            ``template`` (str, optional): Template name. Defaults to None, which uses the
+            server active template.
+
+        Returns:
+            [list]: Solved paths, in the same order. None for records that couldn't be solved.
+        """
+        return self.__batch(
+            {"op": "solve_batch", "records": list(records), "template": template}
+        )
+
+    def ping(self):
+        """
+        Returns:
+            [dict]: {"repo", "pid"} of the running server.
+        """
+        return self.request({"op": "ping"})
+
+    def reload(self):
+        """Ask the server to reload its repo now.
+
+        Returns:
+            [bool]: True if loading session operation was successful.
+        """
+        return self.request({"op": "reload"})
+
+    def request(self, message):
+        """Send a raw request message and wait for its result.
+
+        Args:
+            ``message`` (dict): Request message, see server.ResolverRequestHandler.
+
+        Raises:
+            SolvingError, ParsingError, TemplateError...: Same error the server raised.
+
+            OSError: If the server can't be reached or doesn't answer in time. Requests are
+            only sent again if the connection failed before sending them.
+
+        Returns:
+            object: Result of the operation.
+        """
+        with self.__lock:
+            try:
+                self.__send(message)
+            except (IOError, OSError) as why:
+                self.close()
+                if getattr(why, "errno", None) not in RETRY_ERRNOS:
+                    raise
+                # Server may have been restarted, try again once with a new connection
+                self.__send(message)
+            try:
+                response = receive_message(self.__socket)
+            except (IOError, OSError):
+                # Timed out or lost, a late response must not be read by the next request
+                self.close()
+                raise
+            if response is None:
+                self.close()
+                raise OSError("Resolver server closed the connection.")
+        if response["ok"]:
+            return response["result"]
+        exception = getattr(error, response["error"], None)
+        if not (isinstance(exception, type) and issubclass(exception, Exception)):
+            exception = RuntimeError
+        raise exception(response["message"])
+
+    def close(self):
+        """Close the connection to the server. It's opened again on next call."""
+        if self.__socket is not None:
+            try:
+                self.__socket.close()
+            finally:
+                self.__socket = None
+
+    def __send(self, message):
+        if self.__socket is None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self.timeout)
+            try:
+                connection.connect(self.socket_path)
+            except (IOError, OSError):
+                connection.close()
+                raise
+            self.__socket = connection
+        send_message(self.__socket, message)
+
+    def __batch(self, message):
+        return [value if ok else None for ok, value in self.request(message)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,218 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    # Python 2
+    from collections import Mapping
+
+from folderstructure import templates
+from folderstructure import roots
+from folderstructure.tokens import get_token
+from folderstructure.error import SolvingError, TemplateError, TokenError
+from folderstructure.logger import logger
+
+__PLANS_SIZE = 1024
+__plans = dict()
+
+
+try:
+    from collections import ChainMap
+except ImportError:
+    # Python 2, only what Context uses
+    class ChainMap(Mapping):
+        """Read only stand-in for collections.ChainMap: lookups go through maps in order."""
+        def __init__(self, *maps):
+            self.maps = list(maps) or [dict()]
+
+        def new_child(self, m=None):
+            return ChainMap(m if m is not None else dict(), *self.maps)
+
+        def __getitem__(self, key):
+            for mapping in self.maps:
+                if key in mapping:
+                    return mapping[key]
+            raise KeyError(key)
+
+        def __iter__(self):
+            return iter(set().union(*self.maps))
+
+        def __len__(self):
+            return len(set().union(*self.maps))
+
+
+class Context(Mapping):
+    """Read only set of token values, usually parsed from a path, to solve many related
+    paths from. Values are resolved to both option fullnames and abbreviations once, when
+    the context is created, and reused by every solve() call.
+
+    It behaves as a read only dictionary of {token_name: option_fullname}.
+
+    Args:
+        ``values`` (dict, optional): {token_name: option_fullname_or_value} e.g.: As returned
+        by parse(). Defaults to None.
+
+        ``parent`` (Context, optional): Context to inherit values from, see derive().
+        Defaults to None.
+
+    Raises:
+        TokenError: A value is not one of its token options.
+    """
+    __slots__ = ("__fullnames", "__abbreviations", "__parent")
+
+    def __init__(self, values=None, parent=None):
+        fullnames, abbreviations = self.__resolve(values or dict())
+        self.__parent = parent
+        if parent is None:
+            self.__fullnames = ChainMap(fullnames)
+            self.__abbreviations = ChainMap(abbreviations)
+        else:
+            self.__fullnames = parent.__fullnames.new_child(fullnames)
+            self.__abbreviations = parent.__abbreviations.new_child(abbreviations)
+
+    def derive(self, **kwargs):
+        """Create a child context with extra or different token values. Values of this
+        context are shared with the child, not copied.
+
+        Args:
+            kwargs: {token_name: option_fullname_or_value}
+
+        Returns:
+            Context: New context with given values on top of these ones.
+        """
+        return Context(kwargs, parent=self)
+
+    def solve(self, template, **kwargs):
+        """Solve given template with the values of this context.
+
+        Args:
+            ``template`` (str or Template): Name of the template or Template object to solve.
+
+            kwargs: {token_name: option_fullname_or_value} Values to use instead of the ones
+            in this context, for this call only.
+
+        Raises:
+            TemplateError: Given template name was not found in current session.
+
+            SolvingError: Missing value for a required token in given template.
+
+        Returns:
+            [str]: Solved path, remapped to the current platform root, see roots.add_root().
+        """
+        template = self.__get_template(template)
+        values = dict()
+        for field, token_name in _get_solve_plan(template):
+            token = get_token(token_name)
+            if token is None:
+                raise SolvingError(
+                    "Token '{}' in template '{}' not found in current session.".format(
+                        token_name, template.name
+                    )
+                )
+            value = kwargs.get(field)
+            if value is None:
+                value = kwargs.get(token_name)
+            if value is not None:
+                values[field] = token.solve(value)
+                continue
+            value = self.__abbreviations.get(field)
+            if value is None:
+                value = self.__abbreviations.get(token_name)
+            if value is not None:
+                values[field] = value
+            elif not token.required:
+                values[field] = token.solve()
+            else:
+                raise SolvingError(
+                    "Token '{}' is required but it's not in context.".format(token_name)
+                )
+        logger.debug("Solving template {} from context with values {}".format(template.name, values))
+        return roots.map_path(template.solve(**values))
+
+    def fullname(self, token_name):
+        """
+        Args:
+            ``token_name`` (str): Name of the token.
+
+        Returns:
+            [str]: Option fullname, or value for required tokens. None if not in context.
+        """
+        return self.__fullnames.get(token_name)
+
+    def abbreviation(self, token_name):
+        """
+        Args:
+            ``token_name`` (str): Name of the token.
+
+        Returns:
+            [str]: Option abbreviation, or value for required tokens. None if not in context.
+        """
+        return self.__abbreviations.get(token_name)
+
+    @property
+    def parent(self):
+        """
+        Returns:
+            [Context]: Context this one was derived from. None if it's not derived.
+        """
+        return self.__parent
+
+    def __resolve(self, values):
+        fullnames = dict()
+        abbreviations = dict()
+        for name, value in values.items():
+            if value is None:
+                continue
+            token = get_token(name) or get_token(name.rstrip("0123456789"))
+            if token is None:
+                raise TokenError("Token '{}' not found in current session.".format(name))
+            if not token.required and not token.has_option_fullname(value):
+                # Values may come as abbreviations too
+                value = token.parse(value)
+            fullnames[name] = value
+            abbreviations[name] = token.solve(value)
+        return fullnames, abbreviations
+
+    def __get_template(self, template):
+        if isinstance(template, templates.Template):
+            return template
+        template_obj = templates.get_template(template)
+        if template_obj is None:
+            raise TemplateError(
+                "Template '{}' not found in current session.".format(template)
+            )
+        return template_obj
+
+    def __getitem__(self, token_name):
+        return self.__fullnames[token_name]
+
+    def __iter__(self):
+        return iter(self.__fullnames)
+
+    def __len__(self):
+        return len(self.__fullnames)
+
+    def __repr__(self):
+        return "Context({})".format(dict(self.__fullnames))
+
+
+def _get_solve_plan(template):
+    # (field, token_name) for each template field, numbered if the token is repeated
+    expanded_pattern = template.expanded_pattern()
+    key = (template, expanded_pattern)
+    plan = __plans.get(key)
+    if plan is None:
+        fields = template.fields
+        counters = dict()
+        plan = list()
+        for each in fields:
+            if fields.count(each) > 1:
+                counters[each] = counters.get(each, 0) + 1
+                plan.append(("{}{}".format(each, counters[each]), each))
+            else:
+                plan.append((each, each))
+        if len(__plans) >= __PLANS_SIZE:
+            __plans.clear()
+        __plans[key] = plan
+    return plan
@@ -5,18 +5,37 @@ import re
 import os
 import sys
 import json
+import errno
 import shutil
+import functools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 from folderstructure import templates
 from folderstructure import tokens
-from folderstructure.error import RepoError, SolvingError
+from folderstructure import roots
+from folderstructure import instrumentation
+from folderstructure.context import Context
+from folderstructure.validator import PLACEHOLDER_REGEX, get_validator
+from folderstructure.listing import get_listing_cache
+from folderstructure.error import RepoError, SolvingError, TemplateError, TokenError
 from folderstructure.logger import logger
 
 FOLDERSTRUCTURE_REPO_ENV = "FOLDERSTRUCTURE_REPO"
 
+__LATEST_PLACEHOLDER = "\0"
+__PRODUCT_FIELDS_REGEX = re.compile(r'{(.+?)}')
+__CHAIN_CACHE_SIZE = 4096
+__chain_candidates = dict()
+__chain_revision = {"value": None}
+
+ExistenceReport = namedtuple("ExistenceReport", ["existing", "missing", "inaccessible"])
+
 
 def parse(path):
     """Get metadata from a path string recognized by the currently active template.
+    Paths starting with a root of any platform are remapped to the current one first,
+    see roots.add_root().
 
     Args:
         ``path`` (str): Path string e.g.: C:/thisproject/thisasset/model
@@ -26,7 +45,30 @@ def parse(path):
         e.g.: {'project':'thisproject', 'asset':'thisasset', 'pipestep': 'model'}
     """
     template = templates.get_active_template()
-    return template.parse(path)
+    return template.parse(roots.map_path(path))
+
+
+def context(path, template=None):
+    """Parse given path and keep its values in a Context to solve related paths from,
+    without resolving token values again on every call.
+
+    e.g.: context("Y:/Projects/MyProject/ART/scene.ma").solve("render_output", pass_name="beauty")
+
+    Args:
+        ``path`` (str): Path to parse.
+
+        ``template`` (str or Template, optional): Name of the template or Template object
+        to parse with. Defaults to None, which uses the currently active template.
+
+    Raises:
+        ParsingError: Path did not match template pattern.
+
+    Returns:
+        Context: Read only context with parsed values.
+    """
+    if template is None:
+        return Context(parse(path))
+    return Context(_get_template_object(template).parse(roots.map_path(path)))
 
 
 def solve(*args, **kwargs):
@@ -40,7 +82,29 @@ def solve(*args, **kwargs):
     Returns:
         [str]: A string with the resulting name.
     """
-    template = templates.get_active_template()
+    return solve_template(templates.get_active_template(), *args, **kwargs)
+
+
+@instrumentation.timed("solve", lambda template, *args, **kwargs: getattr(template, "name", template))
+def solve_template(template, *args, **kwargs):
+    """Given arguments are used to build a path following given template, no matter
+    which one is currently active. If the path starts with a mapped root, it's remapped
+    to the current platform one, see roots.add_root().
+
+    Args:
+        ``template`` (str or Template): Name of the template or Template object to solve.
+
+    Raises:
+        TemplateError: Given template name was not found in current session.
+
+        TokenError: A required token was passed as None to keyword arguments.
+
+        SolvingError: Missing argument for one field in given template.
+
+    Returns:
+        [str]: A string with the resulting name.
+    """
+    template = _get_template_object(template)
     # * This accounts for those cases where a token is used more than once in a template
     repeated_fields = dict()
     for each in template.fields:
@@ -94,45 +158,431 @@ def solve(*args, **kwargs):
     logger.debug(
         "Solving template {} with values {}".format(template.name, values)
     )
-    return template.solve(**values)
+    return roots.map_path(template.solve(**values))
 
 
-def validate_repo(repo):
-    config_file = os.path.join(repo, "folderstructure.conf")
-    if not os.path.exists(config_file):
-        return False
-    return True
+def solve_platforms(template, platforms=None, **kwargs):
+    """Solve given template once and get the resulting path for several platforms,
+    remapping its root with the session root mapping table.
 
+    Args:
+        ``template`` (str or Template): Name of the template or Template object to solve.
 
-def validate_tokens_and_referenced_templates(pattern):
-    valid = True
+        ``platforms`` (list, optional): Platforms to get paths for, see roots.PLATFORMS.
+        Defaults to None, which uses all of them.
+
+    Raises:
+        TemplateError: Given template name was not found in current session.
 
-    regex = re.compile(r'{(?P<placeholder>.+?)(:(?P<expression>(\\}|.)+?))?}')
-    matches = regex.finditer(pattern)
+        SolvingError: Missing argument for one field in given template.
+
+    Returns:
+        [dict]: {platform: path}
+    """
+    platforms = platforms or roots.PLATFORMS
+    path = solve_template(template, **kwargs)
+    return dict(zip(platforms, roots.map_path_platforms(path, platforms)))
+
+
+def solve_batch(records, template, platforms=None):
+    """Solve given template for many records, optionally for several platforms at once.
+    Template is looked up once and each record is solved only once, no matter the number
+    of platforms.
+
+    Args:
+        ``records`` (list): Dictionaries with token values to solve given template with.
+
+        ``template`` (str or Template): Name of the template or Template object to solve.
+
+        ``platforms`` (list, optional): Platforms to get paths for, see roots.PLATFORMS.
+        Defaults to None, which returns paths for the current platform only.
+
+    Raises:
+        TemplateError: Given template name was not found in current session.
+
+        SolvingError: A record is missing values for required tokens.
+
+    Returns:
+        [list]: Solved paths, or {platform: path} dictionaries if platforms were given,
+        in the same order as records.
+    """
+    template = _get_template_object(template)
+    if platforms is None:
+        return [solve_template(template, **record) for record in records]
+    return [
+        dict(zip(platforms, roots.map_path_platforms(solve_template(template, **record), platforms)))
+        for record in records
+    ]
+
+
+def latest(template, token="version", **kwargs):
+    """Get the highest existing value for given token, e.g.: the latest version of a
+    publish. The parent directory of the token is solved with given keyword arguments,
+    listed once and its entries matched against the path segment holding the token.
+    Values are compared numerically, so 'v10' comes after 'v9'.
+
+    Listings go through the library's ListingCache, so repeated lookups in the same
+    directory don't touch the filesystem again.
+
+    Args:
+        ``template`` (str or Template): Name of the template or Template object to solve.
+
+        ``token`` (str, optional): Name of the token to look the latest value for.
+        Defaults to "version".
+
+        kwargs: Values for the rest of the tokens, as in solve().
+
+    Raises:
+        TemplateError: Given template name was not found in current session.
+
+        SolvingError: Token is not used in template or is not a required token.
+
+    Returns:
+        [str]: Latest existing value for token. None if no matching entry exists.
+    """
+    template = _get_template_object(template)
+    token_obj = tokens.get_token(token)
+    if token not in template.fields:
+        raise SolvingError(
+            "Token '{}' is not used in template '{}'.".format(token, template.name)
+        )
+    if token_obj is None or not token_obj.required:
+        raise SolvingError(
+            "Token '{}' must be a required token to look for its latest value.".format(token)
+        )
+    kwargs[token] = __LATEST_PLACEHOLDER
+    solved = solve_template(template, **kwargs)
+    head, _, tail = solved.partition(__LATEST_PLACEHOLDER)
+    directory, prefix = os.path.split(head)
+    directory = directory or os.curdir
+    suffix = tail.split("/", 1)[0]
+    expression = "^{}(?P<value>[^/]+?){}$".format(
+        re.escape(prefix),
+        "(?P=value)".join([re.escape(each) for each in suffix.split(__LATEST_PLACEHOLDER)])
+    )
+
+    listing = get_listing_cache().get_listing(directory)
+    if listing.error is not None:
+        logger.debug("Directory to look for latest '{}' can't be listed: {}".format(token, directory))
+        return None
+    return listing.memoize(
+        ("latest", expression),
+        functools.partial(__latest_from_listing, re.compile(expression), token_obj)
+    )
+
+
+def __latest_from_listing(regex, token_obj, listing):
+    result = None
+    result_key = None
+    for name in listing.names():
+        match = regex.match(name)
+        if not match:
+            continue
+        value = match.group("value")
+        value_key = tuple(int(digits) for digits in re.findall(r"\d+", value))
+        if not value_key:
+            continue
+        if result_key is None or value_key > result_key:
+            result = token_obj.parse(value)
+            result_key = value_key
+    logger.debug("Latest '{}' in {}: {}".format(token_obj.name, listing.path, result))
+    return result
 
-    total_templates = list(templates.get_templates().keys())
-    total_tokens = list(tokens.get_tokens().keys())
 
-    templates_used = list()
-    tokens_used = list()
-    for match in matches:
-        match_text = match.group(1)
-        if match_text.startswith("@"):
-            templates_used.append(match_text.replace("@", ""))
+def solve_product(template, **kwargs):
+    """Lazily solve a path for every combination of given token values. Combinations are
+    generated in a deterministic order, where the last token in the pattern changes first.
+    The part of the path solved for leading tokens that didn't change is reused, so only
+    the trailing part is built for each new path.
+
+    Not required tokens that are not passed expand to all their options, instead of only
+    their default. Repeated tokens in a pattern use the same value for all repetitions.
+
+    Args:
+        ``template`` (str or Template): Name of the template or Template object to solve.
+
+        kwargs: {token_name: [option fullnames or values]} A single string is taken as a
+        list of one value. e.g.: asset=["Boots", "Male"], pipeline_step="Rigging"
+
+    Raises:
+        TemplateError: Given template name was not found in current session.
+
+        SolvingError: A required token was not passed or passed an empty list.
+
+        TokenError: A passed value is not an option for its Token.
+
+    Yields:
+        [str]: Solved paths, remapped to the current platform root, see roots.add_root().
+    """
+    for values, path in _iter_product(template, kwargs):
+        yield roots.map_path(path)
+
+
+def _iter_product(template, kwargs):
+    template = _get_template_object(template)
+    parts = __PRODUCT_FIELDS_REGEX.split(template.expanded_pattern())
+    literals = parts[0::2]
+    fields = parts[1::2]
+    unique_fields = list()
+    for field in fields:
+        if field not in unique_fields:
+            unique_fields.append(field)
+
+    choices = dict()
+    for field in unique_fields:
+        token = tokens.get_token(field)
+        if token is None:
+            choices[field] = [(field, field)]
+            continue
+        passed = kwargs.get(field)
+        if passed is None:
+            if token.required:
+                raise SolvingError(
+                    "Token '{}' is required but was not passed.".format(field)
+                )
+            passed = sorted(token.options.keys())
+        elif isinstance(passed, str):
+            passed = [passed]
+        if not len(passed):
+            raise SolvingError("No values passed for token '{}'.".format(field))
+        choices[field] = [
+            (value, token.solve(value).replace("\\", "/")) for value in passed
+        ]
+    logger.debug(
+        "Solving product of template {} for {} combinations".format(
+            template.name,
+            functools.reduce(lambda total, each: total * len(each), choices.values(), 1)
+        )
+    )
+
+    def expand(depth, prefix, chosen, selected):
+        if depth == len(fields):
+            yield tuple(chosen), prefix + literals[depth]
+            return
+        field = fields[depth]
+        if field in selected:
+            # Repeated token, reuse the value chosen for its first appearance
+            value, solved = selected[field]
+            for each in expand(depth + 1, prefix + literals[depth] + solved, chosen, selected):
+                yield each
+            return
+        for value, solved in choices[field]:
+            selected[field] = (value, solved)
+            chosen.append(value)
+            for each in expand(depth + 1, prefix + literals[depth] + solved, chosen, selected):
+                yield each
+            chosen.pop()
+            del selected[field]
+
+    for chosen, path in expand(0, "", list(), dict()):
+        yield dict(zip(unique_fields, chosen)), path
+
+
+def resolve_chain(template_list, **kwargs):
+    """Get the first existing path among prioritized templates, all solved with the same
+    token values. e.g.: Shot override, else sequence one, else show default.
+
+    Candidate paths are solved once per set of token values and remembered, and existence
+    is checked through the library's ListingCache, so repeated lookups don't touch the
+    disk until the directories change. Remembered paths are forgotten as soon as tokens,
+    templates or roots of the session change.
+
+    Args:
+        ``template_list`` (list): Names of the templates or Template objects, in order of
+        priority. Templates that can't be solved with given values are skipped.
+
+        kwargs: {token_name: value} Values to solve all templates with.
+
+    Raises:
+        TemplateError: A template name was not found in current session.
+
+    Returns:
+        [str]: First path that exists. None if none of them exists.
+    """
+    cache = get_listing_cache()
+    for path in __chain_candidates_for(template_list, kwargs):
+        if cache.exists(path):
+            return path
+    return None
+
+
+def __chain_candidates_for(template_list, kwargs):
+    revision = (tokens.get_revision(), templates.get_revision(), roots.get_revision())
+    if __chain_revision["value"] != revision:
+        __chain_candidates.clear()
+        __chain_revision["value"] = revision
+    template_objs = tuple(_get_template_object(each) for each in template_list)
+    try:
+        key = (template_objs, tuple(sorted(kwargs.items())))
+        candidates = __chain_candidates.get(key)
+    except TypeError:
+        # Unhashable values, solve without remembering them
+        key = None
+        candidates = None
+    if instrumentation._switch["enabled"]:
+        instrumentation.record_cache("resolve_chain", candidates is not None)
+    if candidates is not None:
+        return candidates
+    candidates = list()
+    for template in template_objs:
+        try:
+            candidates.append(solve_template(template, **kwargs))
+        except (SolvingError, TokenError) as why:
+            logger.debug("Skipping template {} in chain: {}".format(template.name, why))
+    if key is not None:
+        if len(__chain_candidates) >= __CHAIN_CACHE_SIZE:
+            __chain_candidates.clear()
+        __chain_candidates[key] = candidates
+    return candidates
+
+
+def check_exists(records, template, workers=8):
+    """Solve a path for each record and check which of them exist. Paths are grouped by
+    their parent directory and each directory is listed only once, concurrently, through
+    the library's ListingCache. Use it for pre-flight checks on network storage where
+    checking thousands of paths one by one takes too long.
+
+    Args:
+        ``records`` (list): Dictionaries with token values to solve given template with.
+        e.g.: [{"project": "MyProject", "asset": "Boots"}, {"project": "MyProject", "asset": "Male"}]
+
+        ``template`` (str or Template): Name of the template or Template object to solve.
+
+        ``workers`` (int, optional): Number of threads listing directories. Defaults to 8.
+
+    Raises:
+        TemplateError: Given template name was not found in current session.
+
+        SolvingError: A record is missing values for required tokens.
+
+    Returns:
+        ExistenceReport: Named tuple with existing, missing and inaccessible lists of paths.
+    """
+    paths = _solve_records(records, template)
+    parents = sorted(set(_split_path(path)[0] for path in paths))
+    cache = get_listing_cache()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        listings = dict(zip(parents, executor.map(cache.get_listing, parents)))
+    return _build_existence_report(paths, listings)
+
+
+def _solve_records(records, template):
+    template = _get_template_object(template)
+    paths = list()
+    seen = set()
+    for record in records:
+        path = solve_template(template, **record)
+        if path not in seen:
+            seen.add(path)
+            paths.append(path)
+    return paths
+
+
+def _split_path(path):
+    """Split a path in its parent directory and name, ignoring trailing separators, so
+    templates ending with a separator are looked up as their directory.
+
+    Args:
+        ``path`` (str): Solved path.
+
+    Returns:
+        [tuple]: (parent, name)
+    """
+    return os.path.split(path.rstrip("/\\") or path)
+
+
+def _build_existence_report(paths, listings):
+    report = ExistenceReport(list(), list(), list())
+    for path in paths:
+        parent, name = _split_path(path)
+        listing = listings.get(parent)
+        if listing.error is not None:
+            if getattr(listing.error, "errno", None) in (errno.ENOENT, errno.ENOTDIR):
+                report.missing.append(path)
+            else:
+                report.inaccessible.append(path)
+        elif os.path.normcase(name) in listing.entries:
+            report.existing.append(path)
         else:
-            tokens_used.append(match_text)
+            report.missing.append(path)
+    logger.debug(
+        "Existence check: {} existing, {} missing, {} inaccessible.".format(
+            len(report.existing), len(report.missing), len(report.inaccessible)
+        )
+    )
+    return report
+
+
+def _get_template_object(template):
+    if isinstance(template, templates.Template):
+        return template
+    template_obj = templates.get_template(template)
+    if template_obj is None:
+        raise TemplateError(
+            "Template '{}' not found in current session.".format(template)
+        )
+    return template_obj
 
-    for template_use in templates_used:
-        if template_use not in total_templates:
-            valid = False
-            break
 
-    for token_use in tokens_used:
-        if token_use not in total_tokens:
-            valid = False
-            break
+def stats():
+    """Get the counters recorded by instrumentation, along with the listing cache ones.
+    Instrumentation is off by default, turn it on with enable_stats() or for a block of
+    code with collect_stats().
 
-    return valid
+    Returns:
+        [dict]: {"enabled", "calls", "caches", "listing_cache"}, see
+        instrumentation.Collector.stats() for details.
+    """
+    result = instrumentation.get_collector().stats()
+    result["enabled"] = instrumentation.is_enabled()
+    result["listing_cache"] = get_listing_cache().stats()
+    return result
+
+
+def enable_stats(enabled=True):
+    """Turn on or off instrumentation of parse, solve and load_session calls.
+
+    Args:
+        ``enabled`` (bool, optional): Defaults to True.
+
+    Returns:
+        [bool]: Previous state.
+    """
+    return instrumentation.enable(enabled)
+
+
+def collect_stats():
+    """Context manager that turns on instrumentation for a block of code, with counters
+    of its own.
+
+    e.g.:
+        with folderstructure.collect_stats() as collector:
+            run_job()
+        print(collector.stats())
+        print(collector.slowest())
+
+    Returns:
+        [contextmanager]: Yields an instrumentation.Collector.
+    """
+    return instrumentation.collect()
+
+
+def validate_repo(repo):
+    config_file = os.path.join(repo, "folderstructure.conf")
+    if not os.path.exists(config_file):
+        return False
+    return True
+
+
+def validate_tokens_and_referenced_templates(pattern):
+    for match in PLACEHOLDER_REGEX.finditer(pattern):
+        placeholder = match.group("placeholder")
+        if placeholder.startswith("@"):
+            if not templates.has_template(placeholder.replace("@", "")):
+                return False
+        elif not tokens.has_token(placeholder):
+            return False
+    return True
 
 
 def get_repo(force_repo=None):
@@ -218,9 +668,17 @@ def save_session(repo=None, override=True):
     Returns:
         [bool]: True if saving session operation was successful.
     """
-    # Validations
-    templates.validate_templates()
-    tokens.validate_tokens()
+    # Validations, only templates and tokens changed since the last save are checked again
+    validator = get_validator()
+    if validator.empty_templates():
+        raise TemplateError(
+            "Templates '{}': Patterns are not valid.".format(', '.join(sorted(validator.empty_templates())))
+        )
+    if validator.invalid_tokens():
+        raise TokenError(
+            "Tokens '{}': Not required tokens must "
+            "have at least one option (fullname=abbreviation).".format(', '.join(sorted(validator.invalid_tokens())))
+        )
 
     repo = repo or get_repo()
     if override:
@@ -248,7 +706,7 @@ def save_session(repo=None, override=True):
         templates.save_template(name, repo)
     # extra configuration
     active = templates.get_active_template()
-    config = {"set_active_template": active.name if active else None}
+    config = {"set_active_template": active.name if active else None, "roots": roots.get_roots()}
     filepath = os.path.join(repo, "folderstructure.conf")
     logger.debug("Saving active template: {} in {}".format(active.name, filepath))
     with open(filepath, "w") as fp:
@@ -256,6 +714,7 @@ def save_session(repo=None, override=True):
     return True
 
 
+@instrumentation.timed("load_session", lambda repo=None: repo)
 def load_session(repo=None):
     """Load templates, tokens and config from a repository, and create
     Python objects in memory to work with them.
@@ -270,6 +729,7 @@ def load_session(repo=None):
     if not os.path.exists(repo):
         logger.warning("Given repo directory does not exist: {}".format(repo))
         return False
+    __chain_candidates.clear()
     namingconf = os.path.join(repo, "folderstructure.conf")
     if not os.path.exists(namingconf):
         logger.warning("Repo is not valid. folderstructure.conf not found {}".format(namingconf))
@@ -290,4 +750,5 @@ def load_session(repo=None):
         with open(namingconf) as fp:
             config = json.load(fp)
         templates.set_active_template(config.get('set_active_template'))
+        roots.set_roots(config.get('roots'))
     return True
@@ -0,0 +1,228 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import random
+import functools
+import threading
+import contextlib
+from timeit import default_timer
+
+from folderstructure.logger import logger
+
+SAMPLES_SIZE = 1024
+PERCENTILES = (50, 90, 99)
+
+# Read by instrumented functions on every call, keep it a plain dict lookup
+_switch = {"enabled": False}
+
+
+class Collector(object):
+    """Counters and latencies of instrumented calls, grouped by kind of call and name,
+    usually the template name. Latency percentiles are computed from a bounded random
+    sample of each group, so memory doesn't grow with the number of calls.
+    """
+    def __init__(self):
+        self.__calls = dict()
+        self.__caches = dict()
+        self.__lock = threading.Lock()
+        self.__random = random.Random(0)
+
+    def record(self, kind, name, seconds, failed=False):
+        """Record one call.
+
+        Args:
+            ``kind`` (str): Kind of call, e.g.: "Template.parse"
+
+            ``name`` (str): Name the call is grouped by, e.g.: template name.
+
+            ``seconds`` (float): Time the call took.
+
+            ``failed`` (bool, optional): The call raised an error. Defaults to False.
+        """
+        with self.__lock:
+            group = self.__calls.get((kind, name))
+            if group is None:
+                # [calls, failures, total seconds, samples]
+                group = self.__calls[(kind, name)] = [0, 0, 0.0, list()]
+            group[0] += 1
+            group[2] += seconds
+            if failed:
+                group[1] += 1
+            samples = group[3]
+            if len(samples) < SAMPLES_SIZE:
+                samples.append(seconds)
+            else:
+                index = self.__random.randrange(group[0])
+                if index < SAMPLES_SIZE:
+                    samples[index] = seconds
+
+    def record_cache(self, cache, hit):
+        """Record one cache lookup.
+
+        Args:
+            ``cache`` (str): Name of the cache, e.g.: "Template.regex"
+
+            ``hit`` (bool): Value was found in the cache.
+        """
+        with self.__lock:
+            counters = self.__caches.get(cache)
+            if counters is None:
+                counters = self.__caches[cache] = [0, 0]
+            counters[0 if hit else 1] += 1
+
+    def stats(self):
+        """
+        Returns:
+            [dict]: {"calls": {kind: {name: {"calls", "failures", "total", "mean", "p50",
+            "p90", "p99"}}}, "caches": {cache: {"hits", "misses", "hit_rate"}}}
+            Times are in seconds.
+        """
+        with self.__lock:
+            calls = dict()
+            for (kind, name), (count, failures, total, samples) in self.__calls.items():
+                ordered = sorted(samples)
+                group = {
+                    "calls": count,
+                    "failures": failures,
+                    "total": total,
+                    "mean": total / count if count else 0.0
+                }
+                for percentile in PERCENTILES:
+                    index = min(len(ordered) - 1, int(len(ordered) * percentile / 100.0))
+                    group["p{}".format(percentile)] = ordered[index] if ordered else 0.0
+                calls.setdefault(kind, dict())[name] = group
+            caches = dict()
+            for cache, (hits, misses) in self.__caches.items():
+                total = hits + misses
+                caches[cache] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": float(hits) / total if total else 0.0
+                }
+        return {"calls": calls, "caches": caches}
+
+    def slowest(self, count=10):
+        """
+        Args:
+            ``count`` (int, optional): Number of groups to return. Defaults to 10.
+
+        Returns:
+            [list]: (kind, name, total seconds) for the groups that took longest overall.
+        """
+        with self.__lock:
+            totals = [(kind, name, group[2]) for (kind, name), group in self.__calls.items()]
+        return sorted(totals, key=lambda each: -each[2])[:count]
+
+    def reset(self):
+        """Clears all counters."""
+        with self.__lock:
+            self.__calls.clear()
+            self.__caches.clear()
+
+
+__state = {"collector": Collector()}
+
+
+def enable(enabled=True):
+    """Turn instrumentation on or off. It's off by default, and instrumented functions only
+    check a flag when it's off.
+
+    Args:
+        ``enabled`` (bool, optional): Defaults to True.
+
+    Returns:
+        [bool]: Previous state.
+    """
+    previous = _switch["enabled"]
+    _switch["enabled"] = bool(enabled)
+    logger.debug("Instrumentation {}".format("enabled" if enabled else "disabled"))
+    return previous
+
+
+def is_enabled():
+    """
+    Returns:
+        [bool]: True if instrumentation is on.
+    """
+    return _switch["enabled"]
+
+
+def get_collector():
+    """
+    Returns:
+        Collector: Collector currently receiving records.
+    """
+    return __state["collector"]
+
+
+@contextlib.contextmanager
+def collect():
+    """Enable instrumentation for a block of code, recording into a new Collector.
+    Previous state and collector are restored afterwards.
+
+    e.g.:
+        with instrumentation.collect() as collector:
+            do_something()
+        print(collector.stats())
+
+    Yields:
+        Collector: Collector with the records of the block only.
+    """
+    collector = Collector()
+    previous_collector = __state["collector"]
+    previous = enable(True)
+    __state["collector"] = collector
+    try:
+        yield collector
+    finally:
+        __state["collector"] = previous_collector
+        enable(previous)
+
+
+def record_cache(cache, hit):
+    """Record a cache lookup if instrumentation is on. Callers in hot paths should check
+    _switch["enabled"] before calling it.
+
+    Args:
+        ``cache`` (str): Name of the cache.
+
+        ``hit`` (bool): Value was found in the cache.
+    """
+    if _switch["enabled"]:
+        __state["collector"].record_cache(cache, hit)
+
+
+def timed(kind, get_name):
+    """Decorator recording calls, latency and failures of a function while instrumentation
+    is on.
+
+    Args:
+        ``kind`` (str): Kind of call, e.g.: "Template.parse"
+
+        ``get_name`` (callable): Called with the same arguments as the function, returns
+        the name to group the call by.
+
+    Returns:
+        [callable]: Decorator.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _switch["enabled"]:
+                return function(*args, **kwargs)
+            collector = __state["collector"]
+            failed = True
+            start = default_timer()
+            try:
+                result = function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                seconds = default_timer() - start
+                try:
+                    name = get_name(*args, **kwargs)
+                except Exception:
+                    name = None
+                collector.record(kind, name, seconds, failed)
+        return wrapper
+    return decorator
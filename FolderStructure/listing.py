@@ -0,0 +1,335 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+try:
+    from os import scandir
+except ImportError:
+    # Python 2 needs the scandir backport
+    from scandir import scandir
+
+from folderstructure.logger import logger
+
+
+class Listing(object):
+    """Cached result of scanning a single directory.
+
+    ``path`` (str): Normalized path of the listed directory.
+
+    ``mtime`` (float): Modification time of the directory when it was listed.
+
+    ``entries`` (dict): {normcased_name: os.DirEntry}
+
+    ``error`` (OSError): If the directory couldn't be listed, the error that was raised.
+    """
+    __slots__ = ("path", "mtime", "entries", "error", "checked", "_memo")
+
+    def __init__(self, path, mtime=None, entries=None, error=None):
+        self.path = path
+        self.mtime = mtime
+        self.entries = entries or dict()
+        self.error = error
+        self.checked = time.time()
+        self._memo = dict()
+
+    def memoize(self, key, function):
+        """Get a value derived from this listing, computing it only once. Memoized values
+        go away with the listing, so they are always in sync with the directory contents.
+
+        Args:
+            ``key`` (hashable): Unique key identifying the derived value.
+
+            ``function`` (callable): Called with this listing to compute the value.
+
+        Returns:
+            object: The value returned by function.
+        """
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = function(self)
+            self._memo[key] = value
+            return value
+
+    def names(self):
+        """
+        Returns:
+            [list]: Names of all the entries in this directory.
+        """
+        return [entry.name for entry in self.entries.values()]
+
+
+class ListingCache(object):
+    """Directory listings cache shared by every filesystem-facing feature of the library.
+    Each directory is scanned once and its entries are reused until TTL seconds have
+    passed. After that the directory mtime is checked and it's only scanned again if it
+    changed. Least recently used listings are dropped when max_size is reached.
+
+    Args:
+        ``ttl`` (float, optional): Seconds a listing is trusted without checking the
+        directory mtime. Defaults to 5.0.
+
+        ``max_size`` (int, optional): Maximum number of directories to keep. Defaults to 4096.
+    """
+    def __init__(self, ttl=5.0, max_size=4096):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.__listings = OrderedDict()
+        self.__lock = threading.RLock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def get_listing(self, path, store=True):
+        """Get the Listing object for given directory, scanning it if needed.
+
+        Args:
+            ``path`` (str): Directory path.
+
+            ``store`` (bool, optional): Keep a new listing in the cache. Full tree walks pass
+            False so they reuse cached listings without evicting them. Defaults to True.
+
+        Returns:
+            Listing: Cached listing. If the directory couldn't be listed, listing.error
+            holds the raised error.
+        """
+        key = self.__key(path)
+        with self.__lock:
+            listing = self.__listings.pop(key, None)
+            if listing is not None:
+                # Re-inserting marks it as the most recently used
+                self.__listings[key] = listing
+        now = time.time()
+        if listing is not None and now - listing.checked < self.ttl:
+            self.__count(hit=True)
+            return listing
+
+        mtime = None
+        error = None
+        try:
+            mtime = os.stat(key).st_mtime
+        except (IOError, OSError) as why:
+            error = why
+        if listing is not None and listing.mtime == mtime and listing.error is None:
+            listing.checked = now
+            self.__count(hit=True)
+            return listing
+
+        self.__count(hit=False)
+        if error is None:
+            try:
+                entries = dict(
+                    (os.path.normcase(entry.name), entry) for entry in scandir(key)
+                )
+                listing = Listing(key, mtime, entries)
+            except (IOError, OSError) as why:
+                listing = Listing(key, mtime, error=why)
+        else:
+            listing = Listing(key, error=error)
+        logger.debug("Listed directory: {} ({} entries)".format(key, len(listing.entries)))
+        if store:
+            self.__store(key, listing)
+        return listing
+
+    def scandir(self, path):
+        """Cached equivalent of os.scandir.
+
+        Args:
+            ``path`` (str): Directory path.
+
+        Raises:
+            OSError: If directory doesn't exist or can't be accessed.
+
+        Returns:
+            [list]: os.DirEntry objects for all the entries in the directory.
+        """
+        listing = self.get_listing(path)
+        if listing.error is not None:
+            raise listing.error
+        return list(listing.entries.values())
+
+    def listdir(self, path):
+        """Cached equivalent of os.listdir.
+
+        Args:
+            ``path`` (str): Directory path.
+
+        Raises:
+            OSError: If directory doesn't exist or can't be accessed.
+
+        Returns:
+            [list]: Names of all the entries in the directory.
+        """
+        return [entry.name for entry in self.scandir(path)]
+
+    def get_entry(self, path):
+        """Get the os.DirEntry for given path from its parent directory listing.
+
+        Args:
+            ``path`` (str): File or directory path.
+
+        Returns:
+            os.DirEntry: Entry for given path. None if it doesn't exist.
+        """
+        parent, name = os.path.split(self.__key(path))
+        if not name:
+            return None
+        listing = self.get_listing(parent)
+        return listing.entries.get(os.path.normcase(name))
+
+    def exists(self, path):
+        """Cached equivalent of os.path.exists, looking for the path in its parent listing.
+
+        Args:
+            ``path`` (str): File or directory path.
+
+        Returns:
+            [bool]: True if path exists, False otherwise.
+        """
+        parent, name = os.path.split(self.__key(path))
+        if not name:
+            return os.path.exists(path)
+        return self.get_entry(path) is not None
+
+    def isdir(self, path):
+        """Cached equivalent of os.path.isdir.
+
+        Args:
+            ``path`` (str): Path to test.
+
+        Returns:
+            [bool]: True if path exists and is a directory, False otherwise.
+        """
+        entry = self.get_entry(path)
+        if entry is None:
+            return False
+        try:
+            return entry.is_dir()
+        except (IOError, OSError):
+            return False
+
+    def invalidate(self, path=None, recursive=False):
+        """Drop cached listings so they're scanned again next time they're requested.
+        Call this after creating, moving or removing files or directories.
+
+        Args:
+            ``path`` (str, optional): Directory to invalidate. Defaults to None, which
+            invalidates everything.
+
+            ``recursive`` (bool, optional): Also invalidate all the directories below path.
+            Defaults to False.
+
+        Returns:
+            [int]: Number of listings dropped.
+        """
+        with self.__lock:
+            if path is None:
+                dropped = len(self.__listings)
+                self.__listings.clear()
+                return dropped
+            key = self.__key(path)
+            keys = [key]
+            if recursive:
+                prefix = key.rstrip("/\\") + os.sep
+                keys.extend([k for k in self.__listings.keys() if k.startswith(prefix)])
+            dropped = 0
+            for each in keys:
+                if self.__listings.pop(each, None) is not None:
+                    dropped += 1
+            return dropped
+
+    def invalidate_parent(self, path):
+        """Drop the cached listing of the directory containing given path.
+
+        Args:
+            ``path`` (str): File or directory path that was created, moved or removed.
+
+        Returns:
+            [int]: Number of listings dropped.
+        """
+        return self.invalidate(os.path.dirname(self.__key(path)))
+
+    def clear(self):
+        """Clears all listings and statistics.
+
+        Returns:
+            bool: True if clearing was successful.
+        """
+        with self.__lock:
+            self.__listings.clear()
+            self.__hits = 0
+            self.__misses = 0
+            self.__evictions = 0
+        return True
+
+    def stats(self):
+        """
+        Returns:
+            [dict]: {"hits", "misses", "hit_rate", "evictions", "size", "max_size", "ttl"}
+        """
+        with self.__lock:
+            total = self.__hits + self.__misses
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "hit_rate": float(self.__hits) / total if total else 0.0,
+                "evictions": self.__evictions,
+                "size": len(self.__listings),
+                "max_size": self.max_size,
+                "ttl": self.ttl
+            }
+
+    def __store(self, key, listing):
+        with self.__lock:
+            self.__listings.pop(key, None)
+            self.__listings[key] = listing
+            while len(self.__listings) > self.max_size:
+                self.__listings.popitem(last=False)
+                self.__evictions += 1
+
+    def __count(self, hit):
+        with self.__lock:
+            if hit:
+                self.__hits += 1
+            else:
+                self.__misses += 1
+
+    def __key(self, path):
+        return os.path.normpath(path)
+
+    def __len__(self):
+        return len(self.__listings)
+
+    def __contains__(self, path):
+        return self.__key(path) in self.__listings
+
+
+__listing_cache = {"cache": ListingCache()}
+
+
+def get_listing_cache():
+    """Get the listing cache used by every filesystem-facing feature of the library.
+
+    Returns:
+        ListingCache: Currently active listing cache.
+    """
+    return __listing_cache["cache"]
+
+
+def set_listing_cache(cache):
+    """Replace the listing cache used by every filesystem-facing feature of the library.
+    Useful to tweak ttl and max_size, or to plug in a ListingCache subclass.
+
+    Args:
+        ``cache`` (ListingCache): Listing cache to use from now on.
+
+    Returns:
+        ListingCache: The listing cache that was replaced.
+    """
+    previous = __listing_cache["cache"]
+    __listing_cache["cache"] = cache
+    return previous
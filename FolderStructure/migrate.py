@@ -0,0 +1,420 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import json
+import errno
+import shutil
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from folderstructure import templates
+from folderstructure import roots
+from folderstructure.folderstructure import solve_template, _get_template_object
+from folderstructure.listing import get_listing_cache
+from folderstructure.error import ParsingError, SolvingError, TokenError
+from folderstructure.logger import logger
+
+Move = namedtuple("Move", ["source", "target"])
+MigrationResult = namedtuple("MigrationResult", ["moved", "failed"])
+
+
+class MigrationPlan(object):
+    """Deduplicated list of directory moves needed to go from one template to another.
+    Build it with plan(), review it, and run it with migrate().
+
+    ``source`` (str): Name of the template paths currently follow.
+
+    ``target`` (str): Name of the template paths are moved to.
+
+    ``moves`` (list): Move named tuples (source, target) sorted by source path.
+
+    ``skipped`` (list): (path, reason) Paths that couldn't be parsed or solved.
+
+    ``conflicts`` (list): (Move, reason) Moves left out because they clash with another
+    one, e.g.: Two directories moved to the same place. They must be solved by hand.
+    """
+    def __init__(self, source, target, moves=None, skipped=None, conflicts=None):
+        self.source = source
+        self.target = target
+        self.moves = moves or list()
+        self.skipped = skipped or list()
+        self.conflicts = conflicts or list()
+
+    def data(self):
+        """
+        Returns:
+            [dict]: Serializable data of this plan.
+        """
+        return {
+            "source": self.source,
+            "target": self.target,
+            "moves": [list(move) for move in self.moves],
+            "skipped": [list(each) for each in self.skipped],
+            "conflicts": [[list(move), reason] for move, reason in self.conflicts]
+        }
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Args:
+            ``data`` (dict): Data returned by MigrationPlan.data()
+
+        Returns:
+            MigrationPlan: New plan with given data.
+        """
+        return cls(
+            data["source"],
+            data["target"],
+            [Move(*move) for move in data["moves"]],
+            [tuple(each) for each in data.get("skipped", list())],
+            [(Move(*move), reason) for move, reason in data.get("conflicts", list())]
+        )
+
+    def __len__(self):
+        return len(self.moves)
+
+
+def plan(paths, source, target, fixed=None, **kwargs):
+    """Build the moves needed to take existing paths from one template to another.
+
+    Each path is matched against the source template one directory level at a time, and
+    the shortest part of it that parses is solved with the target template. So file paths
+    deeper than the template collapse into a single move of the directory that contains
+    them, and moves already implied by a move of a parent directory are dropped.
+
+    Args:
+        ``paths`` (iterable): Existing paths. It's consumed lazily, so it can be a
+        generator, e.g.: scan.scan() paths or lines of a file.
+
+        ``source`` (str): Name of the template paths currently follow.
+
+        ``target`` (str): Name of the template paths are moved to.
+
+        ``fixed`` (dict, optional): {token_name: option_fullname_or_value} Values paths
+        have for source template tokens, see Template.regex(). Use it for tokens that could
+        match more than one directory level, e.g.: projects_root. Defaults to None.
+
+        kwargs: {token_name: value} Values to solve target template with, overriding parsed
+        ones. Needed for tokens that are only in the target template.
+
+    Raises:
+        TemplateError: Given template names were not found in current session.
+
+    Returns:
+        MigrationPlan: Moves to run with migrate().
+    """
+    source_template = _get_template_object(source)
+    target_template = _get_template_object(target)
+    fixed = roots.map_values(fixed) if fixed else fixed
+    regex = source_template.regex(templates.Template.ANCHOR_BOTH, fixed)
+    result = MigrationPlan(source_template.name, target_template.name)
+    moves = dict()
+    for path in paths:
+        path = roots.map_path(path).replace("\\", "/").rstrip("/")
+        matched = None
+        values = None
+        parts = path.split("/")
+        for level in range(1, len(parts) + 1):
+            prefix = "/".join(parts[:level])
+            if prefix in moves:
+                matched = prefix
+                break
+            if regex.match(prefix) is None:
+                continue
+            try:
+                values = source_template.parse(
+                    prefix, anchor=templates.Template.ANCHOR_BOTH, fixed=fixed
+                )
+            except (ParsingError, TokenError):
+                continue
+            matched = prefix
+            break
+        if matched is None:
+            result.skipped.append((path, "Doesn't match template '{}'.".format(source)))
+            continue
+        if matched in moves:
+            continue
+        values.update(kwargs)
+        try:
+            solved = solve_template(target_template, **values).replace("\\", "/").rstrip("/")
+        except (SolvingError, TokenError) as why:
+            result.skipped.append((path, str(why)))
+            continue
+        moves[matched] = solved
+    __add_moves(result, moves)
+    logger.debug(
+        "Migration plan: {} moves, {} skipped, {} conflicts.".format(
+            len(result.moves), len(result.skipped), len(result.conflicts)
+        )
+    )
+    return result
+
+
+def __add_moves(result, moves):
+    # Parent directories come first when sorting by path components
+    accepted = list()
+    for source in sorted(moves.keys(), key=lambda each: each.split("/")):
+        move = Move(source, moves[source])
+        if move.source == move.target:
+            continue
+        while accepted and not move.source.startswith(accepted[-1].source + "/"):
+            accepted.pop()
+        if accepted:
+            parent = accepted[-1]
+            if move.target == parent.target + move.source[len(parent.source):]:
+                continue
+            result.conflicts.append((move, "Inside '{}', moved elsewhere.".format(parent.source)))
+            continue
+        accepted.append(move)
+        result.moves.append(move)
+
+    # Moves must not depend on each other, so they can run in any order
+    sources = set(move.source for move in result.moves)
+    targets = dict()
+    for move in result.moves:
+        targets.setdefault(move.target, list()).append(move)
+    clashing = dict()
+    for move in result.moves:
+        if len(targets[move.target]) > 1:
+            clashing[move] = "Other directories are moved to '{}'.".format(move.target)
+            continue
+        parent = move.target
+        while "/" in parent.strip("/"):
+            parent = parent.rsplit("/", 1)[0]
+            if parent in sources:
+                clashing[move] = "Target is inside moved directory '{}'.".format(parent)
+                break
+            if parent in targets:
+                clashing[move] = "Target is inside target '{}'.".format(parent)
+                break
+    if clashing:
+        result.moves = [move for move in result.moves if move not in clashing]
+        result.conflicts.extend(sorted(clashing.items()))
+
+
+def migrate(migration_plan, journal, workers=8):
+    """Run the moves of a plan in parallel, recording them in a journal file. Each move is
+    recorded before it starts and once it's done, and so is each directory created for it.
+    If the run is interrupted, resume() finishes it and rollback() undoes it.
+
+    Targets that already exist are never overwritten, those moves fail instead. Parent
+    directories of targets are created as needed.
+
+    Args:
+        ``migration_plan`` (MigrationPlan): Plan built with plan().
+
+        ``journal`` (str): Path of the journal file. It must not exist.
+
+        ``workers`` (int, optional): Number of moves run at the same time. Defaults to 8.
+
+    Raises:
+        IOError: Journal file already exists.
+
+    Returns:
+        MigrationResult: Named tuple with moved list of Move and failed list of
+        (Move, error message).
+    """
+    if os.path.exists(journal):
+        raise IOError("Migration journal already exists: {}".format(journal))
+    with open(journal, "w") as fp:
+        fp.write(json.dumps({"op": "plan", "plan": migration_plan.data()}))
+        fp.write("\n")
+    return __run(journal, [(i, move) for i, move in enumerate(migration_plan.moves)], workers)
+
+
+def resume(journal, workers=8):
+    """Run the moves of an interrupted migration that were not done yet. Moves that failed
+    are tried again, and moves that were done but not recorded are recorded.
+
+    Args:
+        ``journal`` (str): Path of the journal file written by migrate().
+
+        ``workers`` (int, optional): Number of moves run at the same time. Defaults to 8.
+
+    Returns:
+        MigrationResult: Named tuple with moved and failed moves in this run.
+    """
+    migration_plan, done = read_journal(journal)
+    pending = [(i, move) for i, move in enumerate(migration_plan.moves) if i not in done]
+    logger.info("Resuming migration: {} moves pending.".format(len(pending)))
+    return __run(journal, pending, workers)
+
+
+def rollback(journal, workers=8):
+    """Move back every directory a migration moved, no matter if it finished or not, and
+    remove the directories it created if they are empty.
+
+    Moves that were started but not recorded as done are checked on disk, they are moved
+    back if their source is gone and their target exists.
+
+    Args:
+        ``journal`` (str): Path of the journal file written by migrate().
+
+        ``workers`` (int, optional): Number of moves run at the same time. Defaults to 8.
+
+    Returns:
+        MigrationResult: Named tuple with moved and failed moves, with source and target
+        swapped.
+    """
+    migration_plan, done, started, created = __read_records(journal)
+    undo = list()
+    for i in sorted(done | started):
+        move = migration_plan.moves[i]
+        if i not in done and (os.path.lexists(move.source) or not os.path.lexists(move.target)):
+            # Interrupted before moving
+            continue
+        undo.append((i, Move(move.target, move.source)))
+    logger.info("Rolling back migration: {} moves to undo.".format(len(undo)))
+    result = __run(journal, undo, workers, record="undone")
+    __remove_created(journal, created)
+    return result
+
+
+def read_journal(journal):
+    """Read the plan and the current state of a migration from its journal file.
+
+    Args:
+        ``journal`` (str): Path of the journal file written by migrate().
+
+    Returns:
+        [tuple]: (MigrationPlan, set of indices of the moves currently done)
+    """
+    migration_plan, done, started, created = __read_records(journal)
+    return migration_plan, done
+
+
+def __read_records(journal):
+    """
+    Returns:
+        [tuple]: (MigrationPlan, indices of moves done, indices of moves started and not
+        undone, directories created and not removed in creation order)
+    """
+    migration_plan = None
+    done = set()
+    started = set()
+    created = list()
+    with open(journal) as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Last line may be half written if the process was killed
+                logger.warning("Ignoring malformed journal line: {}".format(line.strip()))
+                continue
+            if record["op"] == "plan":
+                migration_plan = MigrationPlan.from_data(record["plan"])
+            elif record["op"] == "start":
+                started.add(record["index"])
+            elif record["op"] == "done":
+                done.add(record["index"])
+            elif record["op"] == "undone":
+                done.discard(record["index"])
+                started.discard(record["index"])
+            elif record["op"] == "mkdir":
+                created.append(record["path"])
+            elif record["op"] == "rmdir" and record["path"] in created:
+                created.remove(record["path"])
+    if migration_plan is None:
+        raise IOError("Migration journal has no plan: {}".format(journal))
+    return migration_plan, done, started, created
+
+
+def __run(journal, moves, workers, record="done"):
+    result = MigrationResult(list(), list())
+    lock = threading.Lock()
+    cache = get_listing_cache()
+
+    with open(journal, "a") as fp:
+        def write_record(data):
+            with lock:
+                fp.write(json.dumps(data))
+                fp.write("\n")
+                fp.flush()
+                os.fsync(fp.fileno())
+
+        def run_move(item):
+            index, move = item
+            if record == "done":
+                # Recorded before moving, so rollback knows to check it on disk
+                write_record({"op": "start", "index": index})
+            try:
+                __move(move, lambda path: write_record({"op": "mkdir", "path": path}))
+            except (IOError, OSError) as why:
+                logger.error("Failed to move {} to {}: {}".format(move.source, move.target, why))
+                with lock:
+                    result.failed.append((move, str(why)))
+                return
+            finally:
+                cache.invalidate_parent(move.source)
+                cache.invalidate_parent(move.target)
+            write_record({"op": record, "index": index})
+            with lock:
+                result.moved.append(move)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            list(executor.map(run_move, moves))
+    logger.info("Migration run: {} moved, {} failed.".format(len(result.moved), len(result.failed)))
+    return result
+
+
+def __move(move, record_mkdir):
+    # Not using the listing cache on purpose, a stale listing could overwrite a target
+    if not os.path.lexists(move.source) and os.path.lexists(move.target):
+        # Moved by a run that was interrupted before writing the journal
+        return
+    if os.path.lexists(move.target):
+        raise OSError("Target already exists: {}".format(move.target))
+    __make_parents(move.target, record_mkdir)
+    try:
+        os.rename(move.source, move.target)
+    except OSError:
+        if not os.path.exists(move.source):
+            raise
+        # Different devices, fall back to copying
+        shutil.move(move.source, move.target)
+
+
+def __make_parents(path, record_mkdir):
+    missing = list()
+    parent = os.path.dirname(path)
+    while parent and not os.path.isdir(parent):
+        missing.append(parent)
+        next_parent = os.path.dirname(parent)
+        if next_parent == parent:
+            break
+        parent = next_parent
+    for directory in reversed(missing):
+        # Recorded before creating it, rollback ignores directories that don't exist
+        record_mkdir(directory)
+        try:
+            os.mkdir(directory)
+        except OSError as why:
+            # Created by another move at the same time
+            if why.errno != errno.EEXIST:
+                raise
+
+
+def __remove_created(journal, created):
+    cache = get_listing_cache()
+    removed = 0
+    with open(journal, "a") as fp:
+        # Deepest first, so parents are empty when their turn comes
+        depth = lambda each: each.replace("\\", "/").count("/")
+        for directory in sorted(set(created), key=depth, reverse=True):
+            try:
+                os.rmdir(directory)
+            except OSError as why:
+                if why.errno not in (errno.ENOENT, errno.ENOTEMPTY, errno.EEXIST):
+                    logger.warning("Couldn't remove directory {}: {}".format(directory, why))
+                if why.errno != errno.ENOENT:
+                    continue
+            else:
+                removed += 1
+            cache.invalidate_parent(directory)
+            fp.write(json.dumps({"op": "rmdir", "path": directory}))
+            fp.write("\n")
+    logger.info("Rollback removed {} directories created by the migration.".format(removed))
@@ -0,0 +1,221 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import re
+import sys
+
+from folderstructure.logger import logger
+
+WINDOWS = "windows"
+LINUX = "linux"
+MAC = "mac"
+PLATFORMS = (WINDOWS, LINUX, MAC)
+
+__roots = dict()
+__compiled = {"regex": None, "groups": None, "revision": 0}
+
+
+def current_platform():
+    """
+    Returns:
+        [str]: One of WINDOWS, LINUX or MAC for the running interpreter.
+    """
+    if sys.platform.startswith("win"):
+        return WINDOWS
+    if sys.platform == "darwin":
+        return MAC
+    return LINUX
+
+
+def add_root(name, **kwargs):
+    """Add a root to the mapping table, with the path it has on each platform. Paths solved
+    or parsed starting with any of them are remapped to the current platform one.
+
+    e.g.: add_root("projects", windows="Y:/Projects", linux="/mnt/projects")
+
+    Args:
+        ``name`` (str): Name of the root.
+
+        kwargs: {platform: path} Path of the root for each of PLATFORMS.
+
+    Raises:
+        ValueError: Unknown platform or no paths were given.
+
+    Returns:
+        [bool]: True if root was added.
+    """
+    if not kwargs:
+        raise ValueError("Root '{}' needs a path for at least one platform.".format(name))
+    for platform in kwargs.keys():
+        if platform not in PLATFORMS:
+            raise ValueError(
+                "Unknown platform '{}'. Use one of: {}".format(platform, ", ".join(PLATFORMS))
+            )
+    __roots[name] = dict(
+        (platform, path.replace("\\", "/").rstrip("/")) for platform, path in kwargs.items()
+    )
+    __compiled["regex"] = None
+    __compiled["revision"] += 1
+    logger.debug("Root added: {} {}".format(name, __roots[name]))
+    return True
+
+
+def remove_root(name):
+    """
+    Args:
+        ``name`` (str): Name of the root.
+
+    Returns:
+        [bool]: True if root was removed, False if it didn't exist.
+    """
+    if name not in __roots:
+        return False
+    del __roots[name]
+    __compiled["regex"] = None
+    __compiled["revision"] += 1
+    return True
+
+
+def reset_roots():
+    """Remove all roots from the mapping table.
+
+    Returns:
+        [bool]: True if reset was successful.
+    """
+    __roots.clear()
+    __compiled["regex"] = None
+    __compiled["revision"] += 1
+    return True
+
+
+def get_revision():
+    """Number of changes made to the mapping table. Caches of solved paths compare it to
+    know when they are stale.
+
+    Returns:
+        [int]: Revision of the mapping table.
+    """
+    return __compiled["revision"]
+
+
+def get_root(name, platform=None):
+    """
+    Args:
+        ``name`` (str): Name of the root.
+
+        ``platform`` (str, optional): One of PLATFORMS. Defaults to None, current platform.
+
+    Returns:
+        [str]: Path of the root in given platform. None if it's not mapped.
+    """
+    return __roots.get(name, dict()).get(platform or current_platform())
+
+
+def get_roots():
+    """
+    Returns:
+        [dict]: {root_name: {platform: path}} The whole mapping table.
+    """
+    return __roots
+
+
+def set_roots(data):
+    """Replace the mapping table with given one, e.g.: as loaded from a repo.
+
+    Args:
+        ``data`` (dict): {root_name: {platform: path}}
+
+    Returns:
+        [bool]: True if roots were set.
+    """
+    reset_roots()
+    for name, paths in (data or dict()).items():
+        add_root(name, **paths)
+    return True
+
+
+def map_path(path, platform=None):
+    """Remap the root of given path to the one of given platform. Paths from any
+    platform are recognized in a single regular expression match.
+
+    Args:
+        ``path`` (str): Path starting with a root of any platform.
+
+        ``platform`` (str, optional): One of PLATFORMS. Defaults to None, current platform.
+
+    Returns:
+        [str]: Remapped path with slashes. Same path if it doesn't start with a mapped root,
+        or the root has no path for given platform.
+    """
+    return map_path_platforms(path, (platform or current_platform(),))[0]
+
+
+def map_values(values, platform=None):
+    """Remap the roots of token values that are paths, e.g.: fixed projects_root values.
+
+    Args:
+        ``values`` (dict): {token_name: value}
+
+        ``platform`` (str, optional): One of PLATFORMS. Defaults to None, current platform.
+
+    Returns:
+        [dict]: New dictionary with remapped values. Values that are not strings or don't
+        start with a mapped root are kept as they are.
+    """
+    return dict(
+        (name, map_path(value, platform) if isinstance(value, str) else value)
+        for name, value in values.items()
+    )
+
+
+def map_path_platforms(path, platforms):
+    """Remap the root of given path to each of given platforms, matching it only once.
+
+    Args:
+        ``path`` (str): Path starting with a root of any platform.
+
+        ``platforms`` (list): PLATFORMS to remap the path to.
+
+    Returns:
+        [list]: Remapped paths, in the same order as platforms.
+    """
+    if not __roots:
+        return [path] * len(platforms)
+    normalized = path.replace("\\", "/") if "\\" in path else path
+    match = None
+    for regex in __get_regexes():
+        candidate = regex.match(normalized)
+        if candidate is not None and (match is None or candidate.end() > match.end()):
+            match = candidate
+    if match is None:
+        return [path] * len(platforms)
+    name = __compiled["groups"][match.lastgroup]
+    rest = normalized[match.end():]
+    result = list()
+    for platform in platforms:
+        root = __roots[name].get(platform)
+        result.append(path if root is None else root + rest)
+    return result
+
+
+def __get_regexes():
+    # Windows roots are matched ignoring case, in their own expression since scoped
+    # inline flags need Python 3.6. The longest match of both wins
+    if __compiled["regex"] is None:
+        alternatives = {True: list(), False: list()}
+        groups = dict()
+        # Longest first, so nested roots win over their parents
+        items = [
+            (path, name, platform)
+            for name, paths in __roots.items() for platform, path in paths.items()
+        ]
+        for i, (path, name, platform) in enumerate(sorted(items, key=lambda each: -len(each[0]))):
+            group = "root{}".format(i)
+            alternatives[platform == WINDOWS].append("(?P<{}>{})".format(group, re.escape(path)))
+            groups[group] = name
+        __compiled["regex"] = [
+            re.compile("(?:{})(?=/|$)".format("|".join(expressions)), re.IGNORECASE if ignore_case else 0)
+            for ignore_case, expressions in alternatives.items() if expressions
+        ]
+        __compiled["groups"] = groups
+    return __compiled["regex"]
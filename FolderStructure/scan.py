@@ -0,0 +1,425 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from folderstructure import templates
+from folderstructure import roots
+from folderstructure.listing import get_listing_cache
+from folderstructure.error import ParsingError, TokenError, TemplateError
+from folderstructure.logger import logger
+
+ScanEntry = namedtuple("ScanEntry", ["path", "template", "values", "entry"])
+UsageTotal = namedtuple("UsageTotal", ["size", "files"])
+
+
+class TemplateMatcher(object):
+    """Matches paths against a set of templates. Paths must match a whole template pattern,
+    from start to end, no matter the anchor each template has.
+
+    It also knows if a directory could still lead to a match, so tree walks only go down
+    directories that match one of the templates directory levels.
+
+    Args:
+        ``template_names`` (list, optional): Names of the templates to match against.
+        Defaults to None, which uses all templates in current session.
+
+        ``fixed`` (dict, optional): {token_name: option_fullname_or_value} Values paths must
+        have for these tokens, see Template.regex(). Roots of values are remapped to the
+        current platform. Defaults to None.
+
+        ``single_level`` (bool, optional): Tokens that are not fixed must match a single
+        directory level, their values can't have slashes. Defaults to False.
+
+        ``root`` (str, optional): With single_level, tokens matching inside this directory
+        can still have slashes, e.g.: projects_root when scanning a project. Defaults to None.
+    """
+    def __init__(self, template_names=None, fixed=None, single_level=False, root=None):
+        if template_names is None:
+            template_names = list(templates.get_templates().keys())
+        self.__templates = list()
+        fixed = roots.map_values(fixed) if fixed else fixed
+        self.__fixed = fixed
+        self.__fixed_names = set(fixed.keys()) if fixed else set()
+        self.__single_level = single_level
+        self.__root_length = len(root.replace("\\", "/").rstrip("/")) if root else 0
+        prefixes = dict()
+        self.__starts = list()
+        for name in template_names:
+            template = templates.get_template(name)
+            if template is None:
+                raise TemplateError(
+                    "Template '{}' not found in current session.".format(name)
+                )
+            self.__templates.append(
+                (template, template.regex(templates.Template.ANCHOR_BOTH, fixed))
+            )
+            self.__starts.append(template.regex(templates.Template.ANCHOR_START, fixed))
+            for regex in template.prefix_regexes(fixed):
+                prefixes[regex.pattern] = regex
+        self.__prefixes = list(prefixes.values())
+
+    def match(self, path):
+        """Get all templates matching given path.
+
+        Args:
+            ``path`` (str): Path string with slashes. Its root is remapped to the current
+            platform one, see roots.add_root().
+
+        Returns:
+            [list]: (template_name, parsed_values) tuples. Empty if nothing matches.
+        """
+        path = roots.map_path(path)
+        result = list()
+        for template, regex in self.__templates:
+            if not self.__levels_match(regex.match(path)):
+                continue
+            try:
+                values = template.parse(
+                    path, anchor=templates.Template.ANCHOR_BOTH, fixed=self.__fixed
+                )
+            except (ParsingError, TokenError):
+                continue
+            result.append((template.name, values))
+        return result
+
+    def can_descend(self, path):
+        """Test if given directory matches one of the templates directory levels,
+        so going down into it could lead to a match.
+
+        Args:
+            ``path`` (str): Directory path string with slashes.
+
+        Returns:
+            [bool]: True if path matches a directory level of any template, False otherwise.
+        """
+        for regex in self.__prefixes:
+            if self.__levels_match(regex.match(path)):
+                return True
+        return False
+
+    def is_inside_match(self, path):
+        """Test if given path, or one of its parent directories, matches a template.
+
+        Args:
+            ``path`` (str): Path string with slashes.
+
+        Returns:
+            [bool]: True if path is under a directory matching a template, False otherwise.
+        """
+        for regex in self.__starts:
+            match = regex.match(path)
+            if match is not None and path[match.end():match.end() + 1] in ("", "/"):
+                return True
+        return False
+
+    def __levels_match(self, match):
+        if match is None:
+            return False
+        if not self.__single_level:
+            return True
+        for group, value in match.groupdict().items():
+            # Strip number that was added to make group name unique
+            if group[:-3] in self.__fixed_names or value is None or "/" not in value:
+                continue
+            if match.end(group) > self.__root_length:
+                return False
+        return True
+
+    @property
+    def template_names(self):
+        """
+        Returns:
+            [list]: Names of the templates this matcher works with.
+        """
+        return [template.name for template, regex in self.__templates]
+
+
+class Rollup(object):
+    """Disk usage aggregated by token values, at every level of a group by. e.g.: grouping
+    by ["project", "asset", "pipeline_step"] gives totals per project, per project and
+    asset, and per project, asset and pipeline step. Pass it to scan() to fill it.
+
+    Args:
+        ``group_by`` (list): Token names to group by, from the broadest to the narrowest.
+    """
+    def __init__(self, group_by):
+        self.group_by = tuple(group_by)
+        self.__totals = dict()
+        self.__unmatched = [0, 0]
+
+    def add(self, values, size, files=1):
+        """Add size and number of files to the totals of given token values.
+
+        Args:
+            ``values`` (dict): {token_name: value} Tokens missing in group_by count as None.
+
+            ``size`` (int): Size in bytes.
+
+            ``files`` (int, optional): Number of files. Defaults to 1.
+        """
+        key = tuple(values.get(name) for name in self.group_by)
+        for level in range(len(key) + 1):
+            total = self.__totals.get(key[:level])
+            if total is None:
+                total = self.__totals[key[:level]] = [0, 0]
+            total[0] += size
+            total[1] += files
+
+    def add_unmatched(self, size, files=1):
+        """Add size and number of files that are not under any template match.
+
+        Args:
+            ``size`` (int): Size in bytes.
+
+            ``files`` (int, optional): Number of files. Defaults to 1.
+        """
+        self.__unmatched[0] += size
+        self.__unmatched[1] += files
+
+    def get(self, *values):
+        """
+        Args:
+            values: Token values in group_by order, as many levels as needed. None for all.
+
+        Returns:
+            UsageTotal: Named tuple with size and files for given values.
+        """
+        return UsageTotal(*self.__totals.get(values, (0, 0)))
+
+    def children(self, *values):
+        """Get the totals one level below given values. e.g.: children("MyProject") gives
+        the total of each asset in MyProject when grouping by project and asset.
+
+        Args:
+            values: Token values in group_by order.
+
+        Returns:
+            [list]: (value, UsageTotal) sorted by size, biggest first.
+        """
+        level = len(values) + 1
+        result = [
+            (key[-1], UsageTotal(*total)) for key, total in self.__totals.items()
+            if len(key) == level and key[:-1] == values
+        ]
+        return sorted(result, key=lambda each: -each[1].size)
+
+    @property
+    def unmatched(self):
+        """
+        Returns:
+            UsageTotal: Size and files walked that are not under any template match.
+        """
+        return UsageTotal(*self.__unmatched)
+
+    def data(self):
+        """
+        Returns:
+            [dict]: Serializable data with group_by, unmatched [size, files] and totals as
+            [[values], size, files] for every level.
+        """
+        return {
+            "group_by": list(self.group_by),
+            "totals": [[list(key)] + total for key, total in sorted(
+                self.__totals.items(), key=lambda each: (len(each[0]), str(each[0]))
+            )],
+            "unmatched": list(self.__unmatched)
+        }
+
+
+def walk(root, descend=None, workers=8, window=None, stat=False):
+    """Walk a directory tree in depth first order, with the entries of each directory sorted
+    by name. This means paths come out sorted by their components, so walks can be merged
+    with other sorted streams of paths without keeping them in memory.
+
+    Directory listings go through the library's ListingCache without being stored, and are
+    fetched in advance by a pool of threads while previous ones are being consumed.
+
+    Args:
+        ``root`` (str): Directory to walk. It's not yielded itself.
+
+        ``descend`` (callable, optional): Called with each directory path, return False to
+        skip its contents. Defaults to None, which walks the whole tree.
+
+        ``workers`` (int, optional): Number of threads listing directories. Defaults to 8.
+
+        ``window`` (int, optional): Maximum directories listed in advance. Defaults to
+        four times the number of workers.
+
+        ``stat`` (bool, optional): Also stat files and directories in the listing threads,
+        so calling entry.stat(follow_symlinks=False) on them doesn't block, os.DirEntry
+        caches the result. Defaults to False.
+
+    Yields:
+        [tuple]: (path, os.DirEntry) for every file and directory found.
+    """
+    cache = get_listing_cache()
+    root = roots.map_path(root).replace("\\", "/").rstrip("/")
+    window = window or max(1, workers) * 4
+    pending = dict()
+
+    def list_children(path):
+        listing = cache.get_listing(path or "/", store=False)
+        if listing.error is not None:
+            logger.debug("Skipping directory that can't be listed: {}".format(path))
+            return list()
+        children = list()
+        for entry in sorted(listing.entries.values(), key=lambda each: each.name):
+            child = "{}/{}".format(path, entry.name)
+            directory = is_dir(entry)
+            go_down = directory and (descend is None or descend(child))
+            if stat:
+                file_size(entry)
+            children.append((child, entry, go_down))
+        return children
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        def get_children(path):
+            future = pending.pop(path, None)
+            children = future.result() if future is not None else list_children(path)
+            for child, entry, go_down in children:
+                if go_down and len(pending) < window:
+                    pending[child] = executor.submit(list_children, child)
+            return children
+
+        stack = [iter(get_children(root))]
+        while stack:
+            item = next(stack[-1], None)
+            if item is None:
+                stack.pop()
+                continue
+            path, entry, go_down = item
+            yield path, entry
+            if go_down:
+                stack.append(iter(get_children(path)))
+
+
+def scan(root, template_names=None, workers=8, fixed=None, rollup=None, stat=False):
+    """Walk a directory tree yielding every path that matches one of given templates,
+    along with its parsed token values. Only directories that match the templates
+    directory levels are walked.
+
+    Tokens matching below root must match a single directory level, so contents of a
+    matching directory are not matches themselves. Tokens matching root, or above it,
+    can have slashes, e.g.: projects_root.
+
+    Args:
+        ``root`` (str): Directory to scan.
+
+        ``template_names`` (list, optional): Names of the templates to match against.
+        Defaults to None, which uses all templates in current session.
+
+        ``workers`` (int, optional): Number of threads listing directories. Defaults to 8.
+
+        ``fixed`` (dict, optional): {token_name: option_fullname_or_value} Only paths with
+        these token values are matched, and directories that can't lead to them are not
+        walked. Defaults to None.
+
+        ``rollup`` (Rollup, optional): Also walk the contents of matching directories and
+        add the size of every file to the values of the closest matching directory above it.
+        Files only count as their own match if no directory above them matches. Memory used
+        only depends on the tree depth and the number of groups. Defaults to None.
+
+        ``stat`` (bool, optional): Stat entries in the listing threads, see walk().
+        Always done with a rollup. Defaults to False.
+
+    Yields:
+        ScanEntry: Named tuple with path, template name, parsed values and os.DirEntry.
+        A path matching more than one template is yielded once for each of them.
+    """
+    root = roots.map_path(root)
+    matcher = TemplateMatcher(template_names, fixed, single_level=True, root=root)
+    if rollup is None:
+        for path, entry in walk(root, descend=matcher.can_descend, workers=workers, stat=stat):
+            for name, values in matcher.match(path):
+                yield ScanEntry(path, name, values, entry)
+        return
+
+    def descend(path):
+        return matcher.can_descend(path) or matcher.is_inside_match(path)
+
+    # [path, values, size, files] for matching directories above current path
+    stack = list()
+    for path, entry in walk(root, descend=descend, workers=workers, stat=True):
+        while stack and not path.startswith(stack[-1][0] + "/"):
+            __flush_usage(rollup, stack.pop())
+        matches = matcher.match(path)
+        for name, values in matches:
+            yield ScanEntry(path, name, values, entry)
+        if is_dir(entry):
+            if matches:
+                stack.append([path, matches[0][1], 0, 0])
+            continue
+        size = file_size(entry)
+        if stack:
+            stack[-1][2] += size
+            stack[-1][3] += 1
+        elif matches:
+            rollup.add(matches[0][1], size)
+        else:
+            rollup.add_unmatched(size)
+    while stack:
+        __flush_usage(rollup, stack.pop())
+
+
+def usage(root, group_by, template_names=None, workers=8, fixed=None):
+    """Scan a directory tree and get its disk usage aggregated by token values.
+
+    Args:
+        ``root`` (str): Directory to scan.
+
+        ``group_by`` (list): Token names to group by, see Rollup.
+
+        ``template_names`` (list, optional): Names of the templates to match against.
+        Defaults to None, which uses all templates in current session.
+
+        ``workers`` (int, optional): Number of threads listing directories. Defaults to 8.
+
+        ``fixed`` (dict, optional): {token_name: option_fullname_or_value} As in scan().
+        Defaults to None.
+
+    Returns:
+        Rollup: Sizes and number of files by token values.
+    """
+    rollup = Rollup(group_by)
+    for each in scan(root, template_names, workers, fixed, rollup):
+        pass
+    return rollup
+
+
+def __flush_usage(rollup, item):
+    path, values, size, files = item
+    if files:
+        rollup.add(values, size, files)
+
+
+def is_dir(entry):
+    """Test if given os.DirEntry is a directory without following symlinks.
+
+    Args:
+        ``entry`` (os.DirEntry): Entry to test.
+
+    Returns:
+        [bool]: True if it's a directory, False otherwise or if it can't be accessed.
+    """
+    try:
+        return entry.is_dir(follow_symlinks=False)
+    except (IOError, OSError):
+        return False
+
+
+def file_size(entry):
+    """Get the size of given os.DirEntry without following symlinks. The result is cached
+    by the entry itself.
+
+    Args:
+        ``entry`` (os.DirEntry): Entry to get the size of.
+
+    Returns:
+        [int]: Size in bytes, 0 if it can't be accessed.
+    """
+    try:
+        return entry.stat(follow_symlinks=False).st_size
+    except (IOError, OSError):
+        return 0
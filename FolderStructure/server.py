@@ -0,0 +1,393 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import sys
+import json
+import socket
+import struct
+import getpass
+import argparse
+import contextlib
+import tempfile
+import threading
+import traceback
+import socketserver
+
+from folderstructure import templates
+from folderstructure import tokens
+from folderstructure import folderstructure
+from folderstructure import roots
+from folderstructure.logger import logger
+
+FOLDERSTRUCTURE_SOCKET_ENV = "FOLDERSTRUCTURE_SOCKET"
+RELOAD_INTERVAL = 2.0
+
+HEADER = struct.Struct("!I")
+
+
+def get_socket_path(force_path=None):
+    """Get the path to the Unix socket the resolver server listens on.
+
+    Path is looked for in these places and with the given priority:
+
+        1- ``force_path`` parameter
+
+        2- Environment variable: FOLDERSTRUCTURE_SOCKET
+
+        3- Temp directory: folderstructure-<user>.sock
+
+    Args:
+        ``force_path`` (str, optional): Use this path instead. Defaults to None.
+
+    Returns:
+        [str]: Socket path.
+    """
+    if force_path:
+        return force_path
+    env_path = os.environ.get(FOLDERSTRUCTURE_SOCKET_ENV)
+    if env_path:
+        return env_path
+    return os.path.join(
+        tempfile.gettempdir(), "folderstructure-{}.sock".format(getpass.getuser())
+    )
+
+
+def send_message(sock, data):
+    """Send a length prefixed JSON message through given socket.
+
+    Args:
+        ``sock`` (socket.socket): Connected socket.
+
+        ``data`` (object): JSON serializable data.
+    """
+    payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def receive_message(sock):
+    """Receive a length prefixed JSON message from given socket.
+
+    Args:
+        ``sock`` (socket.socket): Connected socket.
+
+    Returns:
+        [object]: Decoded data. None if the connection was closed.
+    """
+    header = __receive_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    payload = __receive_exactly(sock, HEADER.unpack(header)[0])
+    if payload is None:
+        return None
+    return json.loads(payload.decode("utf-8"))
+
+
+def __receive_exactly(sock, size):
+    chunks = list()
+    remaining = size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+class ReadWriteLock(object):
+    """Lock that lets many readers in at the same time, or a single writer. Writers
+    waiting block new readers, so reloads are not starved by a stream of requests.
+    """
+    def __init__(self):
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writing = False
+        self.__writers_waiting = 0
+
+    @contextlib.contextmanager
+    def reading(self):
+        with self.__condition:
+            while self.__writing or self.__writers_waiting:
+                self.__condition.wait()
+            self.__readers += 1
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__readers -= 1
+                if not self.__readers:
+                    self.__condition.notify_all()
+
+    @contextlib.contextmanager
+    def writing(self):
+        with self.__condition:
+            self.__writers_waiting += 1
+            try:
+                while self.__writing or self.__readers:
+                    self.__condition.wait()
+            finally:
+                self.__writers_waiting -= 1
+            self.__writing = True
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__writing = False
+                self.__condition.notify_all()
+
+
+class ResolverSession(object):
+    """Keeps a warm folderstructure session loaded from a repo, and reloads it when any
+    file in the repo changes. Requests reading the session hold lock.reading(), loading
+    it holds lock.writing().
+
+    Args:
+        ``repo`` (str, optional): Absolute path to a repository. Defaults to None, which
+        uses get_repo().
+    """
+    def __init__(self, repo=None):
+        self.repo = repo or folderstructure.get_repo()
+        self.lock = ReadWriteLock()
+        self.__signature = None
+        self.load()
+
+    def load(self):
+        """Load, or reload, tokens and templates from the repo.
+
+        Returns:
+            [bool]: True if loading session operation was successful.
+        """
+        with self.lock.writing():
+            signature = self.__repo_signature()
+            tokens.reset_tokens()
+            templates.reset_templates()
+            loaded = folderstructure.load_session(self.repo)
+            self.__signature = signature
+            logger.debug("Resolver session loaded from repo: {}".format(self.repo))
+            return loaded
+
+    def reload_if_changed(self):
+        """Reload the session if files in the repo changed since last load.
+
+        Returns:
+            [bool]: True if session was reloaded, False otherwise.
+        """
+        if self.__repo_signature() == self.__signature:
+            return False
+        logger.info("Folder Structure repo changed, reloading: {}".format(self.repo))
+        self.load()
+        return True
+
+    def __repo_signature(self):
+        signature = list()
+        for dirpath, dirnames, filenames in os.walk(self.repo):
+            for filename in filenames:
+                try:
+                    stat = os.stat(os.path.join(dirpath, filename))
+                except (IOError, OSError):
+                    continue
+                signature.append((dirpath, filename, stat.st_mtime, stat.st_size))
+        return sorted(signature)
+
+
+class ResolverRequestHandler(socketserver.BaseRequestHandler):
+    """Serves requests from one client connection until it's closed. Each request is a
+    message like {"op": "solve", "template": "name", "args": [], "kwargs": {}} and each
+    response {"ok": true, "result": ...} or {"ok": false, "error": "SolvingError", "message": "..."}
+    """
+    def handle(self):
+        while True:
+            try:
+                request = receive_message(self.request)
+            except (IOError, OSError, ValueError):
+                return
+            if request is None:
+                return
+            try:
+                send_message(self.request, self.server.dispatch(request))
+            except (IOError, OSError):
+                # Client gave up waiting and closed the connection
+                return
+
+
+class ResolverServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Long running server that keeps one warm folderstructure session and serves parse
+    and solve requests through a Unix domain socket. Use client.Client to talk to it.
+    Each connection is served by its own thread, parse and solve requests run concurrently
+    and reloads wait for them to finish.
+
+    Args:
+        ``session`` (ResolverSession): Session to serve.
+
+        ``socket_path`` (str, optional): Path of the Unix socket. Defaults to None,
+        which uses get_socket_path().
+
+        ``reload_interval`` (float, optional): Seconds between repo change checks. Pass 0
+        to disable automatic reloading. Defaults to RELOAD_INTERVAL.
+    """
+    daemon_threads = True
+    # Operations changing the session, they don't run along with any other
+    WRITE_OPERATIONS = ("reload",)
+
+    def __init__(self, session, socket_path=None, reload_interval=RELOAD_INTERVAL):
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix domain sockets are not supported in this platform.")
+        self.session = session
+        self.socket_path = get_socket_path(socket_path)
+        self.reload_interval = reload_interval
+        self.operations = {
+            "ping": self.__ping,
+            "reload": self.__reload,
+            "parse": self.__parse,
+            "solve": self.__solve,
+            "parse_batch": self.__parse_batch,
+            "solve_batch": self.__solve_batch,
+        }
+        self.__remove_stale_socket()
+        socketserver.UnixStreamServer.__init__(self, self.socket_path, ResolverRequestHandler)
+        self.__stop_watching = threading.Event()
+        if reload_interval:
+            watcher = threading.Thread(target=self.__watch_repo, name="folderstructure-watcher")
+            watcher.daemon = True
+            watcher.start()
+
+    def dispatch(self, request):
+        """Run the operation a request asks for.
+
+        Args:
+            ``request`` (dict): Decoded request message.
+
+        Returns:
+            [dict]: Response message.
+        """
+        operation = self.operations.get(request.get("op"))
+        if operation is None:
+            return {
+                "ok": False, "error": "ValueError",
+                "message": "Unknown operation '{}'.".format(request.get("op"))
+            }
+        try:
+            if request.get("op") in self.WRITE_OPERATIONS:
+                # They take the write lock themselves
+                return {"ok": True, "result": operation(request)}
+            with self.session.lock.reading():
+                return {"ok": True, "result": operation(request)}
+        except Exception as why:
+            logger.debug(traceback.format_exc())
+            return {"ok": False, "error": type(why).__name__, "message": str(why)}
+
+    def server_close(self):
+        self.__stop_watching.set()
+        socketserver.UnixStreamServer.server_close(self)
+        try:
+            os.remove(self.socket_path)
+        except (IOError, OSError):
+            pass
+
+    def __ping(self, request):
+        return {"repo": self.session.repo, "pid": os.getpid()}
+
+    def __reload(self, request):
+        return self.session.load()
+
+    def __parse(self, request):
+        return self.__parse_one(request.get("template"), request["path"])
+
+    def __solve(self, request):
+        return self.__solve_one(
+            request.get("template"), request.get("args", []), request.get("kwargs", {})
+        )
+
+    def __parse_batch(self, request):
+        template = request.get("template")
+        return [
+            self.__batch_item(self.__parse_one, template, path)
+            for path in request["paths"]
+        ]
+
+    def __solve_batch(self, request):
+        template = request.get("template")
+        return [
+            self.__batch_item(self.__solve_one, template, [], kwargs)
+            for kwargs in request["records"]
+        ]
+
+    def __batch_item(self, function, *args):
+        try:
+            return [True, function(*args)]
+        except Exception as why:
+            return [False, "{}: {}".format(type(why).__name__, why)]
+
+    def __parse_one(self, template, path):
+        if template is None:
+            return folderstructure.parse(path)
+        return folderstructure._get_template_object(template).parse(roots.map_path(path))
+
+    def __solve_one(self, template, args, kwargs):
+        if template is None:
+            return folderstructure.solve(*args, **kwargs)
+        return folderstructure.solve_template(template, *args, **kwargs)
+
+    def __watch_repo(self):
+        while not self.__stop_watching.wait(self.reload_interval):
+            try:
+                self.session.reload_if_changed()
+            except Exception:
+                logger.error(
+                    "Failed to reload Folder Structure repo.\n{}".format(traceback.format_exc())
+                )
+
+    def __remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except (IOError, OSError):
+            os.remove(self.socket_path)
+        else:
+            raise OSError(
+                "A resolver server is already listening on {}".format(self.socket_path)
+            )
+        finally:
+            probe.close()
+
+
+def serve(repo=None, socket_path=None, reload_interval=RELOAD_INTERVAL):
+    """Load a session from repo and serve it until interrupted.
+
+    Args:
+        ``repo`` (str, optional): Absolute path to a repository. Defaults to None.
+
+        ``socket_path`` (str, optional): Path of the Unix socket. Defaults to None.
+
+        ``reload_interval`` (float, optional): Seconds between repo change checks.
+        Defaults to RELOAD_INTERVAL.
+    """
+    session = ResolverSession(repo)
+    server = ResolverServer(session, socket_path, reload_interval)
+    logger.info(
+        "Folder Structure resolver serving {} on {}".format(session.repo, server.socket_path)
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve folderstructure parse and solve through a Unix domain socket."
+    )
+    parser.add_argument("--repo", default=None, help="Folder Structure repo path.")
+    parser.add_argument("--socket", default=None, help="Unix socket path.")
+    parser.add_argument(
+        "--reload-interval", type=float, default=RELOAD_INTERVAL,
+        help="Seconds between repo change checks, 0 disables reloading."
+    )
+    arguments = parser.parse_args()
+    serve(arguments.repo, arguments.socket, arguments.reload_interval)
+    sys.exit(0)
@@ -0,0 +1,207 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import json
+import gzip
+import time
+from collections import namedtuple
+
+from folderstructure import templates
+from folderstructure import scan
+from folderstructure import roots
+from folderstructure.error import ParsingError, TokenError
+from folderstructure.logger import logger
+
+SNAPSHOT_VERSION = 1
+
+SnapshotEntry = namedtuple("SnapshotEntry", ["path", "template", "mtime", "size"])
+DiffEntry = namedtuple("DiffEntry", ["status", "path", "template", "old", "new"])
+
+ADDED, REMOVED, MODIFIED = ("added", "removed", "modified")
+
+
+def write_snapshot(filepath, root, template_names=None, workers=8, fixed=None):
+    """Scan a directory tree and write every matching path to a snapshot file, along with
+    its template name, modification time and size. Paths are written sorted and each one
+    only stores what's different from the previous one, and the file is gzip compressed.
+
+    Args:
+        ``filepath`` (str): Snapshot file to write.
+
+        ``root`` (str): Directory to scan.
+
+        ``template_names`` (list, optional): Names of the templates to match against.
+        Defaults to None, which uses all templates in current session.
+
+        ``workers`` (int, optional): Number of threads listing directories. Defaults to 8.
+
+        ``fixed`` (dict, optional): {token_name: option_fullname_or_value} As in scan.scan().
+        Defaults to None.
+
+    Returns:
+        [int]: Number of entries written.
+    """
+    matcher_names = template_names or sorted(templates.get_templates().keys())
+    template_index = dict((name, i) for i, name in enumerate(matcher_names))
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "root": root,
+        "templates": matcher_names,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    count = 0
+    previous = ""
+    with gzip.open(filepath, "wt", encoding="utf-8") as fp:
+        fp.write("#{}\n".format(json.dumps(header)))
+        for item in __sorted_scan(root, matcher_names, workers, fixed):
+            if "\n" in item.path:
+                logger.warning("Skipping path with a line break: {!r}".format(item.path))
+                continue
+            shared = __shared_prefix(previous, item.path)
+            fp.write("{}\t{}\t{}\t{}\t{}\n".format(
+                shared, template_index[item.template], item.mtime, item.size, item.path[shared:]
+            ))
+            previous = item.path
+            count += 1
+    logger.debug("Snapshot written: {} ({} entries)".format(filepath, count))
+    return count
+
+
+def read_snapshot(filepath):
+    """Lazily read the entries of a snapshot file, in the order they were written.
+
+    Args:
+        ``filepath`` (str): Snapshot file written by write_snapshot().
+
+    Yields:
+        SnapshotEntry: Named tuple with path, template name, mtime in nanoseconds and size.
+    """
+    with gzip.open(filepath, "rt", encoding="utf-8") as fp:
+        header = read_header(fp)
+        template_names = header["templates"]
+        previous = ""
+        for line in fp:
+            shared, index, mtime, size, suffix = line.rstrip("\n").split("\t", 4)
+            path = previous[:int(shared)] + suffix
+            previous = path
+            yield SnapshotEntry(path, template_names[int(index)], int(mtime), int(size))
+
+
+def read_header(fp):
+    """
+    Args:
+        ``fp`` (file): Snapshot file opened in text mode, at its start.
+
+    Raises:
+        ValueError: File is not a snapshot or its version is not supported.
+
+    Returns:
+        [dict]: {"version", "root", "templates", "created"}
+    """
+    line = fp.readline()
+    if not line.startswith("#"):
+        raise ValueError("Not a Folder Structure snapshot file.")
+    header = json.loads(line[1:])
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise ValueError("Snapshot version not supported: {}".format(header.get("version")))
+    return header
+
+
+def diff(old_filepath, new_filepath):
+    """Compare two snapshots with a streaming merge, without loading them in memory.
+
+    Args:
+        ``old_filepath`` (str): Older snapshot file.
+
+        ``new_filepath`` (str): Newer snapshot file.
+
+    Yields:
+        DiffEntry: Named tuple with status (ADDED, REMOVED or MODIFIED), path, template
+        name and old and new SnapshotEntry, None when it doesn't exist on that side.
+    """
+    old_entries = read_snapshot(old_filepath)
+    new_entries = read_snapshot(new_filepath)
+    old = next(old_entries, None)
+    new = next(new_entries, None)
+    while old is not None or new is not None:
+        old_key = __sort_key(old) if old is not None else None
+        new_key = __sort_key(new) if new is not None else None
+        if new is None or (old is not None and old_key < new_key):
+            yield DiffEntry(REMOVED, old.path, old.template, old, None)
+            old = next(old_entries, None)
+        elif old is None or new_key < old_key:
+            yield DiffEntry(ADDED, new.path, new.template, None, new)
+            new = next(new_entries, None)
+        else:
+            if old.mtime != new.mtime or old.size != new.size:
+                yield DiffEntry(MODIFIED, new.path, new.template, old, new)
+            old = next(old_entries, None)
+            new = next(new_entries, None)
+
+
+def diff_report(old_filepath, new_filepath, group_by):
+    """Compare two snapshots and group the changes by token values. e.g.: what changed
+    on disk since yesterday for each asset. Only changed paths are parsed, with the
+    templates in current session.
+
+    Args:
+        ``old_filepath`` (str): Older snapshot file.
+
+        ``new_filepath`` (str): Newer snapshot file.
+
+        ``group_by`` (list): Token names to group by. Tokens a path doesn't have are None.
+
+    Returns:
+        [dict]: {(token values in group_by order): {ADDED: [DiffEntry], REMOVED: [DiffEntry],
+        MODIFIED: [DiffEntry]}}
+    """
+    report = dict()
+    for entry in diff(old_filepath, new_filepath):
+        values = __parse(entry.path, entry.template)
+        key = tuple(values.get(name) for name in group_by)
+        group = report.get(key)
+        if group is None:
+            group = report[key] = {ADDED: list(), REMOVED: list(), MODIFIED: list()}
+        group[entry.status].append(entry)
+    return report
+
+
+def __sorted_scan(root, template_names, workers, fixed):
+    # Scan yields paths sorted by components, sort templates of the same path too.
+    # Entries are stat'ed by the listing threads, stat() here returns the cached result
+    same_path = list()
+    for item in scan.scan(root, template_names, workers, fixed, stat=True):
+        if same_path and same_path[0].path != item.path:
+            for each in sorted(same_path, key=lambda each: each.template):
+                yield each
+            same_path = list()
+        try:
+            stat = item.entry.stat(follow_symlinks=False)
+            mtime, size = stat.st_mtime_ns, stat.st_size
+        except (IOError, OSError):
+            mtime, size = 0, 0
+        same_path.append(SnapshotEntry(item.path, item.template, mtime, size))
+    for each in sorted(same_path, key=lambda each: each.template):
+        yield each
+
+
+def __sort_key(entry):
+    return entry.path.split("/"), entry.template
+
+
+def __shared_prefix(previous, path):
+    limit = min(len(previous), len(path))
+    i = 0
+    while i < limit and previous[i] == path[i]:
+        i += 1
+    return i
+
+
+def __parse(path, template_name):
+    template = templates.get_template(template_name)
+    if template is None:
+        return dict()
+    try:
+        return template.parse(roots.map_path(path), anchor=templates.Template.ANCHOR_BOTH)
+    except (ParsingError, TokenError):
+        return dict()
@@ -7,15 +7,53 @@ import os
 import sys
 import functools
 from copy import deepcopy
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 
+from folderstructure import instrumentation
+from folderstructure import roots
 from folderstructure.serialize import Serializable
 from folderstructure.tokens import get_token
 from folderstructure.logger import logger
 from folderstructure.error import SolvingError, ParsingError, TemplateError
 
 __templates = {'_active': None}
+__revision = {"value": 0}
+__changed_names = dict()
+
+
+def _changed(*names):
+    """Count a change to templates of current session, see get_revision().
+
+    Args:
+        ``names`` (str): Names of the changed templates, see get_changes().
+    """
+    __revision["value"] += 1
+    for name in names:
+        __changed_names[name] = __revision["value"]
+
+
+def get_revision():
+    """Number of changes made to templates and their patterns in current session. Caches of
+    solved paths compare it to know when they are stale.
+
+    Returns:
+        [int]: Revision of current session templates.
+    """
+    return __revision["value"]
+
+
+def get_changes(revision):
+    """Names of templates added, changed, renamed or removed after given revision, so
+    indexes of templates like validator.Validator only update those.
+
+    Args:
+        ``revision`` (int): A previous get_revision() value.
+
+    Returns:
+        [set]: Template names, removed ones and previous names of renamed ones included.
+    """
+    return set(name for name, changed in __changed_names.items() if changed > revision)
 
 
 class Template(Serializable):
@@ -43,6 +81,9 @@ class Template(Serializable):
     __STRIP_EXPRESSION_REGEX = re.compile(r'{(.+?)(:(\\}|.)+?)}')
 
     ANCHOR_START, ANCHOR_END, ANCHOR_BOTH = (1, 2, 3)
+    # Compiled expressions kept per template, e.g.: one per set of fixed values of
+    # compile_filter(). Least recently used ones are dropped first
+    REGEX_CACHE_SIZE = 256
 
     def __init__(self, name, pattern, anchor=ANCHOR_START):
         super(Serializable, self).__init__()
@@ -50,6 +91,8 @@ class Template(Serializable):
         self.__anchor = anchor
         self.__at_code = '_WXV_'
         self.__pattern = self.__init_pattern(pattern)
+        self.__regex_cache = OrderedDict()
+        self.__digits_cache = dict()
 
     def data(self):
         """Collect all data for this object instance.
@@ -89,6 +132,7 @@ class Template(Serializable):
 
         return this
 
+    @instrumentation.timed("Template.solve", lambda self, *args, **kwargs: self.name)
     def solve(self, **values):
         """Given arguments are used to build a path. If no value is specified,
         the field name itself is used as value.
@@ -117,7 +161,8 @@ class Template(Serializable):
 
         return result
 
-    def parse(self, path):
+    @instrumentation.timed("Template.parse", lambda self, *args, **kwargs: self.name)
+    def parse(self, path, anchor=None, fixed=None):
         """Build and return dictionary with keys as tokens and values as given names.
 
         If your path uses the same token more than once, the returned dictionary keys
@@ -128,6 +173,12 @@ class Template(Serializable):
             ``path`` (str): Path string.
             e.g.: "Y:/Projects/KillM/ART/VAULT/AVATARS/Male/Boots/Published/Rigging"
 
+            ``anchor`` ([ANCHOR_START, ANCHOR_END, ANCHOR_BOTH], optional): Use this anchor
+            instead of the template one for this call only. Defaults to None.
+
+            ``fixed`` (dict, optional): {token_name: option_fullname_or_value} Values the
+            path must have for these tokens, see regex(). Defaults to None.
+
         Returns:
             dict: A dictionary with keys as tokens and values as given name parts.
             e.g.:
@@ -144,7 +195,7 @@ class Template(Serializable):
             path = path.replace("\\", "/")
 
         # Build regular expresion for expanded pattern (including references)
-        regex = self.__build_regex()
+        regex = self.regex(anchor, fixed)
         parsed = dict()
         match = regex.search(path)
         if match:
@@ -184,28 +235,118 @@ class Template(Serializable):
                 )
             )
 
-    def __build_regex(self):
+    def regex(self, anchor=None, fixed=None):
+        """Compiled regular expression used to parse paths with this template. Expressions
+        are compiled once and reused while the expanded pattern doesn't change.
+
+        Args:
+            ``anchor`` ([ANCHOR_START, ANCHOR_END, ANCHOR_BOTH], optional): Anchor to use
+            instead of the template one. Defaults to None.
+
+            ``fixed`` (dict, optional): {token_name: option_fullname_or_value} Values are
+            solved and placed in the expression as literals, so paths with other values
+            for these tokens don't match. Defaults to None.
+
+        Raises:
+            TokenError: A fixed value is not an option of its Token.
+
+        Returns:
+            [re.Pattern]: Compiled regular expression for the expanded pattern.
+        """
+        return self.__cached_regex(
+            self.expanded_pattern(), anchor or self.__anchor, self.__fixed_literals(fixed)
+        )
+
+    def compile_filter(self, **constraints):
+        """Get a filter for paths that match this template with given token values. Values
+        are placed in the regular expression as literals, so paths with other values are
+        rejected by the regular expression engine, without parsing them.
+
+        e.g.: template.compile_filter(project="MyProject", pipeline_step="Rigging")
+
+        Args:
+            constraints: {token_name: option_fullname_or_value} Values paths must have.
+
+        Raises:
+            TokenError: A value is not an option of its Token.
+
+        Returns:
+            PathFilter: Filter for single paths or streams of them.
+        """
+        return PathFilter(self, constraints)
+
+    def prefix_regexes(self, fixed=None):
+        """Compiled regular expressions for every directory level of this template. The
+        expanded pattern is cut at each slash outside token placeholders, e.g.:
+        '{projects_root}/{project}/VAULT' gives '{projects_root}' and '{projects_root}/{project}'.
+        All of them are anchored to both start and end.
+
+        Args:
+            ``fixed`` (dict, optional): {token_name: option_fullname_or_value} As in regex().
+            Defaults to None.
+
+        Returns:
+            [list]: Compiled regular expressions, from the shortest to the longest prefix.
+        """
+        expanded = self.expanded_pattern()
+        literals = self.__fixed_literals(fixed)
+        result = list()
+        for match in re.finditer(r'{(.+?)(:(\\}|.)+?)?}|(?P<slash>/)', expanded):
+            if match.group('slash') is not None and match.start() > 0:
+                result.append(
+                    self.__cached_regex(expanded[:match.start()], self.ANCHOR_BOTH, literals)
+                )
+        return result
+
+    def __fixed_literals(self, fixed):
+        if not fixed:
+            return tuple()
+        literals = list()
+        for name, value in fixed.items():
+            token = get_token(name)
+            if token is not None:
+                value = token.solve(value)
+            literals.append((name, value.replace("\\", "/")))
+        return tuple(sorted(literals))
+
+    def __cached_regex(self, pattern, anchor, literals=tuple()):
+        key = (pattern, anchor, literals)
+        compiled = self.__regex_cache.pop(key, None)
+        if instrumentation._switch["enabled"]:
+            instrumentation.record_cache("Template.regex", compiled is not None)
+        if compiled is None:
+            compiled = self.__build_regex(pattern, anchor, dict(literals))
+        self.__regex_cache[key] = compiled
+        while len(self.__regex_cache) > self.REGEX_CACHE_SIZE:
+            try:
+                self.__regex_cache.popitem(last=False)
+            except KeyError:
+                # Emptied by another thread
+                break
+        return compiled
+
+    def __build_regex(self, pattern, anchor, literals):
         # ? Taken from Lucidity by Martin Pengelly-Phillips
         # Escape non-placeholder components
         expression = re.sub(
             r'(?P<placeholder>{(.+?)(:(\\}|.)+?)?})|(?P<other>.+?)',
             self.__escape,
-            self.expanded_pattern()
+            pattern
         )
         # Replace placeholders with regex pattern
         expression = re.sub(
             r'{(?P<placeholder>.+?)(:(?P<expression>(\\}|.)+?))?}',
             functools.partial(
-                self.__convert, placeholder_count=defaultdict(int)
+                self.__convert, placeholder_count=defaultdict(int), literals=literals
             ),
             expression
         )
 
-        if self.__anchor is not None:
-            if bool(self.__anchor & self.ANCHOR_START):
+        if anchor is not None:
+            if bool(anchor & self.ANCHOR_START):
                 expression = '^{0}'.format(expression)
 
-            if bool(self.__anchor & self.ANCHOR_END):
+            if bool(anchor & self.ANCHOR_END):
                 expression = '{0}$'.format(expression)
         # Compile expression
         try:
@@ -226,15 +367,19 @@ class Template(Serializable):
 
         return compiled
 
-    def __convert(self, match, placeholder_count):
+    def __convert(self, match, placeholder_count, literals):
         """Return a regular expression to represent *match*.
 
         ``placeholder_count`` should be a ``defaultdict(int)`` that will be used to
         store counts of unique placeholder names.
 
+        ``literals`` is a dict of {placeholder_name: value} whose groups match
+        that exact value only.
+
         """
         # ? Taken from Lucidity by Martin Pengelly-Phillips
         placeholder_name = match.group('placeholder')
+        literal = literals.get(placeholder_name)
 
         # Support at symbol (@) as referenced template indicator. Currently,
         # this symbol not a valid character for a group name in the standard
@@ -251,7 +396,9 @@ class Template(Serializable):
         )
 
         expression = match.group('expression')
-        if expression is None:
+        if literal is not None:
+            expression = re.escape(literal)
+        elif expression is None:
             expression = r'[\w_.\-/:]+'
 
         # Un-escape potentially escaped characters in expression.
@@ -319,8 +466,18 @@ class Template(Serializable):
         return groups['placeholder']
 
     def __digits_pattern(self):
+        expanded_pattern = self.expanded_pattern()
+        digits_pattern = self.__digits_cache.get(expanded_pattern)
+        if instrumentation._switch["enabled"]:
+            instrumentation.record_cache("Template.digits_pattern", digits_pattern is not None)
+        if digits_pattern is None:
+            digits_pattern = self.__build_digits_pattern(expanded_pattern)
+            self.__digits_cache = {expanded_pattern: digits_pattern}
+        return digits_pattern
+
+    def __build_digits_pattern(self, expanded_pattern):
         # * This accounts for those cases where a token is used more than once in a rule
-        digits_pattern = deepcopy(self.expanded_pattern())
+        digits_pattern = deepcopy(expanded_pattern)
         for each in list(set(self.fields)):
             # ? This is going to be a bit more difficult to handle when nesting templates
             # ? due to the . character not being contemplated by the pattern
@@ -366,6 +523,7 @@ class Template(Serializable):
         Some times we need to change the pattern dinamically, at runtime.
         """
         self.__pattern = self.__init_pattern(pattern)
+        _changed(self.__name)
 
     @property
     def fields(self):
@@ -405,7 +563,99 @@ class Template(Serializable):
         Args:
             [str]: Set name of this Template
         """
+        old_name = self.__name
         self.__name = n
+        _changed(old_name, n)
+
+
+class PathFilter(object):
+    """Filter paths that match a template with some fixed token values. Get it from
+    Template.compile_filter(). It counts how many paths were accepted and rejected.
+    Roots of paths are remapped to the current platform first, see roots.add_root().
+
+    ``template`` (Template): Template paths must match.
+
+    ``constraints`` (dict): {token_name: option_fullname_or_value} Values paths must have.
+    """
+    def __init__(self, template, constraints):
+        self.__template = template
+        self.__constraints = dict(constraints)
+        self.__search = template.regex(fixed=self.__constraints).search
+        self.__accepted = 0
+        self.__rejected = 0
+
+    def match(self, path):
+        """Test a single path.
+
+        Args:
+            ``path`` (str): Path string.
+
+        Returns:
+            [bool]: True if path matches the template and constraints, False otherwise.
+        """
+        path = roots.map_path(path)
+        if "\\" in path:
+            path = path.replace("\\", "/")
+        if self.__search(path) is None:
+            self.__rejected += 1
+            return False
+        self.__accepted += 1
+        return True
+
+    def filter(self, paths):
+        """Lazily filter an iterable of paths, e.g.: lines of a manifest file.
+
+        Args:
+            ``paths`` (iterable): Path strings.
+
+        Yields:
+            [str]: Paths that match, as they were given.
+        """
+        search = self.__search
+        for path in paths:
+            mapped = roots.map_path(path)
+            if search(mapped.replace("\\", "/") if "\\" in mapped else mapped) is None:
+                self.__rejected += 1
+                continue
+            self.__accepted += 1
+            yield path
+
+    def parse(self, paths):
+        """Lazily filter an iterable of paths and parse the ones that match. Only accepted
+        paths are parsed.
+
+        Args:
+            ``paths`` (iterable): Path strings.
+
+        Yields:
+            [tuple]: (path, parsed_values) for paths that match.
+        """
+        for path in self.filter(paths):
+            yield path, self.__template.parse(roots.map_path(path), fixed=self.__constraints)
+
+    def reset(self):
+        """Reset accepted and rejected counters."""
+        self.__accepted = 0
+        self.__rejected = 0
+
+    @property
+    def accepted(self):
+        """
+        Returns:
+            [int]: Number of paths that matched so far.
+        """
+        return self.__accepted
+
+    @property
+    def rejected(self):
+        """
+        Returns:
+            [int]: Number of paths that didn't match so far.
+        """
+        return self.__rejected
+
+    def __call__(self, path):
+        return self.match(path)
 
 
 def add_template(name, pattern, anchor=Template.ANCHOR_START):
@@ -429,6 +679,7 @@ def add_template(name, pattern, anchor=Template.ANCHOR_START):
     """
     template = Template(name, pattern, anchor)
     __templates[name] = template
+    _changed(name)
     if get_active_template() is None:
         set_active_template(name)
         logger.debug("No active template found, setting this one as active: {}".format(name))
@@ -446,6 +697,7 @@ def remove_template(name):
     """
     if has_template(name):
         del __templates[name]
+        _changed(name)
         return True
     return False
 
@@ -490,6 +742,7 @@ def reset_templates():
     Returns:
         bool: True if clearing was successful.
     """
+    _changed(*[name for name in __templates.keys() if name != "_active"])
     __templates.clear()
     __templates['_active'] = None
     return True
@@ -612,5 +865,6 @@ def load_template(filepath):
     new_template = Template.from_data(data)
     if new_template:
         __templates[new_template.name] = new_template
+        _changed(new_template.name)
         return True
     return False
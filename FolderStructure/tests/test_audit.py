@@ -0,0 +1,55 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import audit
+
+
+class TestAudit(unittest.TestCase):
+    """{root}/KillM/ART/Male, Female and Typo, and {root}/KillM/Extra"""
+    def setUp(self):
+        self.root = tempfile.mkdtemp().replace("\\", "/")
+        for directory in ("ART/Male/Rig", "ART/Female", "ART/Typo", "Extra/sub"):
+            os.makedirs(os.path.join(self.root, "KillM", directory))
+        tokens.add_token("projects_root")
+        tokens.add_token("project")
+        tokens.add_token("asset")
+        templates.add_template("asset_dir", "{projects_root}/{project}/ART/{asset}")
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def run_audit(self, **kwargs):
+        entries = audit.audit(self.root, ["asset_dir"], workers=2, **kwargs)
+        return sorted((entry.status, entry.path) for entry in entries)
+
+    def test_root_passed_as_list(self):
+        self.assertEqual(
+            self.run_audit(projects_root=[self.root], project=["KillM"], asset=["Male", "Female", "Dog"]),
+            [
+                (audit.MISPLACED, self.root + "/KillM/ART/Typo"),
+                (audit.MISSING, self.root + "/KillM/ART/Dog"),
+                (audit.UNMATCHED, self.root + "/KillM/Extra"),
+            ]
+        )
+
+    def test_root_passed_as_fixed_value(self):
+        self.assertEqual(
+            self.run_audit(projects_root=self.root, project="KillM", asset=["Male", "Female"]),
+            [
+                (audit.MISPLACED, self.root + "/KillM/ART/Typo"),
+                (audit.UNMATCHED, self.root + "/KillM/Extra"),
+            ]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
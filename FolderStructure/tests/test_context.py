@@ -0,0 +1,55 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import folderstructure
+from folderstructure.error import SolvingError, TokenError
+
+
+class TestContext(unittest.TestCase):
+    def setUp(self):
+        tokens.add_token("projects_root")
+        tokens.add_token("project")
+        tokens.add_token("division", Art="ART", Rigging="RIG")
+        templates.add_template("scene", "{projects_root}/{project}/{division}/scene.ma")
+        templates.add_template("render", "{projects_root}/{project}/{division}/render/{pass_name}")
+        tokens.add_token("pass_name")
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+
+    def test_solve_siblings(self):
+        context = folderstructure.context("/mnt/projects/KillM/ART/scene.ma", "scene")
+        self.assertEqual(dict(context), {
+            "projects_root": "/mnt/projects", "project": "KillM", "division": "Art"
+        })
+        self.assertEqual(context.abbreviation("division"), "ART")
+        self.assertEqual(
+            context.solve("render", pass_name="beauty"), "/mnt/projects/KillM/ART/render/beauty"
+        )
+        self.assertEqual(context.solve("scene", division="Rigging"), "/mnt/projects/KillM/RIG/scene.ma")
+        self.assertRaises(SolvingError, context.solve, "render")
+
+    def test_derive(self):
+        context = folderstructure.context("/mnt/projects/KillM/ART/scene.ma", "scene")
+        child = context.derive(division="RIG", pass_name="beauty")
+        self.assertIs(child.parent, context)
+        self.assertEqual(child.fullname("division"), "Rigging")
+        self.assertEqual(child["project"], "KillM")
+        self.assertEqual(len(child), 4)
+        self.assertEqual(child.solve("render"), "/mnt/projects/KillM/RIG/render/beauty")
+        # Parent values don't change
+        self.assertEqual(context.fullname("division"), "Art")
+        self.assertNotIn("pass_name", context)
+
+    def test_unknown_option(self):
+        context = folderstructure.context("/mnt/projects/KillM/ART/scene.ma", "scene")
+        self.assertRaises(TokenError, context.derive, division="Modeling")
+
+
+if __name__ == "__main__":
+    unittest.main()
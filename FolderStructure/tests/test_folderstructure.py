@@ -0,0 +1,195 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import roots
+from folderstructure import folderstructure
+from folderstructure.error import SolvingError, TokenError
+
+
+class TestResolveChain(unittest.TestCase):
+    """Tree with an override and a default config:
+
+    {root}/KillM/Override/config.json
+    {root}/KillM/Default/config.json
+    """
+    def setUp(self):
+        self.root = tempfile.mkdtemp().replace("\\", "/")
+        for directory in ("Override", "Default"):
+            os.makedirs(os.path.join(self.root, "KillM", directory))
+            open(os.path.join(self.root, "KillM", directory, "config.json"), "w").close()
+        tokens.add_token("projects_root")
+        tokens.add_token("project")
+        templates.add_template("override", "{projects_root}/{project}/Missing/config.json")
+        templates.add_template("default", "{projects_root}/{project}/Default/config.json")
+        self.chain = ["override", "default"]
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        roots.reset_roots()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def resolve(self, **kwargs):
+        return folderstructure.resolve_chain(
+            self.chain, projects_root=self.root, project="KillM", **kwargs
+        )
+
+    def test_pattern_change(self):
+        self.assertEqual(self.resolve(), self.root + "/KillM/Default/config.json")
+        templates.get_template("override").pattern = "{projects_root}/{project}/Override/config.json"
+        self.assertEqual(self.resolve(), self.root + "/KillM/Override/config.json")
+
+    def test_token_options_change(self):
+        tokens.add_token("division", Default="Default")
+        templates.get_template("default").pattern = "{projects_root}/{project}/{division}/config.json"
+        self.assertEqual(self.resolve(), self.root + "/KillM/Default/config.json")
+        tokens.get_token("division").update_option("Default", "Override")
+        self.assertEqual(self.resolve(), self.root + "/KillM/Override/config.json")
+
+    def test_roots_change(self):
+        self.assertEqual(self.resolve(), self.root + "/KillM/Default/config.json")
+        other_platform = roots.LINUX if roots.current_platform() == roots.WINDOWS else roots.WINDOWS
+        roots.add_root("config", **{
+            other_platform: self.root + "/KillM/Default",
+            roots.current_platform(): self.root + "/KillM/Override"
+        })
+        self.assertEqual(self.resolve(), self.root + "/KillM/Override/config.json")
+
+
+class TestLatest(unittest.TestCase):
+    """Tree with versioned publishes:
+
+    {root}/Boots/v1/Boots_v1.ma
+    {root}/Boots/v9/Boots_v9.ma
+    {root}/Boots/v10/Boots_v10.ma
+    {root}/Boots/notes.txt
+    """
+    def setUp(self):
+        self.root = tempfile.mkdtemp().replace("\\", "/")
+        for version in ("1", "9", "10"):
+            os.makedirs(os.path.join(self.root, "Boots", "v" + version))
+        open(os.path.join(self.root, "Boots", "notes.txt"), "w").close()
+        tokens.add_token("projects_root")
+        tokens.add_token("asset")
+        tokens.add_token("version")
+        tokens.add_token("extension", ma="ma")
+        templates.add_template("publish", "{projects_root}/{asset}/v{version}/{asset}_v{version}.{extension}")
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        roots.reset_roots()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_numeric_order(self):
+        self.assertEqual(folderstructure.latest("publish", projects_root=self.root, asset="Boots"), "10")
+
+    def test_no_matching_entries(self):
+        os.makedirs(os.path.join(self.root, "Male"))
+        self.assertIsNone(folderstructure.latest("publish", projects_root=self.root, asset="Male"))
+
+    def test_missing_directory(self):
+        self.assertIsNone(folderstructure.latest("publish", projects_root=self.root, asset="Hat"))
+
+    def test_invalid_token(self):
+        with self.assertRaises(SolvingError):
+            folderstructure.latest("publish", token="frame", projects_root=self.root, asset="Boots")
+        with self.assertRaises(SolvingError):
+            folderstructure.latest("publish", token="extension", projects_root=self.root, asset="Boots")
+
+
+class TestCheckExists(unittest.TestCase):
+    """Tree with one published asset:
+
+    {root}/Boots/Boots.ma
+    """
+    def setUp(self):
+        self.root = tempfile.mkdtemp().replace("\\", "/")
+        os.makedirs(os.path.join(self.root, "Boots"))
+        open(os.path.join(self.root, "Boots", "Boots.ma"), "w").close()
+        tokens.add_token("projects_root")
+        tokens.add_token("asset")
+        templates.add_template("publish", "{projects_root}/{asset}/{asset}.ma")
+        templates.add_template("asset_dir", "{projects_root}/{asset}/")
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        roots.reset_roots()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def records(self, *assets):
+        return [{"projects_root": self.root, "asset": asset} for asset in assets]
+
+    def test_existing_and_missing(self):
+        open(os.path.join(self.root, "Boots", "Male.ma"), "w").close()
+        report = folderstructure.check_exists(self.records("Boots", "Male", "Hat"), "publish")
+        self.assertEqual(report.existing, [self.root + "/Boots/Boots.ma"])
+        self.assertEqual(report.missing, [self.root + "/Male/Male.ma", self.root + "/Hat/Hat.ma"])
+        self.assertEqual(report.inaccessible, [])
+
+    def test_duplicated_records(self):
+        report = folderstructure.check_exists(self.records("Boots", "Boots"), "publish", workers=1)
+        self.assertEqual(report.existing, [self.root + "/Boots/Boots.ma"])
+
+    def test_directory_template(self):
+        report = folderstructure.check_exists(self.records("Boots", "Hat"), "asset_dir")
+        self.assertEqual(report.existing, [self.root + "/Boots/"])
+        self.assertEqual(report.missing, [self.root + "/Hat/"])
+
+    def test_missing_required_token(self):
+        with self.assertRaises(SolvingError):
+            folderstructure.check_exists([{"projects_root": self.root}], "publish")
+
+
+class TestSolveProduct(unittest.TestCase):
+    def setUp(self):
+        tokens.add_token("projects_root")
+        tokens.add_token("asset")
+        tokens.add_token("division", Art="ART", Rigging="RIG")
+        templates.add_template("publish", "{projects_root}/{asset}/{division}/{asset}.ma")
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        roots.reset_roots()
+
+    def test_order_and_repeated_tokens(self):
+        paths = folderstructure.solve_product(
+            "publish", projects_root="/mnt/KillM", asset=["Boots", "Male"], division="Rigging"
+        )
+        self.assertEqual(list(paths), [
+            "/mnt/KillM/Boots/RIG/Boots.ma",
+            "/mnt/KillM/Male/RIG/Male.ma",
+        ])
+
+    def test_not_passed_options_expand(self):
+        paths = folderstructure.solve_product("publish", projects_root="/mnt/KillM", asset="Boots")
+        self.assertEqual(list(paths), [
+            "/mnt/KillM/Boots/ART/Boots.ma",
+            "/mnt/KillM/Boots/RIG/Boots.ma",
+        ])
+
+    def test_is_lazy(self):
+        paths = folderstructure.solve_product("publish", projects_root="/mnt/KillM")
+        with self.assertRaises(SolvingError):
+            next(paths)
+
+    def test_invalid_values(self):
+        with self.assertRaises(SolvingError):
+            list(folderstructure.solve_product("publish", projects_root="/mnt/KillM", asset=[]))
+        with self.assertRaises(TokenError):
+            list(folderstructure.solve_product(
+                "publish", projects_root="/mnt/KillM", asset="Boots", division="Lighting"
+            ))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import roots
+from folderstructure import instrumentation
+from folderstructure import folderstructure
+from folderstructure.error import SolvingError
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        tokens.add_token("projects_root")
+        tokens.add_token("asset")
+        templates.add_template("asset_root", "{projects_root}/{asset}")
+        self.template = templates.get_template("asset_root")
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        roots.reset_roots()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(instrumentation.is_enabled())
+        before = folderstructure.stats()["calls"]
+        self.template.parse("/mnt/Boots")
+        self.assertEqual(folderstructure.stats()["calls"], before)
+
+    def test_calls_and_failures(self):
+        with folderstructure.collect_stats() as collector:
+            self.template.parse("/mnt/Boots")
+            self.template.parse("/mnt/Male")
+            self.template.solve(projects_root="/mnt", asset="Boots")
+            with self.assertRaises(SolvingError):
+                self.template.solve(projects_root="/mnt")
+        stats = collector.stats()
+        self.assertEqual(stats["calls"]["Template.parse"]["asset_root"]["calls"], 2)
+        self.assertEqual(stats["calls"]["Template.solve"]["asset_root"]["calls"], 2)
+        self.assertEqual(stats["calls"]["Template.solve"]["asset_root"]["failures"], 1)
+        regex = stats["caches"]["Template.regex"]
+        self.assertEqual((regex["hits"], regex["misses"]), (1, 1))
+
+    def test_state_is_restored(self):
+        previous = instrumentation.get_collector()
+        with folderstructure.collect_stats():
+            self.assertTrue(instrumentation.is_enabled())
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertIs(instrumentation.get_collector(), previous)
+
+    def test_samples_are_bounded(self):
+        collector = instrumentation.Collector()
+        for index in range(instrumentation.SAMPLES_SIZE * 2):
+            collector.record("Template.parse", "asset_root", index)
+        group = collector.stats()["calls"]["Template.parse"]["asset_root"]
+        self.assertEqual(group["calls"], instrumentation.SAMPLES_SIZE * 2)
+        self.assertLessEqual(group["p50"], group["p90"])
+        self.assertEqual(collector.slowest(1)[0][:2], ("Template.parse", "asset_root"))
+
+
+if __name__ == "__main__":
+    unittest.main()
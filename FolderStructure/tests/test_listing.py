@@ -0,0 +1,85 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from folderstructure.listing import ListingCache
+
+
+class TestListingCache(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name in ("first", "second"):
+            os.mkdir(os.path.join(self.root, name))
+        open(os.path.join(self.root, "file.txt"), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def add_file(self, name):
+        open(os.path.join(self.root, name), "w").close()
+        # Make sure the change is visible even with coarse mtime resolution
+        mtime = os.stat(self.root).st_mtime + 10
+        os.utime(self.root, (mtime, mtime))
+
+    def test_ttl(self):
+        cache = ListingCache(ttl=3600)
+        self.assertEqual(sorted(cache.listdir(self.root)), ["file.txt", "first", "second"])
+        self.add_file("new.txt")
+        # Trusted without checking the directory until the TTL passes
+        self.assertNotIn("new.txt", cache.listdir(self.root))
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 1))
+
+    def test_mtime_revalidation(self):
+        cache = ListingCache(ttl=0)
+        listing = cache.get_listing(self.root)
+        listing.memoize("names", lambda each: sorted(each.names()))
+        # TTL passed but the directory didn't change, same listing and memoized values
+        self.assertIs(cache.get_listing(self.root), listing)
+        self.add_file("new.txt")
+        rescanned = cache.get_listing(self.root)
+        self.assertIsNot(rescanned, listing)
+        self.assertIn("new.txt", rescanned.memoize("names", lambda each: sorted(each.names())))
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 2))
+
+    def test_invalidate(self):
+        cache = ListingCache()
+        cache.listdir(self.root)
+        cache.listdir(os.path.join(self.root, "first"))
+        cache.listdir(os.path.join(self.root, "second"))
+        self.add_file("new.txt")
+        self.assertEqual(cache.invalidate_parent(os.path.join(self.root, "new.txt")), 1)
+        self.assertIn("new.txt", cache.listdir(self.root))
+        self.assertEqual(cache.invalidate(self.root, recursive=True), 3)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru(self):
+        cache = ListingCache(max_size=2)
+        first, second = os.path.join(self.root, "first"), os.path.join(self.root, "second")
+        cache.listdir(first)
+        cache.listdir(second)
+        cache.listdir(first)
+        cache.listdir(self.root)
+        self.assertIn(first, cache)
+        self.assertNotIn(second, cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        # Tree walks don't evict anything
+        cache.get_listing(second, store=False)
+        self.assertNotIn(second, cache)
+
+    def test_entries(self):
+        cache = ListingCache()
+        self.assertTrue(cache.exists(os.path.join(self.root, "file.txt")))
+        self.assertFalse(cache.exists(os.path.join(self.root, "missing.txt")))
+        self.assertTrue(cache.isdir(os.path.join(self.root, "first")))
+        self.assertFalse(cache.isdir(os.path.join(self.root, "file.txt")))
+        missing = os.path.join(self.root, "missing")
+        self.assertIsNotNone(cache.get_listing(missing).error)
+        self.assertRaises(OSError, cache.listdir, missing)
+
+
+if __name__ == "__main__":
+    unittest.main()
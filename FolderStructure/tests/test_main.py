@@ -0,0 +1,83 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import roots
+from folderstructure import folderstructure
+from folderstructure import __main__ as cli
+
+
+class Output(object):
+    """Collects written lines, works with str on Python 2 and 3."""
+    def __init__(self):
+        self.data = list()
+
+    def write(self, text):
+        self.data.append(text)
+
+    def flush(self):
+        pass
+
+    def records(self):
+        return [json.loads(line) for line in "".join(self.data).splitlines()]
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.repo = os.path.join(tempfile.mkdtemp(), "repo")
+        tokens.add_token("projects_root")
+        tokens.add_token("asset")
+        templates.add_template("asset_root", "{projects_root}/{asset}")
+        templates.set_active_template("asset_root")
+        folderstructure.save_session(self.repo, override=False)
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        roots.reset_roots()
+        shutil.rmtree(os.path.dirname(self.repo), ignore_errors=True)
+
+    def run_lines(self, command, lines, **kwargs):
+        output = Output()
+        failed = cli.run(command, lines, output, repo=self.repo, **kwargs)
+        return failed, output.records()
+
+    def test_parse_line_formats(self):
+        lines = ["/mnt/Boots\n", '"/mnt/Male"\n', '{"path": "/mnt/Hat"}\n', "\n"]
+        failed, records = self.run_lines("parse", lines)
+        self.assertEqual(failed, 0)
+        self.assertEqual([each["values"]["asset"] for each in records], ["Boots", "Male", "Hat"])
+
+    def test_solve_with_template(self):
+        lines = [json.dumps({"projects_root": "/mnt", "asset": "Boots"})]
+        failed, records = self.run_lines("solve", lines, template="asset_root")
+        self.assertEqual(records, [{"values": {"projects_root": "/mnt", "asset": "Boots"}, "path": "/mnt/Boots"}])
+
+    def test_errors(self):
+        lines = ['{"projects_root": "/mnt", "asset": "Boots"}', '{"projects_root": "/mnt"}',
+                 '{"projects_root": "/mnt", "asset": "Male"}']
+        failed, records = self.run_lines("solve", lines, errors=cli.ERRORS_NULL)
+        self.assertEqual(failed, 1)
+        self.assertEqual(records[1]["input"], lines[1])
+        self.assertTrue(records[1]["error"].startswith("SolvingError"))
+        failed, records = self.run_lines("solve", lines, errors=cli.ERRORS_SKIP)
+        self.assertEqual((failed, [each["path"] for each in records]), (1, ["/mnt/Boots", "/mnt/Male"]))
+        failed, records = self.run_lines("solve", lines, errors=cli.ERRORS_RAISE)
+        self.assertEqual((failed, [each["path"] for each in records]), (1, ["/mnt/Boots"]))
+
+    def test_workers_keep_input_order(self):
+        lines = [json.dumps({"projects_root": "/mnt", "asset": "a{}".format(index)}) for index in range(20)]
+        failed, records = self.run_lines("solve", lines, workers=2, chunk_size=3)
+        self.assertEqual(failed, 0)
+        self.assertEqual([each["path"] for each in records], ["/mnt/a{}".format(index) for index in range(20)])
+
+
+if __name__ == "__main__":
+    unittest.main()
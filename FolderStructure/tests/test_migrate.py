@@ -0,0 +1,125 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import roots
+from folderstructure import migrate
+
+
+class TestMigrate(unittest.TestCase):
+    """Assets of each department moved below a DEPT directory:
+
+    {root}/ART/Hero/model/hero.ma -> {root}/DEPT/ART/Hero/model/hero.ma
+    """
+    def setUp(self):
+        self.root = tempfile.mkdtemp().replace("\\", "/")
+        self.journal = os.path.join(self.root, "journal.jsonl")
+        tokens.add_token("root")
+        tokens.add_token("asset")
+        tokens.add_token("dept", Art="ART", Anim="ANIM")
+        templates.add_template("old", "{root}/{dept}/{asset}")
+        templates.add_template("new", "{root}/DEPT/{dept}/{asset}")
+        templates.add_template("flat", "{root}/ALL")
+        self.files = ["ART/Hero/model/hero.ma", "ART/Hero/hero.txt", "ART/Dog/dog.ma", "ANIM/Hero/walk.ma"]
+        for each in self.files:
+            self.touch(each)
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        roots.reset_roots()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def path(self, relative):
+        return "{}/{}".format(self.root, relative)
+
+    def touch(self, relative):
+        path = self.path(relative)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        open(path, "w").close()
+
+    def plan(self, target="new"):
+        paths = [self.path(each) for each in self.files] + ["/elsewhere/file.ma"]
+        return migrate.plan(paths, "old", target, fixed={"root": self.root})
+
+    def test_plan(self):
+        migration_plan = self.plan()
+        self.assertEqual(migration_plan.moves, [
+            migrate.Move(self.path("ANIM/Hero"), self.path("DEPT/ANIM/Hero")),
+            migrate.Move(self.path("ART/Dog"), self.path("DEPT/ART/Dog")),
+            migrate.Move(self.path("ART/Hero"), self.path("DEPT/ART/Hero")),
+        ])
+        self.assertEqual([path for path, _ in migration_plan.skipped], ["/elsewhere/file.ma"])
+        self.assertEqual(migration_plan.conflicts, [])
+        self.assertEqual(
+            migrate.MigrationPlan.from_data(migration_plan.data()).moves, migration_plan.moves
+        )
+
+    def test_plan_conflicts(self):
+        migration_plan = self.plan("flat")
+        self.assertEqual(migration_plan.moves, [])
+        self.assertEqual(len(migration_plan.conflicts), 3)
+
+    def test_migrate_and_rollback(self):
+        result = migrate.migrate(self.plan(), self.journal)
+        self.assertEqual((len(result.moved), result.failed), (3, []))
+        for each in self.files:
+            self.assertTrue(os.path.isfile(self.path("DEPT/" + each)))
+        self.assertFalse(os.path.exists(self.path("ART/Hero")))
+        self.assertEqual(migrate.read_journal(self.journal)[1], set([0, 1, 2]))
+        self.assertRaises(IOError, migrate.migrate, self.plan(), self.journal)
+
+        result = migrate.rollback(self.journal)
+        self.assertEqual(len(result.moved), 3)
+        for each in self.files:
+            self.assertTrue(os.path.isfile(self.path(each)))
+        # Directories created by the migration are removed
+        self.assertFalse(os.path.exists(self.path("DEPT")))
+        self.assertEqual(migrate.read_journal(self.journal)[1], set())
+
+    def test_resume_failed(self):
+        self.touch("DEPT/ART/Dog")
+        result = migrate.migrate(self.plan(), self.journal)
+        self.assertEqual([move.source for move, _ in result.failed], [self.path("ART/Dog")])
+        os.remove(self.path("DEPT/ART/Dog"))
+        result = migrate.resume(self.journal)
+        self.assertEqual(result.moved, [migrate.Move(self.path("ART/Dog"), self.path("DEPT/ART/Dog"))])
+        self.assertEqual(migrate.read_journal(self.journal)[1], set([0, 1, 2]))
+
+    def test_resume_interrupted(self):
+        migration_plan = self.plan()
+        # Killed after moving the first directory, before recording it as done
+        with open(self.journal, "w") as fp:
+            fp.write(json.dumps({"op": "plan", "plan": migration_plan.data()}) + "\n")
+            fp.write(json.dumps({"op": "start", "index": 0}) + "\n")
+            fp.write('{"op": "do')
+        os.makedirs(self.path("DEPT/ANIM"))
+        os.rename(self.path("ANIM/Hero"), self.path("DEPT/ANIM/Hero"))
+        with open(self.journal, "a") as fp:
+            fp.write("\n")
+        result = migrate.resume(self.journal)
+        self.assertEqual(len(result.moved), 3)
+        self.assertEqual(migrate.read_journal(self.journal)[1], set([0, 1, 2]))
+        self.assertTrue(os.path.isfile(self.path("DEPT/ANIM/Hero/walk.ma")))
+
+    def test_rollback_interrupted(self):
+        migration_plan = self.plan()
+        # Killed after recording the start of a move, before moving anything
+        with open(self.journal, "w") as fp:
+            fp.write(json.dumps({"op": "plan", "plan": migration_plan.data()}) + "\n")
+            fp.write(json.dumps({"op": "start", "index": 0}) + "\n")
+        result = migrate.rollback(self.journal)
+        self.assertEqual(result, migrate.MigrationResult([], []))
+        self.assertTrue(os.path.isfile(self.path("ANIM/Hero/walk.ma")))
+
+
+if __name__ == "__main__":
+    unittest.main()
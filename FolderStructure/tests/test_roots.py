@@ -0,0 +1,82 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import roots
+from folderstructure import folderstructure
+
+
+class TestRoots(unittest.TestCase):
+    def setUp(self):
+        roots.add_root("projects", windows="Y:/Projects", linux="/mnt/projects", mac="/Volumes/projects")
+        roots.add_root("library", windows="Y:/Projects/Library", linux="/mnt/library")
+
+    def tearDown(self):
+        roots.reset_roots()
+        templates.reset_templates()
+        tokens.reset_tokens()
+
+    def test_map_path(self):
+        self.assertEqual(roots.map_path("Y:/Projects/KillM", roots.LINUX), "/mnt/projects/KillM")
+        self.assertEqual(roots.map_path("/mnt/projects/KillM", roots.WINDOWS), "Y:/Projects/KillM")
+        self.assertEqual(roots.map_path("/mnt/projects", roots.MAC), "/Volumes/projects")
+        self.assertEqual(roots.map_path("Y:\\Projects\\KillM", roots.LINUX), "/mnt/projects/KillM")
+
+    def test_windows_roots_ignore_case(self):
+        self.assertEqual(roots.map_path("y:/projects/KillM", roots.LINUX), "/mnt/projects/KillM")
+        # Other platforms are case sensitive
+        self.assertEqual(roots.map_path("/MNT/projects/KillM", roots.WINDOWS), "/MNT/projects/KillM")
+
+    def test_nested_roots(self):
+        self.assertEqual(roots.map_path("Y:/Projects/Library/a", roots.LINUX), "/mnt/library/a")
+        self.assertEqual(roots.map_path("y:/projects/library/a", roots.LINUX), "/mnt/library/a")
+        self.assertEqual(roots.map_path("/mnt/library/a", roots.WINDOWS), "Y:/Projects/Library/a")
+
+    def test_whole_directory_names_only(self):
+        self.assertEqual(roots.map_path("Y:/ProjectsOld/KillM", roots.LINUX), "Y:/ProjectsOld/KillM")
+        self.assertEqual(roots.map_path("/other/path", roots.LINUX), "/other/path")
+
+    def test_unmapped_platform(self):
+        self.assertEqual(roots.map_path("/mnt/library/a", roots.MAC), "/mnt/library/a")
+        self.assertEqual(
+            roots.map_path_platforms("Y:/Projects/KillM", roots.PLATFORMS),
+            ["Y:/Projects/KillM", "/mnt/projects/KillM", "/Volumes/projects/KillM"]
+        )
+
+    def test_map_values(self):
+        self.assertEqual(
+            roots.map_values({"projects_root": "Y:/Projects", "version": 3}, roots.LINUX),
+            {"projects_root": "/mnt/projects", "version": 3}
+        )
+
+    def test_changes(self):
+        revision = roots.get_revision()
+        roots.remove_root("library")
+        self.assertEqual(roots.map_path("Y:/Projects/Library/a", roots.LINUX), "/mnt/projects/Library/a")
+        roots.set_roots({"other": {"linux": "/mnt/other", "windows": "O:"}})
+        self.assertEqual(roots.map_path("o:/a", roots.LINUX), "/mnt/other/a")
+        self.assertEqual(roots.map_path("Y:/Projects/a", roots.LINUX), "Y:/Projects/a")
+        self.assertGreater(roots.get_revision(), revision)
+
+    def test_solve_and_parse(self):
+        tokens.add_token("projects_root")
+        tokens.add_token("project")
+        templates.add_template("project_dir", "{projects_root}/{project}")
+        current = roots.get_root("projects")
+        if current is None:
+            self.skipTest("No projects root for this platform")
+        self.assertEqual(
+            folderstructure.solve_template("project_dir", projects_root="Y:/Projects", project="KillM"),
+            current + "/KillM"
+        )
+        self.assertEqual(
+            folderstructure.parse("Y:/Projects/KillM"),
+            {"projects_root": current, "project": "KillM"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
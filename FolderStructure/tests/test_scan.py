@@ -0,0 +1,106 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import scan
+from folderstructure import snapshot
+
+
+class NestedTreeTestCase(unittest.TestCase):
+    """Tree with files nested below directories matching asset_dir:
+
+    {root}/KillM/ART/Male/Rig/sub/f1.ma, f2.ma, f3.ma (1000 bytes each)
+    {root}/KillM/ART/Female/a.txt (2 bytes)
+    """
+    def setUp(self):
+        self.root = tempfile.mkdtemp().replace("\\", "/")
+        self._write_file("KillM/ART/Male/Rig/sub/f1.ma", 1000)
+        self._write_file("KillM/ART/Male/Rig/sub/f2.ma", 1000)
+        self._write_file("KillM/ART/Male/Rig/sub/f3.ma", 1000)
+        self._write_file("KillM/ART/Female/a.txt", 2)
+        tokens.add_token("projects_root")
+        tokens.add_token("project")
+        tokens.add_token("asset")
+        templates.add_template("asset_dir", "{projects_root}/{project}/ART/{asset}")
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _write_file(self, relative_path, size):
+        path = os.path.join(self.root, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as fp:
+            fp.write(b"x" * size)
+
+
+class TestScan(NestedTreeTestCase):
+    def test_nested_files_are_not_matches(self):
+        entries = list(scan.scan(self.root, ["asset_dir"], workers=2))
+        self.assertEqual(
+            [entry.path for entry in entries],
+            [self.root + "/KillM/ART/Female", self.root + "/KillM/ART/Male"]
+        )
+        self.assertEqual([entry.values["asset"] for entry in entries], ["Female", "Male"])
+        self.assertEqual(entries[0].values["projects_root"], self.root)
+
+    def test_matching_directories_are_not_walked(self):
+        matcher = scan.TemplateMatcher(["asset_dir"], single_level=True, root=self.root)
+        self.assertTrue(matcher.can_descend(self.root + "/KillM/ART"))
+        self.assertFalse(matcher.can_descend(self.root + "/KillM/ART/Male"))
+        self.assertFalse(matcher.can_descend(self.root + "/KillM/ART/Male/Rig"))
+
+
+class TestUsage(NestedTreeTestCase):
+    def test_nested_files_count_for_closest_directory(self):
+        rollup = scan.usage(self.root, ["project", "asset"], ["asset_dir"], workers=2)
+        self.assertEqual(rollup.get(), (3002, 4))
+        self.assertEqual(rollup.get("KillM"), (3002, 4))
+        self.assertEqual(rollup.get("KillM", "Male"), (3000, 3))
+        self.assertEqual(rollup.get("KillM", "Female"), (2, 1))
+        self.assertEqual(
+            [value for value, total in rollup.children("KillM")], ["Male", "Female"]
+        )
+        self.assertEqual(rollup.unmatched, (0, 0))
+        # One group per level and asset, not per file
+        self.assertEqual(len(rollup.data()["totals"]), 4)
+
+
+class TestSnapshot(NestedTreeTestCase):
+    def test_only_matching_directories_are_written(self):
+        filepath = os.path.join(self.root, "tree.snap")
+        self.assertEqual(snapshot.write_snapshot(filepath, self.root, ["asset_dir"], workers=2), 2)
+        entries = list(snapshot.read_snapshot(filepath))
+        self.assertEqual(
+            [entry.path for entry in entries],
+            [self.root + "/KillM/ART/Female", self.root + "/KillM/ART/Male"]
+        )
+        stat = os.lstat(self.root + "/KillM/ART/Male")
+        self.assertEqual((entries[1].mtime, entries[1].size), (stat.st_mtime_ns, stat.st_size))
+
+    def test_diff_of_nested_changes(self):
+        old_filepath = os.path.join(self.root, "old.snap")
+        new_filepath = os.path.join(self.root, "new.snap")
+        snapshot.write_snapshot(old_filepath, self.root, ["asset_dir"], workers=2)
+        self._write_file("KillM/ART/Male/Rig/sub/f4.ma", 10)
+        os.utime(self.root + "/KillM/ART/Male", (0, 0))
+        snapshot.write_snapshot(new_filepath, self.root, ["asset_dir"], workers=2)
+        changes = list(snapshot.diff(old_filepath, new_filepath))
+        self.assertEqual(
+            [(entry.status, entry.path) for entry in changes],
+            [(snapshot.MODIFIED, self.root + "/KillM/ART/Male")]
+        )
+        report = snapshot.diff_report(old_filepath, new_filepath, ["asset"])
+        self.assertEqual(list(report.keys()), [("Male",)])
+
+
+if __name__ == "__main__":
+    unittest.main()
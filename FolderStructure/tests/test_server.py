@@ -0,0 +1,95 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import roots
+from folderstructure import folderstructure
+from folderstructure import server
+from folderstructure.client import Client
+from folderstructure.error import SolvingError
+
+
+class TestResolverServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.repo = os.path.join(self.directory, "repo")
+        self.socket_path = os.path.join(self.directory, "resolver.sock")
+        tokens.add_token("projects_root")
+        tokens.add_token("asset")
+        templates.add_template("asset_root", "{projects_root}/{asset}")
+        templates.set_active_template("asset_root")
+        folderstructure.save_session(self.repo, override=False)
+        self.session = server.ResolverSession(self.repo)
+        self.server = self.start_server()
+        self.client = Client(self.socket_path, timeout=5.0)
+
+    def tearDown(self):
+        self.client.close()
+        self.stop_server()
+        templates.reset_templates()
+        tokens.reset_tokens()
+        roots.reset_roots()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def start_server(self):
+        resolver = server.ResolverServer(self.session, self.socket_path, reload_interval=0)
+        thread = threading.Thread(target=resolver.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return resolver
+
+    def stop_server(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_parse_and_solve(self):
+        self.assertEqual(self.client.parse("/mnt/Boots")["asset"], "Boots")
+        self.assertEqual(self.client.solve(projects_root="/mnt", asset="Boots"), "/mnt/Boots")
+        self.assertEqual(
+            self.client.solve_template("asset_root", projects_root="/mnt", asset="Male"), "/mnt/Male"
+        )
+        self.assertEqual(self.client.ping()["repo"], self.repo)
+
+    def test_batches(self):
+        paths = self.client.solve_batch([
+            {"projects_root": "/mnt", "asset": "Boots"}, {"projects_root": "/mnt"}
+        ])
+        self.assertEqual(paths, ["/mnt/Boots", None])
+        values = self.client.parse_batch(["/mnt/Boots"], template="asset_root")
+        self.assertEqual(values[0]["asset"], "Boots")
+
+    def test_errors_are_raised_in_client(self):
+        with self.assertRaises(SolvingError):
+            self.client.solve(projects_root="/mnt")
+        self.assertEqual(self.client.solve(projects_root="/mnt", asset="Boots"), "/mnt/Boots")
+        with self.assertRaises(RuntimeError):
+            self.client.request({"op": "unknown"})
+
+    def test_reload(self):
+        self.assertEqual(self.client.solve(projects_root="/mnt", asset="Boots"), "/mnt/Boots")
+        template = templates.get_template("asset_root")
+        template.pattern = "{projects_root}/assets/{asset}"
+        folderstructure.save_session(self.repo)
+        # Server shares this process session, only reloading brings the saved pattern back
+        template.pattern = "{projects_root}/{asset}"
+        self.assertTrue(self.session.reload_if_changed())
+        self.assertFalse(self.session.reload_if_changed())
+        self.assertEqual(self.client.solve(projects_root="/mnt", asset="Boots"), "/mnt/assets/Boots")
+        self.assertTrue(self.client.reload())
+
+    def test_reconnect_after_server_restart(self):
+        self.assertTrue(self.client.ping())
+        self.stop_server()
+        self.server = self.start_server()
+        self.assertEqual(self.client.solve(projects_root="/mnt", asset="Boots"), "/mnt/Boots")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import roots
+
+
+class TestPathFilter(unittest.TestCase):
+    def setUp(self):
+        tokens.add_token("projects_root")
+        tokens.add_token("project")
+        tokens.add_token("division", Art="ART", Rigging="RIG")
+        self.template = templates.add_template(
+            "division", "{projects_root}/{project}/{division}"
+        )
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        roots.reset_roots()
+
+    def test_counts(self):
+        path_filter = self.template.compile_filter(project="KillM", division="Rigging")
+        paths = [
+            "/mnt/projects/KillM/RIG",
+            "/mnt/projects/KillM/ART",
+            "/mnt/projects/Other/RIG",
+            "C:\\projects\\KillM\\RIG",
+        ]
+        self.assertEqual(
+            list(path_filter.filter(paths)), [paths[0], paths[3]]
+        )
+        self.assertEqual((path_filter.accepted, path_filter.rejected), (2, 2))
+        self.assertTrue(path_filter.match(paths[0]))
+        self.assertFalse(path_filter.match(paths[1]))
+        self.assertEqual((path_filter.accepted, path_filter.rejected), (3, 3))
+        path_filter.reset()
+        self.assertEqual((path_filter.accepted, path_filter.rejected), (0, 0))
+
+    def test_parse_accepted(self):
+        path_filter = self.template.compile_filter(division="Art")
+        parsed = list(path_filter.parse(["/mnt/KillM/ART", "/mnt/KillM/RIG"]))
+        self.assertEqual(len(parsed), 1)
+        self.assertEqual(parsed[0][1]["project"], "KillM")
+        self.assertEqual(parsed[0][1]["division"], "Art")
+
+    def test_regex_cache_is_bounded(self):
+        cache = self.template._Template__regex_cache
+
+        def cached_projects():
+            return [dict(literals).get("project") for _, _, literals in cache]
+
+        self.template.regex(fixed={"project": "Project0"})
+        self.template.regex(fixed={"project": "Project1"})
+        # Hits move to the end, Project1 is now the least recently used
+        self.template.regex(fixed={"project": "Project0"})
+        self.assertEqual(cached_projects(), ["Project1", "Project0"])
+        for index in range(2, templates.Template.REGEX_CACHE_SIZE + 1):
+            self.template.compile_filter(project="Project{}".format(index))
+        self.assertEqual(len(cache), templates.Template.REGEX_CACHE_SIZE)
+        self.assertNotIn("Project1", cached_projects())
+        self.assertIn("Project0", cached_projects())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import shutil
+import tempfile
+import unittest
+
+from folderstructure import tokens
+from folderstructure import templates
+from folderstructure import roots
+from folderstructure import validator
+from folderstructure import folderstructure
+from folderstructure.error import TemplateError, TokenError
+
+
+class TestValidator(unittest.TestCase):
+    def setUp(self):
+        tokens.add_token("projects_root")
+        tokens.add_token("project")
+        templates.add_template("project", "{projects_root}/{project}")
+        templates.add_template("cache", "{@project}/cache/{cache_name}")
+        self.checker = validator.Validator()
+
+    def tearDown(self):
+        templates.reset_templates()
+        tokens.reset_tokens()
+        roots.reset_roots()
+
+    def test_initial_index(self):
+        self.assertEqual(self.checker.unresolved_tokens(), {"cache_name": {"cache"}})
+        self.assertEqual(self.checker.referenced_by("project"), {"cache"})
+        self.assertFalse(self.checker.is_valid())
+
+    def test_sync_changes(self):
+        self.assertFalse(self.checker.sync())
+        tokens.add_token("cache_name")
+        tokens.add_token("unused")
+        self.assertTrue(self.checker.sync())
+        self.assertEqual(self.checker.unresolved_tokens(), {})
+        self.assertEqual(self.checker.unused_tokens(), {"unused"})
+        self.assertTrue(self.checker.is_valid())
+
+        templates.get_template("project").pattern = "{@cache}/{projects_root}"
+        self.checker.sync()
+        self.assertEqual(self.checker.cycles(), {"project", "cache"})
+        self.assertIn("Is part of a reference cycle.", self.checker.template_problems("cache"))
+        templates.get_template("project").pattern = "{projects_root}/{project}"
+        self.checker.sync()
+        self.assertEqual(self.checker.cycles(), set())
+
+    def test_sync_remove_and_rename(self):
+        templates.remove_template("project")
+        self.checker.sync()
+        self.assertEqual(self.checker.unresolved_templates(), {"project": {"cache"}})
+
+        templates.add_template("project", "{projects_root}/{project}")
+        tokens.update_token_name("project", "show")
+        self.checker.sync()
+        self.assertEqual(self.checker.unresolved_templates(), {})
+        self.assertEqual(self.checker.unresolved_tokens()["project"], {"project"})
+        self.assertEqual(self.checker.unused_tokens(), {"show"})
+
+    def test_sync_reset(self):
+        templates.reset_templates()
+        self.checker.sync()
+        self.assertEqual(self.checker.referenced_by("project"), set())
+        self.assertEqual(self.checker.unused_tokens(), {"projects_root", "project"})
+
+    def test_save_session(self):
+        repo = tempfile.mkdtemp()
+        try:
+            templates.add_template("empty", "")
+            with self.assertRaises(TemplateError):
+                folderstructure.save_session(repo)
+            templates.remove_template("empty")
+            tokens.add_token("invalid")
+            tokens.get_token("invalid").default = "Missing"
+            with self.assertRaises(TokenError):
+                folderstructure.save_session(repo)
+            tokens.remove_token("invalid")
+            self.assertTrue(folderstructure.save_session(repo))
+        finally:
+            shutil.rmtree(repo, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,42 @@ from folderstructure.error import TokenError
 
 
 __tokens = dict()
+__revision = {"value": 0}
+__changed_names = dict()
+
+
+def _changed(*names):
+    """Count a change to tokens of current session, see get_revision().
+
+    Args:
+        ``names`` (str): Names of the changed tokens, see get_changes().
+    """
+    __revision["value"] += 1
+    for name in names:
+        __changed_names[name] = __revision["value"]
+
+
+def get_revision():
+    """Number of changes made to tokens and their options in current session. Caches of
+    solved paths compare it to know when they are stale.
+
+    Returns:
+        [int]: Revision of current session tokens.
+    """
+    return __revision["value"]
+
+
+def get_changes(revision):
+    """Names of tokens added, changed, renamed or removed after given revision, so indexes
+    of tokens like validator.Validator only update those.
+
+    Args:
+        ``revision`` (int): A previous get_revision() value.
+
+    Returns:
+        [set]: Token names, removed ones and previous names of renamed ones included.
+    """
+    return set(name for name, changed in __changed_names.items() if changed > revision)
 
 
 class Token(Serializable):
@@ -46,6 +82,7 @@ class Token(Serializable):
             self.__options[fullname] = abbreviation
             if len(self.__options) == 1:
                 self.__default = fullname
+            _changed(self.__name)
             return True
         logger.debug(
             "Option '{}':'{}' already exists in Token '{}'. "
@@ -66,6 +103,7 @@ class Token(Serializable):
         """
         if fullname in self.__options.keys():
             self.__options[fullname] = abbreviation
+            _changed(self.__name)
             return True
         logger.debug(
             "Option '{}':'{}' doesn't exist in Token '{}'. "
@@ -84,6 +122,7 @@ class Token(Serializable):
         """
         if fullname in self.__options.keys():
             del self.__options[fullname]
+            _changed(self.__name)
             return True
         logger.debug(
             "Option '{}':'{}' doesn't exist in Token '{}'. ".format(
@@ -97,6 +136,7 @@ class Token(Serializable):
         """
         self.__default = None
         self.__options = dict()
+        _changed(self.__name)
 
     def has_option_fullname(self, fullname):
         """Looks for given option full name in the options.
@@ -201,7 +241,9 @@ class Token(Serializable):
         Returns:
             [str]: Set name of this Template
         """
+        old_name = self.__name
         self.__name = n
+        _changed(old_name, n)
 
     @property
     def default(self):
@@ -222,6 +264,7 @@ class Token(Serializable):
             d (str): Value of the default option to be set
         """
         self.__default = d
+        _changed(self.__name)
 
     @property
     def options(self):
@@ -264,6 +307,7 @@ def add_token(token_name, **kwargs):
         else:
             raise TokenError("Default value must match one of the options passed.")
     __tokens[token_name] = token
+    _changed(token_name)
     return token
 
 
@@ -278,6 +322,7 @@ def remove_token(token_name):
     """
     if has_token(token_name):
         del __tokens[token_name]
+        _changed(token_name)
         return True
     return False
 
@@ -322,6 +367,7 @@ def reset_tokens():
     Returns:
         bool: True if clearing was successful.
     """
+    _changed(*[name for name in __tokens.keys() if name != "_active"])
     __tokens.clear()
     return True
 
@@ -544,5 +590,6 @@ def load_token(filepath):
     new_token = Token.from_data(data)
     if new_token:
         __tokens[new_token.name] = new_token
+        _changed(new_token.name)
         return True
     return False
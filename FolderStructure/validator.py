@@ -0,0 +1,364 @@
+# coding=utf-8
+from __future__ import absolute_import, print_function
+
+import re
+
+from folderstructure import templates
+from folderstructure import tokens
+from folderstructure.logger import logger
+
+PLACEHOLDER_REGEX = re.compile(r'{(?P<placeholder>.+?)(:(?P<expression>(\\}|.)+?))?}')
+
+__session = {"validator": None}
+
+
+class Validator(object):
+    """Keeps an index of which templates reference which templates and use which tokens,
+    and the problems found in them, up to date as entities change. Only the entities
+    affected by an edit are checked again, so it can run on every keystroke of an editor.
+    Queries just read the index.
+
+    Call sync() after changing the session to index the templates and tokens changed since
+    the last call, or call the update and remove methods, e.g.: after
+    templates.add_template() call validator.update_template(name).
+
+    Problems tracked:
+
+        Unresolved references: Templates referencing templates or tokens that don't exist.
+
+        Unused tokens: Tokens no template uses.
+
+        Cycles: Templates that end up referencing themselves.
+
+        Empty templates: Templates with empty patterns.
+
+        Invalid tokens: Not required tokens without options.
+    """
+    def __init__(self):
+        self.__references = dict()      # template: set of referenced templates
+        self.__uses = dict()            # template: set of used tokens
+        self.__referenced_by = dict()   # template: set of templates referencing it
+        self.__used_by = dict()         # token: set of templates using it
+        self.__tokens = set()
+        self.__unresolved_templates = dict()  # missing template: set of templates
+        self.__unresolved_tokens = dict()     # missing token: set of templates
+        self.__unused_tokens = set()
+        self.__cyclic = set()
+        self.__empty_templates = set()
+        self.__invalid_tokens = set()
+        for name in tokens.get_tokens().keys():
+            self.update_token(name)
+        for name in templates.get_templates().keys():
+            self.update_template(name)
+        self.__revisions = (templates.get_revision(), tokens.get_revision())
+
+    def sync(self):
+        """Index the templates and tokens of current session changed since the last sync,
+        see templates.get_changes() and tokens.get_changes().
+
+        Returns:
+            [bool]: True if something changed, False otherwise.
+        """
+        templates_revision, tokens_revision = self.__revisions
+        changed_templates = templates.get_changes(templates_revision)
+        changed_tokens = tokens.get_changes(tokens_revision)
+        self.__revisions = (templates.get_revision(), tokens.get_revision())
+        for name in changed_tokens:
+            self.update_token(name)
+        for name in changed_templates:
+            self.update_template(name)
+        return bool(changed_templates or changed_tokens)
+
+    def update_template(self, name):
+        """Index a template that was added or whose pattern changed.
+
+        Args:
+            ``name`` (str): Name of the template in current session.
+
+        Returns:
+            [bool]: True if template was indexed, False if it's not in current session.
+        """
+        template = templates.get_template(name)
+        if template is None:
+            return self.remove_template(name)
+        references = set()
+        uses = set()
+        for match in PLACEHOLDER_REGEX.finditer(template.pattern):
+            placeholder = match.group("placeholder")
+            if placeholder.startswith("@"):
+                references.add(placeholder[1:])
+            else:
+                uses.add(placeholder)
+
+        was_indexed = name in self.__references
+        in_cycle_before = self.__in_cycle_with(name) if was_indexed else set()
+        self.__unlink(name)
+        self.__references[name] = references
+        self.__uses[name] = uses
+        for reference in references:
+            self.__referenced_by.setdefault(reference, set()).add(name)
+            if reference not in self.__references:
+                self.__unresolved_templates.setdefault(reference, set()).add(name)
+        for token in uses:
+            self.__used_by.setdefault(token, set()).add(name)
+            self.__unused_tokens.discard(token)
+            if token not in self.__tokens:
+                self.__unresolved_tokens.setdefault(token, set()).add(name)
+        if not was_indexed:
+            # Templates referencing this one are resolved now
+            self.__unresolved_templates.pop(name, None)
+        if template.pattern:
+            self.__empty_templates.discard(name)
+        else:
+            self.__empty_templates.add(name)
+        self.__update_cycles(name, in_cycle_before)
+        return True
+
+    def remove_template(self, name):
+        """Remove a template that was removed from current session.
+
+        Args:
+            ``name`` (str): Name of the template.
+
+        Returns:
+            [bool]: True if template was indexed, False otherwise.
+        """
+        if name not in self.__references:
+            return False
+        in_cycle_before = self.__in_cycle_with(name)
+        self.__unlink(name)
+        del self.__references[name]
+        del self.__uses[name]
+        self.__empty_templates.discard(name)
+        referencing = self.__referenced_by.get(name)
+        if referencing:
+            self.__unresolved_templates[name] = set(referencing)
+        self.__update_cycles(name, in_cycle_before)
+        return True
+
+    def rename_template(self, old_name, new_name):
+        """Index a template that was renamed. Templates referencing the old name become
+        unresolved.
+
+        Args:
+            ``old_name`` (str): Previous name.
+
+            ``new_name`` (str): Current name.
+
+        Returns:
+            [bool]: True if template was indexed.
+        """
+        self.remove_template(old_name)
+        return self.update_template(new_name)
+
+    def update_token(self, name):
+        """Index a token that was added or whose options changed.
+
+        Args:
+            ``name`` (str): Name of the token in current session.
+
+        Returns:
+            [bool]: True if token was indexed, False if it's not in current session.
+        """
+        token = tokens.get_token(name)
+        if token is None:
+            return self.remove_token(name)
+        self.__tokens.add(name)
+        self.__unresolved_tokens.pop(name, None)
+        if not self.__used_by.get(name):
+            self.__unused_tokens.add(name)
+        if not token.required and len(token.options) == 0:
+            self.__invalid_tokens.add(name)
+        else:
+            self.__invalid_tokens.discard(name)
+        return True
+
+    def remove_token(self, name):
+        """Remove a token that was removed from current session.
+
+        Args:
+            ``name`` (str): Name of the token.
+
+        Returns:
+            [bool]: True if token was indexed, False otherwise.
+        """
+        if name not in self.__tokens:
+            return False
+        self.__tokens.discard(name)
+        self.__unused_tokens.discard(name)
+        self.__invalid_tokens.discard(name)
+        using = self.__used_by.get(name)
+        if using:
+            self.__unresolved_tokens[name] = set(using)
+        return True
+
+    def rename_token(self, old_name, new_name):
+        """Index a token that was renamed. Templates using the old name become unresolved.
+
+        Args:
+            ``old_name`` (str): Previous name.
+
+            ``new_name`` (str): Current name.
+
+        Returns:
+            [bool]: True if token was indexed.
+        """
+        self.remove_token(old_name)
+        return self.update_token(new_name)
+
+    def unresolved_templates(self):
+        """
+        Returns:
+            [dict]: {missing_template_name: set of templates referencing it}
+        """
+        return self.__unresolved_templates
+
+    def unresolved_tokens(self):
+        """
+        Returns:
+            [dict]: {missing_token_name: set of templates using it}
+        """
+        return self.__unresolved_tokens
+
+    def unused_tokens(self):
+        """
+        Returns:
+            [set]: Names of tokens no template uses.
+        """
+        return self.__unused_tokens
+
+    def cycles(self):
+        """
+        Returns:
+            [set]: Names of templates that are part of a reference cycle.
+        """
+        return self.__cyclic
+
+    def empty_templates(self):
+        """
+        Returns:
+            [set]: Names of templates with empty patterns.
+        """
+        return self.__empty_templates
+
+    def invalid_tokens(self):
+        """
+        Returns:
+            [set]: Names of not required tokens without options.
+        """
+        return self.__invalid_tokens
+
+    def referenced_by(self, name):
+        """
+        Args:
+            ``name`` (str): Template name.
+
+        Returns:
+            [set]: Names of the templates referencing given one.
+        """
+        return self.__referenced_by.get(name, set())
+
+    def used_by(self, name):
+        """
+        Args:
+            ``name`` (str): Token name.
+
+        Returns:
+            [set]: Names of the templates using given token.
+        """
+        return self.__used_by.get(name, set())
+
+    def is_valid(self):
+        """Test if the session can be saved and solved. Unused tokens are not errors.
+
+        Returns:
+            [bool]: True if there are no unresolved references, cycles, empty templates
+            or invalid tokens.
+        """
+        return not (
+            self.__unresolved_templates or self.__unresolved_tokens or self.__cyclic
+            or self.__empty_templates or self.__invalid_tokens
+        )
+
+    def template_problems(self, name):
+        """
+        Args:
+            ``name`` (str): Template name.
+
+        Returns:
+            [list]: Messages describing the problems of given template. Empty if it's valid.
+        """
+        problems = list()
+        for reference in self.__references.get(name, set()):
+            if reference not in self.__references:
+                problems.append("References missing template '{}'.".format(reference))
+        for token in self.__uses.get(name, set()):
+            if token not in self.__tokens:
+                problems.append("Uses missing token '{}'.".format(token))
+        if name in self.__cyclic:
+            problems.append("Is part of a reference cycle.")
+        if name in self.__empty_templates:
+            problems.append("Pattern is empty.")
+        return problems
+
+    def __unlink(self, name):
+        for reference in self.__references.get(name, set()):
+            self.__discard(self.__referenced_by, reference, name)
+            self.__discard(self.__unresolved_templates, reference, name)
+        for token in self.__uses.get(name, set()):
+            self.__discard(self.__used_by, token, name)
+            self.__discard(self.__unresolved_tokens, token, name)
+            if token in self.__tokens and token not in self.__used_by:
+                self.__unused_tokens.add(token)
+
+    def __discard(self, index, key, name):
+        names = index.get(key)
+        if names is None:
+            return
+        names.discard(name)
+        if not names:
+            del index[key]
+
+    def __reach(self, start, edges):
+        seen = set()
+        stack = list(edges.get(start, ()))
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            stack.extend(edges.get(node, ()))
+        return seen
+
+    def __in_cycle_with(self, name):
+        # Templates in a cycle through name: reachable from it and reaching it
+        forward = self.__reach(name, self.__references)
+        if name not in forward:
+            return set()
+        return forward & self.__reach(name, self.__referenced_by)
+
+    def __update_cycles(self, name, in_cycle_before):
+        # Only cycles through the edited template can change
+        in_cycle_now = self.__in_cycle_with(name) if name in self.__references else set()
+        self.__cyclic.update(in_cycle_now)
+        for each in in_cycle_before - in_cycle_now:
+            if each not in self.__references or each not in self.__reach(each, self.__references):
+                self.__cyclic.discard(each)
+        if name not in in_cycle_now:
+            self.__cyclic.discard(name)
+        if in_cycle_now:
+            logger.debug("Reference cycle through template {}: {}".format(name, sorted(in_cycle_now)))
+
+
+def get_validator():
+    """Validator of current session, created on first call and synced on the next ones.
+
+    Returns:
+        Validator: Index of current session templates and tokens.
+    """
+    validator = __session["validator"]
+    if validator is None:
+        validator = __session["validator"] = Validator()
+    else:
+        validator.sync()
+    return validator
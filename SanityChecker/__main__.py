@@ -0,0 +1,121 @@
+"""Headless runner for farm and CI. Loads a repo, runs the checks and streams the results
+without PySide widgets.
+
+    $ python -m sanitychecker run C:/path/to/repo --jobs 8 --format json
+    {"name": "MyAwesomeCheck1", "status": "passed", "message": "", "seconds": 0.12}
+    ...
+    {"summary": {"passed": 148, "not_passed": 2, ...}, "seconds": 14.2}
+
+    $ python -m sanitychecker run C:/path/to/repo --select UVs MyAwesomeCheck1 --format junit -o report.xml
+
+Exit code is 0 if every check passed, 1 if any didn't, 2 if the repo couldn't be loaded and
+3 if a selected check or context wasn't found or there were no checks to run.
+"""
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+from sanitychecker.discovery import load_selected
+from sanitychecker.resultcache import ResultCache
+from sanitychecker.scheduler import CheckScheduler
+from sanitychecker.report import JsonReporter, JUnitReporter, check_result
+from sanitychecker.error import RepoError
+from sanitychecker.logger import logger
+
+
+FORMAT_JSON, FORMAT_JUNIT = ("json", "junit")
+EXIT_PASSED, EXIT_NOT_PASSED, EXIT_REPO_ERROR, EXIT_NOT_FOUND = (0, 1, 2, 3)
+
+
+def run(
+    repo_path: Path, names: list = None, jobs: int = 1, output_format: str = FORMAT_JSON,
+    output=None, try_fix: bool = True, cache: ResultCache = None
+) -> int:
+    """Run checks of a repo writing a report.
+
+    Args:
+        repo_path (Path): Path object to the repo directory.
+        names (list, optional): Names of checks and contexts to run. Defaults to None, all.
+        jobs (int, optional): Number of threads running checks. Defaults to 1.
+        output_format (str, optional): FORMAT_JSON or FORMAT_JUNIT. Defaults to FORMAT_JSON.
+        output (file, optional): Where to write the report. Defaults to sys.stdout.
+        try_fix (bool, optional): Try to fix if a fix has been implemented. Defaults to True.
+        cache (ResultCache, optional): Skip checks that passed before with the same inputs.
+
+    Returns:
+        int: Exit code. EXIT_PASSED, EXIT_NOT_PASSED, EXIT_REPO_ERROR or EXIT_NOT_FOUND.
+    """
+    output = output or sys.stdout
+    try:
+        checks, contexts = load_selected(repo_path, names)
+    except RepoError:
+        # Already logged where it's raised
+        return EXIT_REPO_ERROR
+    found = set(check.name for check in checks) | set(context.name for context in contexts)
+    missing = [name for name in names or [] if name not in found]
+    if missing:
+        # A misspelled name must not pass silently
+        logger.error(f"Checks or contexts not found in repo {repo_path}: {', '.join(missing)}")
+        return EXIT_NOT_FOUND
+    if output_format == FORMAT_JUNIT:
+        reporter = JUnitReporter(output, repo_path.name)
+    else:
+        reporter = JsonReporter(output)
+
+    results = []
+
+    def check_finished(check, seconds):
+        results.append(check_result(check, seconds))
+        reporter.check_finished(check, seconds)
+
+    start = time.perf_counter()
+    scheduler = CheckScheduler(checks, contexts, try_fix, jobs, cache=cache, on_finished=check_finished)
+    scheduler.run()
+    reporter.finish(results, time.perf_counter() - start)
+    if not results:
+        logger.error(f"No checks ran from repo {repo_path}.")
+        return EXIT_NOT_FOUND
+    if all(result["status"] == "passed" for result in results):
+        return EXIT_PASSED
+    return EXIT_NOT_PASSED
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sanitychecker", description="Run Sanity Checker repos without a GUI."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run the checks of a repo.")
+    run_parser.add_argument("repo", help="Sanity Checker repo path.")
+    run_parser.add_argument(
+        "--select", nargs="+", default=None, help="Names of checks and contexts to run, all by default."
+    )
+    run_parser.add_argument("--jobs", "-j", type=int, default=1, help="Threads running checks.")
+    run_parser.add_argument("--format", choices=(FORMAT_JSON, FORMAT_JUNIT), default=FORMAT_JSON)
+    run_parser.add_argument("--output", "-o", default=None, help="Report file, stdout by default.")
+    run_parser.add_argument("--no-fix", action="store_true", help="Don't try to fix failed checks.")
+    run_parser.add_argument(
+        "--cache", action="store_true", help="Skip checks that passed before with the same inputs."
+    )
+    run_parser.add_argument("--log-level", default="WARNING", help="Logging level for stderr.")
+    arguments = parser.parse_args(argv)
+
+    logging.basicConfig(
+        stream=sys.stderr, level=arguments.log_level.upper(), format="%(levelname)s: %(message)s"
+    )
+    cache = ResultCache() if arguments.cache else None
+    output = open(arguments.output, "w", encoding="utf-8") if arguments.output else sys.stdout
+    try:
+        return run(
+            Path(arguments.repo), arguments.select, arguments.jobs, arguments.format,
+            output, not arguments.no_fix, cache
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import os
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from sanitychecker.checkrepo import CHECKS_REGISTRY, SHARED_CONTEXTS_REGISTRY
+from sanitychecker.discovery import load_selected
+from sanitychecker.scheduler import CheckScheduler
+from sanitychecker.report import check_result, summarize
+from sanitychecker.error import RepoError
+from sanitychecker.logger import logger, logger_gui
+
+
+# Repo loaded by each worker process, see __init_worker()
+__worker = {}
+
+
+@dataclass
+class TargetResult:
+    """Results of running a repo against a target.
+    results are dictionaries returned by report.check_result(), in the order checks finished.
+    error is set if the repo couldn't be loaded or the run was interrupted.
+    """
+    target: object
+    results: list = field(default_factory=list)
+    seconds: float = 0.0
+    error: str = None
+    pid: int = None
+
+    @property
+    def summary(self) -> dict:
+        return summarize(self.results)
+
+    @property
+    def passed(self) -> bool:
+        return self.error is None and all(result["status"] == "passed" for result in self.results)
+
+
+def run_batch(
+    repo_path: Path, targets: list, names: list = None, processes: int = None,
+    try_fix: bool = True, workers: int = 1
+):
+    """Run the same repo against many targets, e.g.: scene files or asset directories,
+    yielding the results of each target as soon as it finishes.
+
+    Each process of the pool loads the repo once and runs many targets, resetting the status
+    of checks and contexts between them. Checks and contexts get the target in their
+    target attribute.
+
+    If a worker dies, e.g.: a check crashes the interpreter, the pool breaks and every
+    unfinished target fails with it. Those targets run again, each in a new process of its
+    own, so only the target that crashes its process gets an error.
+
+    Args:
+        repo_path (Path): Path object to the repo directory.
+
+        targets (list): Targets to run the repo against. They must be picklable.
+
+        names (list, optional): Names of checks and contexts to run. Defaults to None, all.
+
+        processes (int, optional): Number of worker processes. Defaults to None, one per CPU.
+        With 1 the targets run in the calling process, using its registries.
+
+        try_fix (bool, optional): Try to fix if a fix has been implemented. Defaults to True.
+
+        workers (int, optional): Number of threads running checks of a target. Defaults to 1.
+
+    Yields:
+        TargetResult: Results of a target, in the order targets finish.
+    """
+    targets = list(targets)
+    if processes == 1:
+        __init_worker(repo_path, names)
+        for target in targets:
+            yield __run_target(target, try_fix, workers)
+        return
+
+    unfinished = []
+    with ProcessPoolExecutor(
+        processes, initializer=__init_worker, initargs=(repo_path, names)
+    ) as executor:
+        futures = {
+            executor.submit(__run_target, target, try_fix, workers): target for target in targets
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except BrokenProcessPool:
+                unfinished.append(futures[future])
+            except Exception:
+                exception_traceback = traceback.format_exc()
+                logger_gui.exception(
+                    f"EXCEPTION: Worker failed running target {futures[future]}\n{exception_traceback}"
+                )
+                yield TargetResult(futures[future], error=exception_traceback)
+    if not unfinished:
+        return
+
+    # There's no telling which target killed the worker, run each of them in its own process
+    logger_gui.warning(
+        f"A worker process died, running {len(unfinished)} unfinished targets again one per process."
+    )
+    with ThreadPoolExecutor(processes or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(__run_isolated, repo_path, names, target, try_fix, workers)
+            for target in unfinished
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def __run_isolated(repo_path: Path, names: list, target, try_fix: bool, workers: int) -> TargetResult:
+    """Run a target in a new worker process of its own."""
+    with ProcessPoolExecutor(1, initializer=__init_worker, initargs=(repo_path, names)) as executor:
+        try:
+            return executor.submit(__run_target, target, try_fix, workers).result()
+        except Exception:
+            # The worker died, e.g.: a check crashed the interpreter
+            exception_traceback = traceback.format_exc()
+            logger_gui.exception(
+                f"EXCEPTION: Worker failed running target {target}\n{exception_traceback}"
+            )
+            return TargetResult(target, error=exception_traceback)
+
+
+def __init_worker(repo_path: Path, names: list = None):
+    """Load the repo once for all the targets a worker runs."""
+    __worker.clear()
+    __worker["repo_path"] = repo_path
+    try:
+        __worker["checks"], __worker["contexts"] = load_selected(repo_path, names)
+    except RepoError as why:
+        __worker["error"] = str(why)
+        return
+    logger.debug(
+        f"Worker {os.getpid()} loaded {len(__worker['checks'])} checks and "
+        f"{len(__worker['contexts'])} contexts from repo {repo_path}."
+    )
+
+
+def __run_target(target, try_fix: bool, workers: int) -> TargetResult:
+    """Run the checks loaded by the worker against a target."""
+    if "error" in __worker:
+        return TargetResult(target, error=__worker["error"], pid=os.getpid())
+
+    # Dependencies that are not selected must run again too, reset everything loaded
+    repo_path = __worker["repo_path"]
+    for check in CHECKS_REGISTRY.get_checks_by_repo(repo_path):
+        check.reset(target)
+    for context in SHARED_CONTEXTS_REGISTRY.get_contexts_by_repo(repo_path):
+        context.reset(target)
+
+    result = TargetResult(target, pid=os.getpid())
+
+    def check_finished(check, seconds):
+        result.results.append(check_result(check, seconds))
+
+    start = time.perf_counter()
+    scheduler = CheckScheduler(
+        __worker["checks"], __worker["contexts"], try_fix, workers, on_finished=check_finished
+    )
+    try:
+        scheduler.run()
+    except Exception:
+        exception_traceback = traceback.format_exc()
+        logger_gui.exception(f"EXCEPTION: Failed running target {target}\n{exception_traceback}")
+        result.error = exception_traceback
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+if __name__ == "__main__":
+    pass
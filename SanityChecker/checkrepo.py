@@ -1,17 +1,27 @@
 import inspect
 import traceback
+import hashlib
 import sys
+import weakref
 from importlib.util import spec_from_file_location, module_from_spec
 from pathlib import Path
 
 from sanitychecker.sanitycheck import SanityCheck, SharedContext
 from sanitychecker.registry import ChecksRegistry, SharedContextsRegistry
+from sanitychecker.plan import ExecutionPlan
 from sanitychecker.logger import logger, logger_gui
 from sanitychecker.error import RepoError
 
 
 CHECKS_REGISTRY = ChecksRegistry()
 SHARED_CONTEXTS_REGISTRY = SharedContextsRegistry()
+EXECUTION_PLAN = ExecutionPlan()
+
+# repo_path: {module Path: (mtime_ns, size, sha1)} of the modules last loaded
+__modules_state = {}
+# class: module Path it was loaded from. Modules are registered in sys.modules by file name
+# only, so modules with the same name in different repos replace each other there
+__classes_modules = weakref.WeakKeyDictionary()
 
 
 def load_sanitycheck_repo(repo_path: Path) -> list:
@@ -33,16 +43,35 @@ def load_sanitycheck_repo(repo_path: Path) -> list:
         logger_gui.exception(f"EXCEPTION: {msg}")
         raise RepoError(msg)
 
+    __modules_state[repo_path] = {}
+    return load_sanitycheck_modules(repo_path, __get_repo_modules(repo_path))
+
+
+def load_sanitycheck_modules(repo_path: Path, py_modules: list) -> list:
+    """Load checks from some modules of a repo only, e.g.: modules of the checks found by
+    discovery.discover_repo() that are about to run. Modules that were already loaded are
+    loaded again.
+
+    Args:
+        repo_path (Path): Path object to the repo directory.
+
+        py_modules (list): Path objects of the modules to load.
+
+    Returns:
+        tuple: [0] List of SanityCheck instances loaded from the repo in no particular order.
+        [1] List of SharedContext instances loaded from the repo in no particular order.
+    """
     num_checks = 0
     num_contexts = 0
-    for py_module in repo_path.glob('**/*.py'):
-        if not (py_module.name.startswith('__') or py_module.is_dir()):
-            logger_gui.debug(f"Loading checks from {py_module}")
-            module_checks, module_contexts = __get_classes_from_module(py_module)
-            CHECKS_REGISTRY.extend_checks(module_checks, py_module.name, repo_path)
-            SHARED_CONTEXTS_REGISTRY.extend_contexts(module_contexts, py_module.name, repo_path)
-            num_checks += len(module_checks)
-            num_contexts += len(module_contexts)
+    modules_state = __modules_state.setdefault(repo_path, {})
+    for py_module in py_modules:
+        logger_gui.debug(f"Loading checks from {py_module}")
+        modules_state[py_module] = __get_module_state(py_module)
+        module_checks, module_contexts = __get_classes_from_module(py_module)
+        CHECKS_REGISTRY.extend_checks(module_checks, py_module.name, repo_path)
+        SHARED_CONTEXTS_REGISTRY.extend_contexts(module_contexts, py_module.name, repo_path)
+        num_checks += len(module_checks)
+        num_contexts += len(module_contexts)
     logger_gui.info(
         f"Finished loading {num_checks} checks and {num_contexts} contexts from repo {repo_path}."
     )
@@ -54,13 +83,127 @@ def load_sanitycheck_repo(repo_path: Path) -> list:
             if not found_context:
                 CHECKS_REGISTRY.remove_check(check, repo_path)
         if check.has_dependencies():
+            check.dependencies_instances.clear()
             register_dependencies(check)
+    compile_execution_plan()
     return (
         CHECKS_REGISTRY.get_checks_by_repo(repo_path),
         SHARED_CONTEXTS_REGISTRY.get_contexts_by_repo(repo_path)
     )
 
 
+def reload_sanitycheck_repo(repo_path: Path) -> list:
+    """Reload only the modules of a repo that changed since it was loaded, comparing their
+    modification time and size, and their content hash when those differ. Registries are
+    updated in place and only the checks affected by the changed modules are linked again
+    to their dependencies and contexts. Repos not loaded before are fully loaded.
+
+    Args:
+        repo_path (Path): Path object to the repo directory.
+
+    Raises:
+        RepoError: If the repo path doesn't exist or is invalid.
+
+    Returns:
+        tuple: [0] List of SanityCheck instances found in repo in no particular order.
+        [1] List of SharedContext instances found in repo in no particular order.
+        [2] List of module Paths that were reloaded or removed.
+    """
+    modules_state = __modules_state.get(repo_path)
+    if modules_state is None:
+        checks, contexts = load_sanitycheck_repo(repo_path)
+        return checks, contexts, list(__modules_state[repo_path].keys())
+    if not repo_path.exists() or not repo_path.is_dir():
+        msg = f"Invalid repo path. Make sure the directory exists. {repo_path}"
+        logger_gui.exception(f"EXCEPTION: {msg}")
+        raise RepoError(msg)
+
+    changed = []
+    current_modules = __get_repo_modules(repo_path)
+    for py_module in current_modules:
+        state = modules_state.get(py_module)
+        new_state = __get_module_state(py_module, state)
+        modules_state[py_module] = new_state
+        if state is None or state[2] != new_state[2]:
+            changed.append(py_module)
+    current_set = set(current_modules)
+    removed = [py_module for py_module in modules_state if py_module not in current_set]
+    for py_module in removed:
+        del modules_state[py_module]
+    if not changed and not removed:
+        logger_gui.info(f"No changes found in repo {repo_path}.")
+        return (
+            CHECKS_REGISTRY.get_checks_by_repo(repo_path),
+            SHARED_CONTEXTS_REGISTRY.get_contexts_by_repo(repo_path),
+            []
+        )
+
+    old_checks = set()
+    old_contexts = set()
+    new_checks = set()
+    for py_module in changed + removed:
+        old_checks.update(CHECKS_REGISTRY.get_checks_by_module(py_module.name, repo_path))
+        old_contexts.update(SHARED_CONTEXTS_REGISTRY.get_contexts_by_module(py_module.name, repo_path))
+    for py_module in removed:
+        logger_gui.debug(f"Removing checks from {py_module}")
+        CHECKS_REGISTRY.remove_module(py_module.name, repo_path)
+        SHARED_CONTEXTS_REGISTRY.remove_module(py_module.name, repo_path)
+        sys.modules.pop(py_module.name, None)
+    for py_module in changed:
+        logger_gui.debug(f"Reloading checks from {py_module}")
+        module_checks, module_contexts = __get_classes_from_module(py_module)
+        CHECKS_REGISTRY.extend_checks(module_checks, py_module.name, repo_path)
+        SHARED_CONTEXTS_REGISTRY.extend_contexts(module_contexts, py_module.name, repo_path)
+        new_checks.update(module_checks)
+
+    # Link again only new checks and checks pointing to replaced instances or new names
+    new_names = set(check.name for check in new_checks)
+    relinked = 0
+    for check in list(CHECKS_REGISTRY):
+        is_new = check in new_checks
+        if is_new or check.shared_context in old_contexts:
+            if isinstance(check.shared_context, SharedContext):
+                check.shared_context = check.shared_context.name
+            if type(check.shared_context) is str and not register_check_with_context(check):
+                CHECKS_REGISTRY.remove_check(check, repo_path)
+        if is_new or new_names.intersection(check.dependencies_names) or any(
+            dependency in old_checks for dependency in check.dependencies_instances
+        ):
+            check.dependencies_instances.clear()
+            if check.has_dependencies():
+                register_dependencies(check)
+            relinked += 1
+    for context in SHARED_CONTEXTS_REGISTRY:
+        if context not in old_contexts:
+            context.checks[:] = [check for check in context.checks if check not in old_checks]
+    compile_execution_plan()
+    logger_gui.info(
+        f"Reloaded {len(changed)} and removed {len(removed)} modules from repo {repo_path}, "
+        f"{relinked} checks linked again."
+    )
+    return (
+        CHECKS_REGISTRY.get_checks_by_repo(repo_path),
+        SHARED_CONTEXTS_REGISTRY.get_contexts_by_repo(repo_path),
+        changed + removed
+    )
+
+
+def compile_execution_plan() -> ExecutionPlan:
+    """Compile EXECUTION_PLAN again from all registered checks, reporting dependency cycles
+    and dependencies that were not found.
+
+    Returns:
+        ExecutionPlan: The compiled EXECUTION_PLAN.
+    """
+    EXECUTION_PLAN.compile(CHECKS_REGISTRY.get_all_checks())
+    for cycle in EXECUTION_PLAN.cycles:
+        names = " -> ".join(check.name for check in cycle + cycle[:1])
+        logger_gui.error(f"Dependency cycle between checks {names}. They won't run.")
+    for check, names in EXECUTION_PLAN.missing.items():
+        logger_gui.warning(f"Check '{check.name}' depends on checks that were not found: {names}")
+    return EXECUTION_PLAN
+
+
 def register_check_with_context(check: SanityCheck):
     """ Register a check with a shared context.
 
@@ -74,12 +217,11 @@ def register_check_with_context(check: SanityCheck):
     if isinstance(check.shared_context, SharedContext):
         found_context = True
     else:
-        for context in SHARED_CONTEXTS_REGISTRY:
-            if check.shared_context == context.name:
-                check.shared_context = context
-                context.add_check(check)
-                found_context = True
-                break
+        context = SHARED_CONTEXTS_REGISTRY.get_context(check.shared_context)
+        if context is not None:
+            check.shared_context = context
+            context.add_check(check)
+            found_context = True
     if not found_context:
         logger.warning(
             f"Check '{check.name}' is trying to invoke a "
@@ -95,11 +237,63 @@ def register_dependencies(check: SanityCheck):
     Args:
         check (SanityCheck): Check to register dependencies for.
     """
-    for sanity_check in CHECKS_REGISTRY:
-        if sanity_check.name in check.dependencies_names:
+    for dependency_name in check.dependencies_names:
+        for sanity_check in CHECKS_REGISTRY.get_checks_by_name(dependency_name):
             check.add_dependency(sanity_check)
 
 
+def __get_repo_modules(repo_path: Path) -> list:
+    """Get the modules checks and contexts are loaded from.
+
+    Args:
+        repo_path (Path): Path object to the repo directory.
+
+    Returns:
+        list: Path objects of the modules.
+    """
+    return [
+        py_module for py_module in repo_path.glob('**/*.py')
+        if not (py_module.name.startswith('__') or py_module.is_dir())
+    ]
+
+
+def __get_module_state(py_module: Path, previous: tuple = None) -> tuple:
+    """Get the state used to find out if a module changed. Contents are only hashed again if
+    modification time or size changed.
+
+    Args:
+        py_module (Path): Path object to the module.
+
+        previous (tuple, optional): Previous state of the module. Defaults to None.
+
+    Returns:
+        tuple: (mtime_ns, size, sha1 of the contents)
+    """
+    try:
+        stat = py_module.stat()
+    except OSError:
+        return (None, None, None)
+    if previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+        return previous
+    try:
+        content_hash = hashlib.sha1(py_module.read_bytes()).hexdigest()
+    except OSError:
+        content_hash = None
+    return (stat.st_mtime_ns, stat.st_size, content_hash)
+
+
+def get_class_module(check_class) -> Path:
+    """
+    Args:
+        check_class (type): SanityCheck or SharedContext subclass.
+
+    Returns:
+        Path: Module the class was loaded from by this module, None if it was imported
+        some other way.
+    """
+    return __classes_modules.get(check_class)
+
+
 def __get_classes_from_module(py_module: Path) -> list:
     """Get all checks and contexts from a module.
 
@@ -117,6 +311,9 @@ def __get_classes_from_module(py_module: Path) -> list:
         sys.modules[py_module.name] = check_module
         spec.loader.exec_module(check_module)
         class_members = inspect.getmembers(check_module, inspect.isclass)
+        for _, member in class_members:
+            if member.__module__ == py_module.name:
+                __classes_modules[member] = py_module
     except Exception:
         exception_traceback = traceback.format_exc()
         logger_gui.exception(
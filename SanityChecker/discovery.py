@@ -0,0 +1,391 @@
+import ast
+import json
+import hashlib
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sanitychecker.checkrepo import (
+    load_sanitycheck_repo, load_sanitycheck_modules, CHECKS_REGISTRY, SHARED_CONTEXTS_REGISTRY
+)
+from sanitychecker.error import RepoError
+from sanitychecker.logger import logger, logger_gui
+
+
+MANIFEST_VERSION = 2
+DEFAULT_MANIFESTS_DIR = Path.home() / ".sanitychecker" / "manifests"
+
+# Attributes set in __init__ that are read as literals
+STATIC_ATTRIBUTES = ("name", "description", "priority", "shared_context", "dependencies_names")
+BASE_CLASSES = {"SanityCheck": "check", "SharedContext": "context"}
+
+
+@dataclass
+class DiscoveredClass:
+    """A SanityCheck or SharedContext subclass found without importing its module.
+    Attributes are the literal values assigned in __init__, or the defaults if they are
+    not assigned or not literals. Attributes assigned values that are not literals are
+    listed in dynamic, e.g.: a name built at runtime is only known once imported.
+    """
+    kind: str
+    class_name: str
+    module: Path
+    name: str
+    description: str = ""
+    priority: int = 0
+    shared_context: str = None
+    dependencies_names: list = field(default_factory=list)
+    dynamic: list = field(default_factory=list)
+
+
+def discover_repo(repo_path: Path, manifest_path: Path = None) -> tuple:
+    """Find the checks and contexts of a repo by parsing its modules with ast, without
+    importing them. Parsed modules are saved to a manifest keyed by their content hash,
+    so next time only modules that changed are parsed again.
+
+    Args:
+        repo_path (Path): Path object to the repo directory.
+
+        manifest_path (Path, optional): JSON manifest file. Defaults to a file per repo
+        in DEFAULT_MANIFESTS_DIR.
+
+    Returns:
+        tuple: [0] List of DiscoveredClass of checks.
+        [1] List of DiscoveredClass of contexts.
+    """
+    manifest_path = manifest_path or get_manifest_path(repo_path)
+    manifest = __read_manifest(manifest_path)
+    modules = {}
+    changed = False
+    for py_module in repo_path.glob('**/*.py'):
+        if py_module.name.startswith('__') or py_module.is_dir():
+            continue
+        key = py_module.relative_to(repo_path).as_posix()
+        entry = __get_module_entry(py_module, manifest.get(key))
+        if entry is not manifest.get(key):
+            changed = True
+        modules[key] = entry
+    if changed or set(modules) != set(manifest):
+        __write_manifest(manifest_path, repo_path, modules)
+
+    classes = {}
+    for key, entry in modules.items():
+        for raw in entry["classes"]:
+            classes.setdefault(raw["class_name"], []).append((repo_path / key, raw))
+    checks = []
+    contexts = []
+    for class_name, definitions in classes.items():
+        for py_module, raw in definitions:
+            discovered = __resolve(raw, py_module, classes)
+            if discovered is None:
+                continue
+            if discovered.kind == "check":
+                checks.append(discovered)
+            else:
+                contexts.append(discovered)
+    logger_gui.debug(
+        f"Discovered {len(checks)} checks and {len(contexts)} contexts in repo {repo_path}."
+    )
+    return checks, contexts
+
+
+def load_discovered(repo_path: Path, names: list, checks: list, contexts: list) -> tuple:
+    """Import only the modules needed to run some discovered checks or contexts: their own
+    modules, the modules of their dependencies and contexts, and for contexts the modules
+    of their checks.
+
+    Names that were not discovered may belong to classes whose name is not a literal, so
+    the modules of those classes are imported too. If a needed class has dependencies or a
+    context that are not literals, the whole repo is imported.
+
+    Args:
+        repo_path (Path): Path object to the repo directory.
+
+        names (list): Names of the checks and contexts to load.
+
+        checks (list): DiscoveredClass of checks, as returned by discover_repo().
+
+        contexts (list): DiscoveredClass of contexts, as returned by discover_repo().
+
+    Returns:
+        tuple: [0] List of SanityCheck instances loaded from the repo in no particular order.
+        [1] List of SharedContext instances loaded from the repo in no particular order.
+    """
+    checks_by_name = {check.name: check for check in checks}
+    contexts_by_name = {context.name: context for context in contexts}
+    context_checks = {}
+    for check in checks:
+        if check.shared_context:
+            context_checks.setdefault(check.shared_context, []).append(check)
+
+    modules = set()
+    seen = set()
+    missing = []
+    pending = list(names)
+    needed = []
+    unknown_names = [each for each in checks + contexts if "name" in each.dynamic]
+    while pending or needed:
+        if needed:
+            discovered = needed.pop()
+            if {"dependencies_names", "shared_context"}.intersection(discovered.dynamic):
+                logger.debug(
+                    f"Dependencies or context of {discovered.class_name} are not literals, "
+                    f"loading the whole repo {repo_path}."
+                )
+                return load_sanitycheck_repo(repo_path)
+            modules.add(discovered.module)
+            if discovered.kind == "check":
+                pending.extend(discovered.dependencies_names)
+                if discovered.shared_context:
+                    pending.append(discovered.shared_context)
+            else:
+                pending.extend(each.name for each in context_checks.get(discovered.name, []))
+        else:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            found = [each for each in (checks_by_name.get(name), contexts_by_name.get(name)) if each]
+            needed.extend(found)
+            if not found:
+                missing.append(name)
+        if missing and unknown_names and not (pending or needed):
+            # Any of them may be a missing name, it's only known once imported
+            logger.debug(
+                f"Checks or contexts {missing} were not discovered, loading classes whose "
+                f"name is not a literal: {[each.class_name for each in unknown_names]}"
+            )
+            needed.extend(unknown_names)
+            unknown_names = []
+            missing = []
+    for name in missing:
+        logger.warning(f"Check or context {name} was not discovered in repo {repo_path}.")
+    return load_sanitycheck_modules(repo_path, sorted(modules))
+
+
+def load_selected(repo_path: Path, names: list = None) -> tuple:
+    """Load a repo and get the checks and contexts to run by name. When names are given,
+    only the modules needed by them are imported, see load_discovered().
+
+    Args:
+        repo_path (Path): Path object to the repo directory.
+        names (list, optional): Names of checks and contexts to run. Defaults to None, all.
+
+    Raises:
+        RepoError: If the repo path doesn't exist or is invalid.
+
+    Returns:
+        tuple: [0] List of SanityCheck instances. [1] List of SharedContext instances.
+    """
+    if not names:
+        checks, contexts = load_sanitycheck_repo(repo_path)
+        return checks, contexts
+    if not repo_path.exists() or not repo_path.is_dir():
+        msg = f"Invalid repo path. Make sure the directory exists. {repo_path}"
+        logger_gui.exception(f"EXCEPTION: {msg}")
+        raise RepoError(msg)
+    discovered_checks, discovered_contexts = discover_repo(repo_path)
+    load_discovered(repo_path, names, discovered_checks, discovered_contexts)
+    checks = []
+    contexts = []
+    for name in names:
+        check = CHECKS_REGISTRY.get_check(name, repo_path)
+        context = SHARED_CONTEXTS_REGISTRY.get_context(name, repo_path)
+        if check is not None:
+            checks.append(check)
+        elif context is not None:
+            contexts.append(context)
+        else:
+            logger.warning(f"Check or context {name} not found in repo {repo_path}")
+    return checks, contexts
+
+
+def get_manifest_path(repo_path: Path) -> Path:
+    """
+    Args:
+        repo_path (Path): Path object to the repo directory.
+
+    Returns:
+        Path: Default manifest file of the repo.
+    """
+    repo_hash = hashlib.sha1(str(repo_path.resolve()).encode("utf-8")).hexdigest()
+    return DEFAULT_MANIFESTS_DIR / f"{repo_hash[:16]}.json"
+
+
+def parse_module(source: str, filename: str = "<unknown>") -> list:
+    """Find the classes of a module and what's needed to know if they are checks or contexts.
+
+    Args:
+        source (str or bytes): Module source code.
+
+        filename (str, optional): Used in syntax errors. Defaults to "<unknown>".
+
+    Returns:
+        list: dict for each class with "class_name", "bases", "abstract", "methods",
+        "attributes" and "dynamic" keys.
+    """
+    classes = []
+    for node in ast.parse(source, filename).body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = [__base_name(base) for base in node.bases]
+        methods = []
+        attributes = {}
+        dynamic = []
+        for item in node.body:
+            if not isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            methods.append(item.name)
+            if item.name == "__init__":
+                attributes, dynamic = __get_init_attributes(item)
+        classes.append({
+            "class_name": node.name,
+            "bases": [base for base in bases if base],
+            "abstract": "ABC" in bases,
+            "methods": methods,
+            "attributes": attributes,
+            "dynamic": dynamic
+        })
+    return classes
+
+
+def __base_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def __get_init_attributes(function: ast.FunctionDef) -> tuple:
+    """Literal values assigned to STATIC_ATTRIBUTES, and the attributes assigned something
+    else at least once.
+    """
+    attributes = {}
+    dynamic = []
+    for node in ast.walk(function):
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        for target in targets:
+            if (
+                isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name)
+                and target.value.id == "self" and target.attr in STATIC_ATTRIBUTES
+            ):
+                if target.attr in dynamic:
+                    continue
+                try:
+                    attributes[target.attr] = ast.literal_eval(value)
+                except (ValueError, TypeError, SyntaxError):
+                    logger.debug(f"Attribute {target.attr} is not a literal, it can't be discovered.")
+                    attributes.pop(target.attr, None)
+                    dynamic.append(target.attr)
+    return attributes, dynamic
+
+
+def __resolve(raw: dict, py_module: Path, classes: dict) -> DiscoveredClass:
+    """Follow the bases of a class until SanityCheck or SharedContext, merging the
+    attributes and methods of the bases.
+
+    Returns:
+        DiscoveredClass or None: None if it's not a valid check or context.
+    """
+    merged = __merge_bases(raw, py_module, classes, set())
+    if merged is None or raw["abstract"]:
+        return None
+    kind, attributes, methods, dynamic = merged
+    required_method = "_check" if kind == "check" else "_setup"
+    if required_method not in methods:
+        return None
+    return DiscoveredClass(
+        kind=kind,
+        class_name=raw["class_name"],
+        module=py_module,
+        name=attributes.get("name") or raw["class_name"],
+        description=attributes.get("description", ""),
+        priority=attributes.get("priority", 0),
+        shared_context=attributes.get("shared_context"),
+        dependencies_names=list(attributes.get("dependencies_names", [])),
+        dynamic=sorted(dynamic)
+    )
+
+
+def __merge_bases(raw: dict, py_module: Path, classes: dict, visiting: set) -> tuple:
+    key = (py_module, raw["class_name"])
+    if key in visiting:
+        return None
+    visiting.add(key)
+    for base in raw["bases"]:
+        if base in BASE_CLASSES:
+            return (
+                BASE_CLASSES[base], dict(raw["attributes"]), set(raw["methods"]), set(raw["dynamic"])
+            )
+        definitions = classes.get(base, [])
+        # Prefer a base defined in the same module
+        definitions = sorted(definitions, key=lambda each: each[0] != py_module)
+        for base_module, base_raw in definitions:
+            merged = __merge_bases(base_raw, base_module, classes, visiting)
+            if merged is not None:
+                kind, attributes, methods, dynamic = merged
+                # Attributes assigned in a subclass replace the ones of its bases
+                dynamic.difference_update(raw["attributes"])
+                for attribute in raw["dynamic"]:
+                    attributes.pop(attribute, None)
+                attributes.update(raw["attributes"])
+                dynamic.update(raw["dynamic"])
+                methods.update(raw["methods"])
+                return kind, attributes, methods, dynamic
+    return None
+
+
+def __get_module_entry(py_module: Path, entry: dict) -> dict:
+    """Get the manifest entry of a module, parsing it only if its contents changed."""
+    try:
+        stat = py_module.stat()
+    except OSError:
+        return {"mtime_ns": None, "size": None, "hash": None, "classes": []}
+    if entry is not None and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+        return entry
+    source = py_module.read_bytes()
+    content_hash = hashlib.sha1(source).hexdigest()
+    if entry is not None and entry["hash"] == content_hash:
+        return dict(entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    try:
+        classes = parse_module(source, str(py_module))
+    except (SyntaxError, ValueError):
+        exception_traceback = traceback.format_exc()
+        logger_gui.exception(f"Failed to parse module {py_module.name}\n{exception_traceback}")
+        classes = []
+    return {
+        "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "hash": content_hash, "classes": classes
+    }
+
+
+def __read_manifest(manifest_path: Path) -> dict:
+    try:
+        with manifest_path.open("r", encoding="utf-8") as manifest_file:
+            data = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("modules", {})
+
+
+def __write_manifest(manifest_path: Path, repo_path: Path, modules: dict):
+    data = {"version": MANIFEST_VERSION, "repo": str(repo_path), "modules": modules}
+    try:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = manifest_path.with_suffix(".tmp")
+        with temp_path.open("w", encoding="utf-8") as manifest_file:
+            json.dump(data, manifest_file)
+        temp_path.replace(manifest_path)
+    except OSError:
+        logger.warning(f"Couldn't save discovery manifest {manifest_path}")
+
+
+if __name__ == "__main__":
+    pass
@@ -205,7 +205,8 @@ class ChecksWidget(QtWidgets.QWidget):
         progress_interface = get_progress_interface()
         self.status_bar.start_progress_bar(progress_interface)
         try:
-            checks, contexts = sc.run_checks(checks=checks, contexts=contexts, try_fix=True)
+            # Status signals update the check widgets, they must be emitted from this thread
+            checks, contexts = sc.run_checks(checks=checks, contexts=contexts, try_fix=True, workers=1)
         except Exception:
             exception_traceback = traceback.format_exc()
             logger_gui.exception(
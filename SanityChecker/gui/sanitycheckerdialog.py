@@ -12,6 +12,7 @@ from pysideutils import (
 
 import sanitychecker as sc
 from sanitychecker.error import RepoError, ImplementationError
+from sanitychecker.checkrepo import reload_sanitycheck_repo
 from sanitychecker.gui.checkswidget import ChecksWidget
 from sanitychecker.logger import logger, logger_gui
 
@@ -141,9 +142,7 @@ class SanityChecker_GUI(QtWidgets.QDialog):
         self.status_bar.update(f"{self.TOOL_NICE_NAME} loaded!", eStatusType.success)
 
     def __set_connections(self):
-        self.checks_WIDGET.reload_BTN.clicked.connect(
-            lambda: self.load_repos(self.repos)
-        )
+        self.checks_WIDGET.reload_BTN.clicked.connect(self.reload_repos)
         self.run_checks_BTN.clicked.connect(self.checks_WIDGET.run_all)
         self.run_checks_BTN.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.run_checks_BTN.rightClick.connect(self.run_checks_options)
@@ -182,6 +181,8 @@ class SanityChecker_GUI(QtWidgets.QDialog):
         try:
             sc.CHECKS_REGISTRY.clear_registry()
             sc.SHARED_CONTEXTS_REGISTRY.clear_registry()
+            # Widgets need live instances, so every module is imported here. Building the
+            # list from discovery.discover_repo() is a follow-up, see discovery.py
             for repo_path in self.repos:
                 sc.load_sanitycheck_repo(Path(repo_path))
             self.checks_WIDGET.reset_widgets()
@@ -193,6 +194,22 @@ class SanityChecker_GUI(QtWidgets.QDialog):
                 eStatusType.warning,
             )
 
+    def reload_repos(self):
+        """Reload only the modules that changed in the current repos."""
+        try:
+            changed = []
+            for repo_path in self.repos:
+                changed.extend(reload_sanitycheck_repo(Path(repo_path))[2])
+            if changed:
+                self.checks_WIDGET.reset_widgets()
+                self.checks_WIDGET.expand_all()
+            self.checks_WIDGET.presets_WIDGET.load_presets_gui(self.repos)
+        except (RepoError, ImplementationError):
+            self.status_bar.update(
+                "Failed to reload repos! Please check log for more info.",
+                eStatusType.warning,
+            )
+
     def run_checks_options(self, pos):
         menu = QtWidgets.QMenu(self.run_checks_BTN)
         actions_label = QtWidgets.QLabel("<b>Actions</b>")
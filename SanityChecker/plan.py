@@ -0,0 +1,248 @@
+import heapq
+import itertools
+
+from sanitychecker.status import CheckStatus
+
+
+class ExecutionPlan:
+    """Checks sorted so every check comes after its dependencies, compiled once from the
+    dependencies_instances of the checks. Tools can inspect the order, the reference cycles
+    and the critical path before running anything.
+
+    Checks that are part of a dependency cycle, or depend on one, can never run. They are
+    left out of the order and listed in blocked.
+
+    Args:
+        checks (list, optional): SanityCheck instances. Their dependencies are added too.
+
+        include_passed (bool, optional): Add dependencies that already passed and their own
+        dependencies. Given checks are always added, with their edges, even if they already
+        passed. Defaults to True.
+    """
+    def __init__(self, checks: list = None, include_passed: bool = True):
+        self.__order = []
+        self.__in_order = set()
+        self.__blocked = []
+        self.__cycles = []
+        self.__dependencies = {}  # check: [dependency checks in plan]
+        self.__dependents = {}    # check: [dependent checks in plan]
+        self.__missing = {}       # check: [dependency names without instance]
+        if checks:
+            self.compile(checks, include_passed)
+
+    def compile(self, checks: list, include_passed: bool = True):
+        """Compile the plan again for given checks, replacing the previous one.
+
+        Args:
+            checks (list): SanityCheck instances. Their dependencies are added too.
+
+            include_passed (bool, optional): Add dependencies that already passed and their
+            own dependencies. Given checks are always added, with their edges, even if they
+            already passed. Defaults to True.
+        """
+        selected = set(checks)
+        self.__dependencies = {}
+        self.__dependents = {}
+        self.__missing = {}
+        stack = list(reversed(checks))
+        while stack:
+            check = stack.pop()
+            if check in self.__dependencies:
+                continue
+            self.__dependencies[check] = []
+            self.__dependents.setdefault(check, [])
+            for dependency in check.dependencies_instances:
+                if (
+                    not include_passed and dependency not in selected
+                    and dependency.status.code == CheckStatus.passed
+                ):
+                    continue
+                self.__dependencies[check].append(dependency)
+                self.__dependents.setdefault(dependency, []).append(check)
+                stack.append(dependency)
+            linked = set(dependency.name for dependency in check.dependencies_instances)
+            missing = [name for name in check.dependencies_names if name not in linked]
+            if missing:
+                self.__missing[check] = missing
+        self.__sort()
+
+    def __sort(self):
+        # Kahn's algorithm, highest priority first among checks that are ready
+        counter = itertools.count()
+        pending = {check: len(dependencies) for check, dependencies in self.__dependencies.items()}
+        ready = []
+        for check, count in pending.items():
+            if count == 0:
+                heapq.heappush(ready, (-check.priority, next(counter), check))
+        self.__order = []
+        while ready:
+            check = heapq.heappop(ready)[-1]
+            self.__order.append(check)
+            for dependent in self.__dependents[check]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, (-dependent.priority, next(counter), dependent))
+        self.__in_order = set(self.__order)
+        self.__blocked = [check for check in self.__dependencies if check not in self.__in_order]
+        self.__cycles = self.__find_cycles(self.__blocked)
+
+    def __find_cycles(self, checks: list) -> list:
+        """Strongly connected components with more than one check, or a check depending on
+        itself, among given checks. Iterative Tarjan's algorithm.
+        """
+        candidates = set(checks)
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        cycles = []
+        counter = itertools.count()
+        for root in checks:
+            if root in index:
+                continue
+            work = [(root, iter(self.__dependencies[root]))]
+            index[root] = lowlink[root] = next(counter)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                check, dependencies = work[-1]
+                dependency = next(dependencies, None)
+                if dependency is not None:
+                    if dependency not in candidates:
+                        continue
+                    if dependency not in index:
+                        index[dependency] = lowlink[dependency] = next(counter)
+                        stack.append(dependency)
+                        on_stack.add(dependency)
+                        work.append((dependency, iter(self.__dependencies[dependency])))
+                    elif dependency in on_stack:
+                        lowlink[check] = min(lowlink[check], index[dependency])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[check])
+                if lowlink[check] == index[check]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member is check:
+                            break
+                    if len(component) > 1 or check in self.__dependencies[check]:
+                        cycles.append(list(reversed(component)))
+        return cycles
+
+    def dependencies(self, check) -> list:
+        """
+        Args:
+            check (SanityCheck): Check in the plan.
+
+        Returns:
+            list: Checks in the plan given check depends on.
+        """
+        return self.__dependencies.get(check, [])
+
+    def dependents(self, check) -> list:
+        """
+        Args:
+            check (SanityCheck): Check in the plan.
+
+        Returns:
+            list: Checks in the plan depending on given check.
+        """
+        return self.__dependents.get(check, [])
+
+    def is_blocked(self, check) -> bool:
+        """
+        Args:
+            check (SanityCheck): Check in the plan.
+
+        Returns:
+            bool: True if the check is part of a cycle or depends on one.
+        """
+        return check in self.__dependencies and check not in self.__in_order
+
+    def levels(self) -> list:
+        """Group the checks by how many dependencies have to run before them. All checks of
+        a level can run at the same time once previous levels have finished.
+
+        Returns:
+            list: Lists of checks, one per level.
+        """
+        depth = {}
+        levels = []
+        for check in self.__order:
+            level = max([depth[dependency] + 1 for dependency in self.__dependencies[check]] or [0])
+            depth[check] = level
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(check)
+        return levels
+
+    def critical_path(self, cost=None) -> list:
+        """Get the longest chain of dependencies, the one limiting how fast the plan can run
+        no matter how many checks run at the same time.
+
+        Args:
+            cost (callable, optional): Called with each check, returns its expected cost,
+            e.g.: seconds it took last time. Defaults to None, every check costs 1.
+
+        Returns:
+            list: Checks of the chain, dependencies first.
+        """
+        total = {}
+        previous = {}
+        for check in self.__order:
+            check_cost = cost(check) if cost else 1
+            best = None
+            for dependency in self.__dependencies[check]:
+                if best is None or total[dependency] > total[best]:
+                    best = dependency
+            total[check] = check_cost + (total[best] if best is not None else 0)
+            previous[check] = best
+        if not total:
+            return []
+        check = max(self.__order, key=lambda each: total[each])
+        path = []
+        while check is not None:
+            path.append(check)
+            check = previous[check]
+        return list(reversed(path))
+
+    @property
+    def order(self) -> list:
+        """Checks that can run, every check after its dependencies."""
+        return self.__order
+
+    @property
+    def blocked(self) -> list:
+        """Checks that can't run because they are part of a cycle or depend on one."""
+        return self.__blocked
+
+    @property
+    def cycles(self) -> list:
+        """Lists of checks depending on each other in a cycle."""
+        return self.__cycles
+
+    @property
+    def missing(self) -> dict:
+        """{check: [names]} Dependency names that were not linked to any check."""
+        return self.__missing
+
+    def __len__(self):
+        return len(self.__dependencies)
+
+    def __iter__(self):
+        return iter(self.__order)
+
+    def __contains__(self, check):
+        return check in self.__dependencies
+
+    def __repr__(self):
+        return f"ExecutionPlan({[check.name for check in self.__order]})"
+
+
+if __name__ == "__main__":
+    pass
@@ -3,9 +3,155 @@ from pprint import pprint
 from pathlib import Path
 
 from sanitychecker.sanitycheck import SanityCheck, SharedContext
+from sanitychecker.logger import logger
 
 
-class ChecksRegistry:
+class _IndexedRegistry:
+    """Storage shared by the registries. Besides the repo_path: {py_module: [items]} structure
+    it keeps indexes by name and by repo and name, updated on every change, so lookups
+    don't go through every item. Duplicated names are reported as they are added.
+    """
+    KIND = "item"
+
+    def __init__(self):
+        self.__items = {}
+        self.__by_name = {}       # name: [items]
+        self.__by_repo_name = {}  # (repo_path, name): [items]
+        self.__all = None         # Flat list of every item, built on demand. Changes replace it
+
+    def _get_items(self) -> dict:
+        return self.__items
+
+    def _get(self, name: str, repo_path: Path = None):
+        if repo_path:
+            items = self.__by_repo_name.get((repo_path, name))
+        else:
+            items = self.__by_name.get(name)
+        return items[0] if items else None
+
+    def _get_by_name(self, name: str) -> list:
+        return list(self.__by_name.get(name, []))
+
+    def _get_all(self) -> list:
+        return list(self.__get_all())
+
+    def _get_by_repo(self, repo_path: Path) -> list:
+        result = []
+        for py_module, items in self.__items.get(repo_path, {}).items():
+            result.extend(items)
+        return result
+
+    def _get_by_module(self, py_module: str, repo_path: Path) -> list:
+        return list(self.__items.get(repo_path, {}).get(py_module, []))
+
+    def _add(self, item, py_module: str, repo_path: Path):
+        self.__items.setdefault(repo_path, {}).setdefault(py_module, []).append(item)
+        self.__index(item, repo_path)
+        self.__all = None
+
+    def _extend(self, items: list, py_module: str, repo_path: Path):
+        repo_data = self.__items.setdefault(repo_path, {})
+        for item in repo_data.get(py_module, []):
+            self.__unindex(item, repo_path)
+        repo_data[py_module] = list(items)
+        for item in items:
+            self.__index(item, repo_path)
+        self.__all = None
+
+    def _remove(self, item, repo_path: Path):
+        for py_module, items in self.__items.get(repo_path, {}).items():
+            if item in items:
+                items.remove(item)
+                self.__unindex(item, repo_path)
+                self.__all = None
+                return
+
+    def _remove_module(self, py_module: str, repo_path: Path):
+        for item in self.__items.get(repo_path, {}).pop(py_module, []):
+            self.__unindex(item, repo_path)
+        self.__all = None
+
+    def _clear(self):
+        self.__items.clear()
+        self.__by_name.clear()
+        self.__by_repo_name.clear()
+        self.__all = None
+
+    def _set_items(self, items: dict):
+        self._clear()
+        self.__items = items
+        for repo_path, repo_data in items.items():
+            for py_module, module_items in repo_data.items():
+                for item in module_items:
+                    self.__index(item, repo_path)
+
+    def duplicates(self, repo_path: Path = None) -> dict:
+        """Get the names used by more than one registered item.
+
+        Args:
+            repo_path (Path, optional): Only look for duplicates in this repo. Defaults to None,
+            duplicates in any repo or across repos.
+
+        Returns:
+            dict: {name: [items]}
+        """
+        if repo_path:
+            return {
+                name: list(items) for (repo, name), items in self.__by_repo_name.items()
+                if repo == repo_path and len(items) > 1
+            }
+        return {name: list(items) for name, items in self.__by_name.items() if len(items) > 1}
+
+    def __get_all(self) -> list:
+        # Never modified once built, so it can be iterated while items are added or removed
+        if self.__all is None:
+            all_items = []
+            for repo_path, repo_data in self.__items.items():
+                for py_module, items in repo_data.items():
+                    all_items.extend(items)
+            self.__all = all_items
+        return self.__all
+
+    def __index(self, item, repo_path: Path):
+        same_repo = self.__by_repo_name.setdefault((repo_path, item.name), [])
+        if same_repo:
+            logger.warning(
+                f"Duplicated {self.KIND} name '{item.name}' in repo {repo_path}. "
+                f"Only the first one will be found by name."
+            )
+        same_repo.append(item)
+        self.__by_name.setdefault(item.name, []).append(item)
+
+    def __unindex(self, item, repo_path: Path):
+        for index, key in ((self.__by_repo_name, (repo_path, item.name)), (self.__by_name, item.name)):
+            items = index.get(key)
+            if items is None:
+                continue
+            for position, each in enumerate(items):
+                if each is item:
+                    del items[position]
+                    break
+            if not items:
+                del index[key]
+
+    def __str__(self):
+        placeholder = StringIO()
+        pprint(self.__items, stream=placeholder, compact=True)
+        result = placeholder.getvalue()
+        placeholder.close()
+        return result
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __len__(self):
+        return len(self.__get_all())
+
+    def __iter__(self):
+        return iter(self.__get_all())
+
+
+class ChecksRegistry(_IndexedRegistry):
     """SanityCheck registry holds all SanityCheck instances that have been generated.
     This is implemented to aid in reloading all repos and checks without having to restart the application.
 
@@ -15,9 +161,9 @@ class ChecksRegistry:
         py_module: [SanityCheck1, SanityCheck2]
     }
 
+    Checks are also indexed by name, so getting a check doesn't depend on the number of checks.
     """
-    def __init__(self):
-        self.__checks = {}
+    KIND = "check"
 
     def get_check(self, check_name: str, repo_path: Path = None):
         """Get a SanityCheck instance by name and repo.
@@ -31,17 +177,18 @@ class ChecksRegistry:
         Returns:
             SanityCheck or None: SanityCheck instance if found, None otherwise.
         """
-        if not repo_path:
-            repo_checks = self.get_all_checks()
-            for check in repo_checks:
-                if check.name == check_name:
-                    return check
-        elif repo_path in self.__checks:
-            repo_checks = self.get_checks_by_repo(repo_path)
-            for check in repo_checks:
-                if check.name == check_name:
-                    return check
-        return None
+        return self._get(check_name, repo_path)
+
+    def get_checks_by_name(self, check_name: str):
+        """Get all checks with a name, from any repo.
+
+        Args:
+            check_name (str): SanityCheck name
+
+        Returns:
+            list: List of SanityCheck instances, in the order they were registered.
+        """
+        return self._get_by_name(check_name)
 
     def get_all_checks(self):
         """Get all registered checks
@@ -49,11 +196,7 @@ class ChecksRegistry:
         Returns:
             list: List of SanityCheck instances.
         """
-        all_checks = []
-        for repo_path, repo_data in self.__checks.items():
-            for py_module, checks in repo_data.items():
-                all_checks.extend(checks)
-        return all_checks
+        return self._get_all()
 
     def get_checks_by_repo(self, repo_path: Path):
         """Get all checks of a particular repo.
@@ -64,10 +207,20 @@ class ChecksRegistry:
         Returns:
             list: List of SanityCheck instances.
         """
-        result = []
-        for py_module, checks in self.__checks.get(repo_path, {}).items():
-            result.extend(checks)
-        return result
+        return self._get_by_repo(repo_path)
+
+    def get_checks_by_module(self, py_module: str, repo_path: Path):
+        """Get all checks defined in a module of a repo.
+
+        Args:
+            py_module (str): Python module name where the SanityCheck instances are defined.
+
+            repo_path (Path): Repository path where py_module is located.
+
+        Returns:
+            list: List of SanityCheck instances.
+        """
+        return self._get_by_module(py_module, repo_path)
 
     def add_check(self, check: SanityCheck, py_module: str, repo_path: Path):
         """Add check to register
@@ -79,9 +232,7 @@ class ChecksRegistry:
 
             repo_path (Path): Repository path where py_module is located.
         """
-        checks = self.__checks.get(repo_path, {})
-        checks[py_module] = check
-        self.__checks[repo_path] = checks
+        self._add(check, py_module, repo_path)
 
     def extend_checks(self, checks: list, py_module: str, repo_path: Path):
         """Extend checks of a particular repo.
@@ -93,9 +244,7 @@ class ChecksRegistry:
 
             repo_path (Path): Repository path where py_module is located.
         """
-        repo_data = self.__checks.get(repo_path, {})
-        repo_data[py_module] = checks
-        self.__checks[repo_path] = repo_data
+        self._extend(checks, py_module, repo_path)
 
     def remove_check(self, check: SanityCheck, repo_path: Path):
         """Remove a particular check from a repo in the register.
@@ -104,42 +253,33 @@ class ChecksRegistry:
             check (SanityCheck): Sanity check instance to remove.
             repo_path (Path): Repository path where the SanityCheck instance is located.
         """
-        checks = self.__checks.get(repo_path, [])
-        if check in checks:
-            checks.remove(check)
-            self.__checks[repo_path] = checks
+        self._remove(check, repo_path)
+
+    def remove_module(self, py_module: str, repo_path: Path):
+        """Remove all checks defined in a module, e.g.: when the module is deleted.
+
+        Args:
+            py_module (str): Python module name where the SanityCheck instances are defined.
+
+            repo_path (Path): Repository path where py_module is located.
+        """
+        self._remove_module(py_module, repo_path)
 
     def clear_registry(self):
         """Clear the registry, useful for reloading all repos.
         """
-        self.__checks.clear()
+        self._clear()
 
     @property
     def checks(self):
-        return self.__checks
+        return self._get_items()
 
     @checks.setter
     def checks(self, checks: dict):
-        self.__checks = checks
-
-    def __str__(self):
-        placeholder = StringIO()
-        pprint(self.__checks, stream=placeholder, compact=True)
-        result = placeholder.getvalue()
-        placeholder.close()
-        return result
-
-    def __repr__(self):
-        return self.__str__()
-
-    def __len__(self):
-        return len(self.get_all_checks())
-
-    def __iter__(self):
-        return iter(self.get_all_checks())
+        self._set_items(checks)
 
 
-class SharedContextsRegistry:
+class SharedContextsRegistry(_IndexedRegistry):
     """SharedContexts registry holds all SharedContext instances that have been generated.
     This is implemented to aid in reloading all repos and SharedContexts
     without having to restart the application.
@@ -150,9 +290,10 @@ class SharedContextsRegistry:
         py_module: [SharedContext1, SharedContext2]
     }
 
+    SharedContexts are also indexed by name, so getting a context doesn't depend on the number
+    of contexts.
     """
-    def __init__(self):
-        self.__contexts = {}
+    KIND = "shared context"
 
     def get_context(self, context_name: str, repo_path: Path = None):
         """Get a SharedContext instance by name and repo.
@@ -167,17 +308,7 @@ class SharedContextsRegistry:
         Returns:
             SharedContext or None: SharedContext instance if found, None otherwise.
         """
-        if not repo_path:
-            repo_contexts = self.get_all_contexts()
-            for context in repo_contexts:
-                if context.name == context_name:
-                    return context
-        elif repo_path in list(self.__contexts.keys()):
-            repo_context = self.get_contexts_by_repo(repo_path)
-            for context in repo_context:
-                if context.name == context_name:
-                    return context
-        return None
+        return self._get(context_name, repo_path)
 
     def get_all_contexts(self):
         """Get all registered contexts
@@ -185,11 +316,7 @@ class SharedContextsRegistry:
         Returns:
             list: List of SharedContext instances.
         """
-        all_contexts = []
-        for repo_path, repo_data in self.__contexts.items():
-            for py_module, contexts in repo_data.items():
-                all_contexts.extend(contexts)
-        return all_contexts
+        return self._get_all()
 
     def get_contexts_by_repo(self, repo_path: Path):
         """Get all contexts of a particular repo.
@@ -200,12 +327,21 @@ class SharedContextsRegistry:
         Returns:
             list: List of SharedContext instances.
         """
-        result = []
-        for py_module, contexts in self.__contexts.get(repo_path, {}).items():
-            result.extend(contexts)
-        return result
+        return self._get_by_repo(repo_path)
 
-    def add_context(self, context: SanityCheck, py_module: str, repo_path: Path):
+    def get_contexts_by_module(self, py_module: str, repo_path: Path):
+        """Get all contexts defined in a module of a repo.
+
+        Args:
+            py_module (str): Python module name where the SharedContext instances are defined.
+            repo_path (Path): Repository path where py_module is located.
+
+        Returns:
+            list: List of SharedContext instances.
+        """
+        return self._get_by_module(py_module, repo_path)
+
+    def add_context(self, context: SharedContext, py_module: str, repo_path: Path):
         """Add SharedContext to register
 
         Args:
@@ -213,9 +349,7 @@ class SharedContextsRegistry:
             py_module (str): Python module name where the SharedContext instance is defined.
             repo_path (Path): Repository path where py_module is located.
         """
-        contexts = self.__contexts.get(repo_path, {})
-        contexts[py_module] = context
-        self.__contexts[repo_path] = contexts
+        self._add(context, py_module, repo_path)
 
     def extend_contexts(self, contexts: list, py_module: str, repo_path: Path):
         """Extend SharedContexts of a particular repo.
@@ -225,9 +359,7 @@ class SharedContextsRegistry:
             py_module (str): Python module name where the SharedContext instances are defined.
             repo_path (Path): Repository path where py_module is located.
         """
-        repo_data = self.__contexts.get(repo_path, {})
-        repo_data[py_module] = contexts
-        self.__contexts[repo_path] = repo_data
+        self._extend(contexts, py_module, repo_path)
 
     def remove_context(self, context: SharedContext, repo_path: Path):
         """Remove a particular SharedContext from a repo in the register.
@@ -236,36 +368,26 @@ class SharedContextsRegistry:
             check (SharedContext): SharedContext instance to remove.
             repo_path (Path): Repository path where the SharedContext instance is located.
         """
-        contexts = self.__contexts.get(repo_path, [])
-        if contexts in contexts:
-            contexts.remove(context)
-            self.__contexts[repo_path] = contexts
+        self._remove(context, repo_path)
+
+    def remove_module(self, py_module: str, repo_path: Path):
+        """Remove all SharedContexts defined in a module, e.g.: when the module is deleted.
+
+        Args:
+            py_module (str): Python module name where the SharedContext instances are defined.
+            repo_path (Path): Repository path where py_module is located.
+        """
+        self._remove_module(py_module, repo_path)
 
     def clear_registry(self):
         """Clear the registry, useful for reloading all repos.
         """
-        self.__contexts.clear()
+        self._clear()
 
     @property
     def contexts(self):
-        return self.__contexts
+        return self._get_items()
 
     @contexts.setter
     def contexts(self, contexts: dict):
-        self.__contexts = contexts
-
-    def __str__(self):
-        placeholder = StringIO()
-        pprint(self.__contexts, stream=placeholder, compact=True)
-        result = placeholder.getvalue()
-        placeholder.close()
-        return result
-
-    def __repr__(self):
-        return self.__str__()
-
-    def __len__(self):
-        return len(self.get_all_contexts())
-
-    def __iter__(self):
-        return iter(self.get_all_contexts())
+        self._set_items(contexts)
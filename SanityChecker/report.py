@@ -0,0 +1,105 @@
+import json
+from xml.etree import ElementTree
+
+from sanitychecker.status import CheckStatus
+from sanitychecker.logger import logger
+
+
+class JsonReporter:
+    """Writes a JSON line for each check as soon as it finishes, and a summary at the end."""
+    def __init__(self, output):
+        self.__output = output
+
+    def check_finished(self, check, seconds: float):
+        self.__output.write(json.dumps(check_result(check, seconds)))
+        self.__output.write("\n")
+        self.__output.flush()
+
+    def finish(self, results: list, seconds: float):
+        self.__output.write(json.dumps({"summary": summarize(results), "seconds": seconds}))
+        self.__output.write("\n")
+        self.__output.flush()
+
+
+class JUnitReporter:
+    """Writes a JUnit XML report when the run finishes. Checks that didn't pass are failures,
+    checks that raised exceptions are errors and cancelled checks are skipped.
+    """
+    def __init__(self, output, suite_name: str):
+        self.__output = output
+        self.__suite_name = suite_name
+
+    def check_finished(self, check, seconds: float):
+        logger.info(f"{check.name}: {check.status.status_as_string()}")
+
+    def finish(self, results: list, seconds: float):
+        summary = summarize(results)
+        suite = ElementTree.Element("testsuite", {
+            "name": self.__suite_name,
+            "tests": str(len(results)),
+            "failures": str(summary["not_passed"]),
+            "errors": str(summary["failed"]),
+            "skipped": str(summary["cancelled"] + summary["not_ran"]),
+            "time": f"{seconds:.3f}"
+        })
+        for result in results:
+            testcase = ElementTree.SubElement(suite, "testcase", {
+                "name": result["name"],
+                "classname": result["class"],
+                "time": f"{result['seconds']:.3f}"
+            })
+            status = result["status"]
+            if status == "not_passed":
+                ElementTree.SubElement(testcase, "failure", {"message": result["message"]})
+            elif status == "failed":
+                ElementTree.SubElement(testcase, "error", {"message": result["message"]})
+            elif status in ("cancelled", "not_ran"):
+                ElementTree.SubElement(testcase, "skipped", {"message": result["message"]})
+        testsuites = ElementTree.Element("testsuites")
+        testsuites.append(suite)
+        self.__output.write(ElementTree.tostring(testsuites, encoding="unicode"))
+        self.__output.write("\n")
+        self.__output.flush()
+
+
+def check_result(check, seconds: float) -> dict:
+    """
+    Args:
+        check (SanityCheck): Check that has finished.
+        seconds (float): Seconds it took.
+
+    Returns:
+        dict: {"name", "class", "status", "message", "seconds"}
+    """
+    check_class = type(check)
+    return {
+        "name": check.name,
+        "class": f"{check_class.__module__}.{check_class.__qualname__}",
+        "status": check.status.status_as_string(),
+        "message": check.status.message,
+        "seconds": round(seconds, 6)
+    }
+
+
+def summarize(results: list) -> dict:
+    """
+    Args:
+        results (list): Dictionaries returned by check_result().
+
+    Returns:
+        dict: {status: number of checks}
+    """
+    summary = {
+        CheckStatus(code).status_as_string(): 0
+        for code in (
+            CheckStatus.passed, CheckStatus.not_passed, CheckStatus.failed,
+            CheckStatus.cancelled, CheckStatus.not_ran
+        )
+    }
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return summary
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,178 @@
+import json
+import time
+import inspect
+import hashlib
+import threading
+import traceback
+from pathlib import Path
+
+from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.checkrepo import get_class_module
+from sanitychecker.status import CheckStatus
+from sanitychecker.logger import logger, logger_gui
+
+
+DEFAULT_CACHE_PATH = Path.home() / ".sanitychecker" / "results_cache.json"
+
+
+class ResultCache:
+    """Persistent cache of the checks that passed, so they are not run again while their
+    inputs and code don't change. Only checks implementing fingerprint() are cached.
+
+    Each check class keeps a single entry with the code version and the fingerprint
+    it passed with. Code version is a hash of the module the check class is defined in.
+
+    Args:
+        path (Path, optional): JSON file where the cache is saved.
+        Defaults to DEFAULT_CACHE_PATH in the user's home.
+    """
+    def __init__(self, path: Path = None):
+        self.__path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.__entries = {}
+        self.__code_versions = {}  # module file: (mtime, hash)
+        self.__lock = threading.Lock()
+        self.__changed = False
+        self.load()
+
+    def get(self, check: SanityCheck, key: tuple = None) -> CheckStatus:
+        """Get the status of a check from a previous run if its inputs didn't change.
+
+        Args:
+            check (SanityCheck): Check to look up.
+
+            key (tuple, optional): Key of the check from key(). Defaults to None, computed now.
+
+        Returns:
+            CheckStatus or None: Passed CheckStatus if cached, None otherwise.
+        """
+        key = key or self.key(check)
+        if key is None:
+            return None
+        class_key, code_version, fingerprint = key
+        with self.__lock:
+            entry = self.__entries.get(class_key)
+        if entry is None or entry["code_version"] != code_version or entry["fingerprint"] != fingerprint:
+            return None
+        return CheckStatus(CheckStatus.passed, entry["message"])
+
+    def store(self, check: SanityCheck, key: tuple = None):
+        """Store a check that passed. Checks that didn't pass remove their entry, so they
+        run next time.
+
+        Args:
+            check (SanityCheck): Check that has been run.
+
+            key (tuple, optional): Key of the check from key(), describing the inputs its
+            status belongs to, e.g.: computed before it ran, or after its fix ran.
+            Defaults to None, computed now.
+        """
+        key = key or self.key(check)
+        if key is None:
+            return
+        class_key, code_version, fingerprint = key
+        with self.__lock:
+            if check.status.code == CheckStatus.passed:
+                self.__entries[class_key] = {
+                    "code_version": code_version,
+                    "fingerprint": fingerprint,
+                    "message": check.status.message,
+                    "time": time.time()
+                }
+                self.__changed = True
+            elif self.__entries.pop(class_key, None) is not None:
+                self.__changed = True
+
+    def key(self, check: SanityCheck) -> tuple:
+        """
+        Args:
+            check (SanityCheck): Check to get the key of.
+
+        Returns:
+            tuple or None: (check class, code version, fingerprint) hashes. None if the check
+            doesn't implement fingerprint() or it can't be computed.
+        """
+        if not check.has_fingerprint():
+            return None
+        try:
+            fingerprint = check.fingerprint()
+        except Exception:
+            exception_traceback = traceback.format_exc()
+            logger_gui.exception(
+                f"EXCEPTION: Unhandled exception raised running {check.name}.fingerprint()\n{exception_traceback}"
+            )
+            return None
+        if fingerprint is None:
+            return None
+        code_version = self.__code_version(type(check))
+        if code_version is None:
+            return None
+        check_class = type(check)
+        class_key = f"{check_class.__module__}.{check_class.__qualname__}:{check.name}"
+        encoded = json.dumps(fingerprint, sort_keys=True, default=str).encode("utf-8")
+        return class_key, code_version, hashlib.sha1(encoded).hexdigest()
+
+    def load(self):
+        """Load the cache file, starting empty if it doesn't exist or can't be read."""
+        with self.__lock:
+            self.__entries = {}
+            self.__changed = False
+            if not self.__path.exists():
+                return
+            try:
+                with self.__path.open("r", encoding="utf-8") as cache_file:
+                    self.__entries = json.load(cache_file)
+            except (OSError, ValueError):
+                logger.debug(f"Couldn't read results cache {self.__path}, starting empty.")
+
+    def save(self):
+        """Save the cache file if anything changed since it was loaded or saved."""
+        with self.__lock:
+            if not self.__changed:
+                return
+            try:
+                self.__path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = self.__path.with_suffix(".tmp")
+                with temp_path.open("w", encoding="utf-8") as cache_file:
+                    json.dump(self.__entries, cache_file)
+                temp_path.replace(self.__path)
+                self.__changed = False
+            except OSError:
+                exception_traceback = traceback.format_exc()
+                logger.warning(f"Couldn't save results cache {self.__path}\n{exception_traceback}")
+
+    def clear(self):
+        """Remove all entries, every check will run next time."""
+        with self.__lock:
+            self.__entries.clear()
+            self.__changed = True
+
+    def __code_version(self, check_class) -> str:
+        try:
+            # inspect.getfile() goes through sys.modules, where repo modules are only
+            # registered by file name
+            module_file = get_class_module(check_class) or Path(inspect.getfile(check_class))
+            mtime = module_file.stat().st_mtime_ns
+        except (TypeError, OSError):
+            return None
+        with self.__lock:
+            cached = self.__code_versions.get(module_file)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            code_version = hashlib.sha1(module_file.read_bytes()).hexdigest()
+        except OSError:
+            return None
+        with self.__lock:
+            self.__code_versions[module_file] = (mtime, code_version)
+        return code_version
+
+    @property
+    def path(self) -> Path:
+        return self.__path
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+if __name__ == "__main__":
+    pass
@@ -6,74 +6,54 @@ from sanitychecker.checkrepo import (
 )
 from pysideutils import ProgressInterface
 from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.scheduler import CheckScheduler
+from sanitychecker.resultcache import ResultCache
 from sanitychecker.logger import logger
 
 
 __progress_interface = ProgressInterface()
 
 
-def run_checks_from_repo(repo_path: Path, try_fix: bool = True) -> list:
+def run_checks_from_repo(repo_path: Path, try_fix: bool = True, workers: int = 1) -> list:
     """Run all checks from a repo (a directory containing modules with classes that implement SanityCheck)
 
     Args:
         repo_path (Path): Path object to the repo directory.
         try_fix (bool, optional): Try to fix if a fix has been implemented. Defaults to True.
+        workers (int, optional): Number of threads running independent checks. Defaults to 1.
 
     Returns:
         tuple: [0]List of SanityCheck instances that have been run.
         [1]List of SharedContext instances that have been run.
     """
     checks, contexts = load_sanitycheck_repo(repo_path)
-    return run_checks(checks, contexts, try_fix)
+    return run_checks(checks, contexts, try_fix, workers)
 
 
-def run_checks(checks: list = [], contexts: list = [], try_fix: bool = True) -> list:
-    """Run all given checks.
+def run_checks(
+    checks: list = [], contexts: list = [], try_fix: bool = True, workers: int = 1,
+    cache: ResultCache = None
+) -> list:
+    """Run all given checks. Checks only wait for their dependencies and shared contexts,
+    see CheckScheduler.
 
     Args:
         checks (list): SanityCheck instances to run.
         contexts (list, optional): SharedContext instances to run.
         try_fix (bool, optional): Try to fix if a fix has been implemented. Defaults to True.
+        workers (int, optional): Number of threads running independent checks concurrently.
+        Defaults to 1, which runs every check in the calling thread. Status signals are
+        emitted from the threads running the checks, so GUIs must keep 1.
+        cache (ResultCache, optional): Skip checks that passed before with the same inputs,
+        see SanityCheck.fingerprint(). Defaults to None.
 
     Returns:
         tuple: [0]List of SanityCheck instances that have been run.
         [1]List of SharedContext instances that have been run.
     """
-    # Run all contexts first
-    logger.debug("Running all shared contexts and their checks.")
-    checks_runned_by_contexts = []
-
-    __progress_interface.reset_progress()
-    if len(contexts):
-        __progress_interface.maximum = len(contexts)
-    for context in contexts:
-        context.run_full_context()
-        checks_runned_by_contexts.extend(context.checks)
-        __progress_interface.add_progress()
-
-    # Skip checks that have dependencies and run them later
-    checks_with_dependencies = []
-    logger.debug("Running checks without dependencies or contexts.")
-    __progress_interface.reset_progress()
-    if len(checks):
-        __progress_interface.maximum = len(checks)
-    for check in checks:
-        if check not in checks_runned_by_contexts:
-            if not check.has_dependencies():
-                check.run_full_check(try_fix)
-            else:
-                checks_with_dependencies.append(check)
-        __progress_interface.add_progress()
-
-    logger.debug("Running checks with dependencies and no context.")
-    __progress_interface.reset_progress()
-    if len(checks_with_dependencies):
-        __progress_interface.maximum = len(checks_with_dependencies)
-    for check in checks_with_dependencies:
-        if check not in checks_runned_by_contexts:
-            check.run_full_check(try_fix, run_dependencies_first=True)
-        __progress_interface.add_progress()
-
+    logger.debug(f"Running {len(checks)} checks and {len(contexts)} shared contexts.")
+    scheduler = CheckScheduler(checks, contexts, try_fix, workers, __progress_interface, cache)
+    scheduler.run()
     return checks, contexts
 
 
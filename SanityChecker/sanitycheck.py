@@ -1,8 +1,25 @@
 import abc
 import traceback
-from pysideutils.progress import ProgressInterface
+try:
+    from pysideutils.progress import ProgressInterface
+except ImportError:
+    # Headless runs, e.g.: python -m sanitychecker, don't need PySide. Checks can still
+    # report progress, it's just not shown anywhere
+    class ProgressInterface:
+        """Stand-in for pysideutils ProgressInterface when it can't be imported."""
+        def __init__(self):
+            self.maximum = 0
+            self.value = 0
+            self.guiwidget = None
+
+        def reset_progress(self):
+            self.value = 0
+
+        def add_progress(self, value: int = 1):
+            self.value += value
 
 from sanitychecker.status import CheckStatus, ContextStatus
+from sanitychecker.plan import ExecutionPlan
 from sanitychecker.error import ImplementationError
 from sanitychecker.logger import logger, logger_gui
 
@@ -12,6 +29,8 @@ class SanityCheck(abc.ABC):
     NAME_CHAR_LIMIT = 50
     PRIORITY_MIN = 0
     PRIORITY_MAX = 100
+    # Set to True in checks that must run in the main thread, e.g.: calling DCC APIs
+    MAIN_THREAD_ONLY = False
 
     def __init__(self):
         """Base class for all checks."""
@@ -23,7 +42,10 @@ class SanityCheck(abc.ABC):
         self.__dependencies_names = []
         self.__shared_context = None
         self.__actions = []
+        self.__fix_ran = False
         self.progress = ProgressInterface()
+        # What is being checked, e.g.: a scene file or asset directory. Set by batch runs
+        self.target = None
 
     @abc.abstractmethod
     def _check(self):
@@ -62,6 +84,17 @@ class SanityCheck(abc.ABC):
             f"No _teardown() method implemented for this check {self.__class__.__name__}."
         )
 
+    def fingerprint(self):
+        """Optionally return a fingerprint of everything this check reads, e.g.: hashes of files,
+        signatures of scene nodes or config values. Runners with a ResultCache report a check
+        that passed with the same fingerprint and code as passed without running it again.
+        It's called before the check and its SharedContext setup, so it should be quick.
+
+        Returns:
+            Any JSON serializable value, or None to always run the check.
+        """
+        return None
+
     def run_full_check(self, try_fix=True, run_dependencies_first=True) -> CheckStatus:
         """Run the full check, including setup, check, teardown and fix if implemented.
 
@@ -84,12 +117,14 @@ class SanityCheck(abc.ABC):
                 context_ran_from_check = True
 
         # First check
+        self.__fix_ran = False
         self.__status = self.run_setup()
         self.__status = self.run_check()
         self.__status = self.run_teardown()
 
         # Try to fix then check again
         if self.__status.code != CheckStatus.passed and try_fix and self.has_fix():
+            self.__fix_ran = True
             self.__status = self.run_fix()
             # Final check
             self.__status = self.run_setup()
@@ -178,6 +213,16 @@ class SanityCheck(abc.ABC):
                 self.__status.message = base_msg
         return self.__status
 
+    def reset(self, target=None):
+        """Set the check as not ran, so it can run again, e.g.: against another target.
+
+        Args:
+            target (optional): What the check runs against next. Defaults to None.
+        """
+        self.__status.reset(CheckStatus.not_ran)
+        self.__fix_ran = False
+        self.target = target
+
     def add_dependency(self, check):
         """Add a dependency to the current check.
 
@@ -206,15 +251,28 @@ class SanityCheck(abc.ABC):
         return True
 
     def run_denpendencies(self):
-        """Runs all dependencies that haven't passed yet."""
-        for check in self.__dependencies_instances:
-            if check.status.code != CheckStatus.passed:
-                check_status = check.run_full_check()
-                if check_status.code != CheckStatus.passed:
-                    self.__status.code = CheckStatus.cancelled
-                    base_msg = f"Dependencies for {self.name} failed or haven't passed."
-                    self.__status.message = base_msg
-                    return self.__status
+        """Runs all dependencies that haven't passed yet, in dependency order. Each of them runs
+        once even if several checks depend on it, and checks whose dependencies didn't pass
+        are not run.
+        """
+        plan = ExecutionPlan([self], include_passed=False)
+        if plan.is_blocked(self):
+            self.__status.code = CheckStatus.cancelled
+            self.__status.message = f"Dependencies for {self.name} form a cycle."
+            return self.__status
+        for check in plan.order:
+            if check is self:
+                continue
+            if check.validate_dependencies_status():
+                check.run_full_check(run_dependencies_first=False)
+            else:
+                check.status.code = CheckStatus.cancelled
+                check.status.message = f"Dependencies for {check.name} failed or haven't passed."
+        if not self.validate_dependencies_status():
+            self.__status.code = CheckStatus.cancelled
+            base_msg = f"Dependencies for {self.name} failed or haven't passed."
+            self.__status.message = base_msg
+            return self.__status
 
     def register_actions(self, actions=[]):
         """Register actions that the user can execute from the GUI.
@@ -257,6 +315,14 @@ class SanityCheck(abc.ABC):
         """
         return type(self)._teardown != SanityCheck._teardown
 
+    def has_fingerprint(self) -> bool:
+        """Subclass has a fingerprint method implemented.
+
+        Returns:
+            bool: True if fingerprint method is implemented, False otherwise.
+        """
+        return type(self).fingerprint != SanityCheck.fingerprint
+
     def has_shared_context(self):
         """True if heck needs a shared context setup to run.
 
@@ -366,6 +432,11 @@ class SanityCheck(abc.ABC):
             )
         self.__priority = p
 
+    @property
+    def fix_ran(self) -> bool:
+        """True if the last run_full_check() ran the fix, so the inputs may have changed."""
+        return self.__fix_ran
+
     @property
     def status(self) -> CheckStatus:
         return self.__status
@@ -419,6 +490,8 @@ class SharedContext(abc.ABC):
 
     NAME_CHAR_LIMIT = 50
     DESCRIPTION_CHAR_LIMIT = 140
+    # Set to True in contexts whose setup and teardown must run in the main thread
+    MAIN_THREAD_ONLY = False
 
     def __init__(self):
         super().__init__()
@@ -428,6 +501,8 @@ class SharedContext(abc.ABC):
         self.__checks = []
         self.__actions = []
         self.progress = ProgressInterface()
+        # What is being checked, e.g.: a scene file or asset directory. Set by batch runs
+        self.target = None
 
     @abc.abstractmethod
     def _setup(self):
@@ -514,6 +589,15 @@ class SharedContext(abc.ABC):
                 self.__status.message = base_msg
         return self.__status
 
+    def reset(self, target=None):
+        """Set the context as not ready, so it can be set up again, e.g.: for another target.
+
+        Args:
+            target (optional): What the context is set up for next. Defaults to None.
+        """
+        self.__status.reset(ContextStatus.not_ready)
+        self.target = target
+
     def is_ready(self) -> bool:
         """Check if the context is ready to run the checks.
 
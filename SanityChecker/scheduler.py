@@ -0,0 +1,308 @@
+import time
+import heapq
+import itertools
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from sanitychecker.sanitycheck import SanityCheck, SharedContext
+from sanitychecker.plan import ExecutionPlan
+from sanitychecker.resultcache import ResultCache
+from sanitychecker.status import CheckStatus, ContextStatus
+from sanitychecker.logger import logger, logger_gui
+
+
+class _Node:
+    """A unit of work of the scheduler: a check, or the setup or teardown of a context."""
+    SETUP = 0
+    CHECK = 1
+    TEARDOWN = 2
+
+    __slots__ = (
+        "kind", "obj", "dependents", "pending", "done", "main_thread", "priority", "cached",
+        "cache_key", "seconds"
+    )
+
+    def __init__(self, kind: int, obj, main_thread: bool = False, priority: int = 0):
+        self.kind = kind
+        self.obj = obj
+        self.dependents = []
+        self.pending = 0
+        self.done = False
+        self.main_thread = main_thread
+        self.priority = priority
+        self.cached = False
+        self.cache_key = None
+        self.seconds = 0.0
+
+    def add_dependent(self, node):
+        self.dependents.append(node)
+        node.pending += 1
+
+
+class CheckScheduler:
+    """Runs checks and contexts as a graph instead of in fixed passes. Each check waits only
+    for its dependencies and for the setup of its SharedContext, and each context teardown
+    waits for all of its checks. Checks that are ready run concurrently in a thread pool,
+    highest priority first, and checks depending on one that didn't pass are cancelled as
+    soon as it finishes, without waiting for the rest of their dependencies.
+
+    Checks and contexts with MAIN_THREAD_ONLY set, e.g.: checks calling DCC APIs that are not
+    thread safe, always run in the thread that calls run().
+
+    Only a thread pool is implemented, not processes: checks and contexts share live state and
+    status signals, so they can't be sent to other processes. Use batch.run_batch() to spread
+    targets over processes instead. With more than one worker, statuses are updated and their
+    signals emitted from pool threads, so GUIs connected to them must run with workers=1.
+
+    Args:
+        checks (list): SanityCheck instances to run. Dependencies that haven't passed
+        are also run.
+
+        contexts (list, optional): SharedContext instances to run with all their checks.
+
+        try_fix (bool, optional): Try to fix if a fix has been implemented. Defaults to True.
+
+        workers (int, optional): Number of threads running checks. 1 runs everything in the
+        calling thread, as required when status signals update widgets. Defaults to 1.
+
+        progress (ProgressInterface, optional): Progress of the run, one step per check.
+        Any object with reset_progress(), add_progress() and maximum works.
+
+        cache (ResultCache, optional): Checks that passed before with the same fingerprint are
+        reported as passed without running them, and contexts whose checks are all cached
+        are not set up. Saved when the run finishes. Defaults to None.
+
+        on_finished (callable, optional): Called with each check and the seconds it took as
+        soon as it finishes, is cancelled or is taken from the cache. Always called from the
+        thread that calls run(). Defaults to None.
+    """
+    def __init__(
+        self, checks: list, contexts: list = None, try_fix: bool = True,
+        workers: int = 1, progress=None, cache: ResultCache = None, on_finished=None
+    ):
+        self.__try_fix = try_fix
+        self.__cache = cache
+        self.__on_finished = on_finished
+        self.__workers = max(1, workers)
+        self.__progress = progress
+        self.__nodes = []
+        self.__check_nodes = {}     # id(check): _Node
+        self.__setup_nodes = {}     # id(context): _Node
+        self.__teardown_nodes = {}  # id(context): _Node
+        self.__ready = []
+        self.__plan = None
+        self.__counter = itertools.count()
+        self.__build(checks, contexts or [])
+
+    def run(self) -> tuple:
+        """Run the whole graph and wait for it to finish.
+
+        Returns:
+            tuple: [0]List of SanityCheck instances that have been run or cancelled.
+            [1]List of SharedContext instances that have been run.
+        """
+        if self.__progress is not None:
+            self.__progress.reset_progress()
+            if self.__check_nodes:
+                self.__progress.maximum = len(self.__check_nodes)
+
+        self.__cancel_blocked()
+        if self.__cache is not None:
+            self.__apply_cache()
+        for node in self.__nodes:
+            if node.pending == 0:
+                self.__push(node)
+
+        executor = None
+        if self.__workers > 1:
+            executor = ThreadPoolExecutor(max_workers=self.__workers)
+        running = {}
+        try:
+            while True:
+                while self.__ready:
+                    node = heapq.heappop(self.__ready)[-1]
+                    if node.done:
+                        continue
+                    if executor is None or node.main_thread:
+                        self.__complete(node, self.__run_node(node))
+                    else:
+                        running[executor.submit(self.__run_node, node)] = node
+                if not running:
+                    break
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    self.__complete(running.pop(future), future.result())
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+            if self.__cache is not None:
+                self.__cache.save()
+
+        return self.checks, self.contexts
+
+    @property
+    def plan(self) -> ExecutionPlan:
+        """Execution plan of the selected checks and the dependencies that haven't passed."""
+        return self.__plan
+
+    @property
+    def checks(self) -> list:
+        """SanityCheck instances that will run, including dependencies. Checks blocked by a
+        dependency cycle are not included.
+        """
+        return [node.obj for node in self.__nodes if node.kind == _Node.CHECK]
+
+    @property
+    def contexts(self) -> list:
+        """SharedContext instances that will run."""
+        return [node.obj for node in self.__nodes if node.kind == _Node.SETUP]
+
+    def __build(self, checks: list, contexts: list):
+        selected = []
+        for context in contexts:
+            self.__add_context(context)
+            selected.extend(context.checks)
+        selected.extend(checks)
+        # Dependencies that haven't passed run first, even if they were not selected. Selected
+        # ones run again, so their dependents wait for them even if they passed before
+        self.__plan = ExecutionPlan(selected, include_passed=False)
+        for check in self.__plan.order:
+            self.__add_check(check)
+        for check in self.__plan.order:
+            for dependency in self.__plan.dependencies(check):
+                self.__check_nodes[id(dependency)].add_dependent(self.__check_nodes[id(check)])
+
+    def __add_check(self, check: SanityCheck):
+        node = _Node(_Node.CHECK, check, check.MAIN_THREAD_ONLY, check.priority)
+        self.__check_nodes[id(check)] = node
+        self.__nodes.append(node)
+        if check.has_shared_context():
+            context = check.shared_context
+            self.__add_context(context)
+            self.__setup_nodes[id(context)].add_dependent(node)
+            node.add_dependent(self.__teardown_nodes[id(context)])
+
+    def __add_context(self, context: SharedContext):
+        if id(context) in self.__setup_nodes:
+            return
+        main_thread = context.MAIN_THREAD_ONLY
+        setup = _Node(_Node.SETUP, context, main_thread, SanityCheck.PRIORITY_MAX + 1)
+        teardown = _Node(_Node.TEARDOWN, context, main_thread, SanityCheck.PRIORITY_MAX + 1)
+        setup.add_dependent(teardown)
+        self.__setup_nodes[id(context)] = setup
+        self.__teardown_nodes[id(context)] = teardown
+        self.__nodes.append(setup)
+        self.__nodes.append(teardown)
+
+    def __push(self, node: _Node):
+        heapq.heappush(self.__ready, (-node.priority, next(self.__counter), node))
+
+    def __run_node(self, node: _Node) -> bool:
+        """Run a node in any thread.
+
+        Returns:
+            bool: True if it passed and its dependents can run.
+        """
+        if node.cached:
+            return True
+        start = time.perf_counter()
+        try:
+            if node.kind == _Node.SETUP:
+                node.obj.run_setup()
+                return node.obj.is_ready()
+            elif node.kind == _Node.TEARDOWN:
+                return self.__run_teardown(node.obj)
+            status = node.obj.run_full_check(self.__try_fix, run_dependencies_first=False)
+            node.seconds = time.perf_counter() - start
+            if node.cache_key is not None:
+                # A fix changes the inputs, the result belongs to the fixed ones
+                cache_key = self.__cache.key(node.obj) if node.obj.fix_ran else node.cache_key
+                self.__cache.store(node.obj, cache_key)
+            return status.code == CheckStatus.passed
+        except Exception:
+            exception_traceback = traceback.format_exc()
+            logger_gui.exception(
+                f"EXCEPTION: Unhandled exception raised running {node.obj.name}\n{exception_traceback}"
+            )
+            return False
+
+    def __apply_cache(self):
+        """Mark checks found in the cache as passed, and contexts with every check cached.
+        Checks are only taken from the cache if their dependencies are too.
+
+        Fingerprints are computed once here, before anything runs, and checks that run are
+        stored with that key. Only checks whose fix ran are fingerprinted again, after the
+        final check, since their result belongs to the fixed inputs.
+        """
+        for check in self.__plan.order:
+            node = self.__check_nodes[id(check)]
+            node.cache_key = self.__cache.key(check)
+            if node.cache_key is None:
+                continue
+            dependencies = self.__plan.dependencies(check)
+            if not all(self.__check_nodes[id(each)].cached for each in dependencies):
+                continue
+            if self.__cache.get(check, node.cache_key) is not None:
+                node.cached = True
+                check.status.code = CheckStatus.passed
+                check.status.message = f"{check.name} passed before and its inputs didn't change."
+        for context_id, setup in self.__setup_nodes.items():
+            checks = [node for node in setup.dependents if node.kind == _Node.CHECK]
+            if checks and all(node.cached for node in checks):
+                setup.cached = True
+                self.__teardown_nodes[context_id].cached = True
+
+    def __run_teardown(self, context: SharedContext) -> bool:
+        context.run_teardown()
+        if context.status.code != ContextStatus.failed:
+            context.status.code = ContextStatus.finished
+            context.status.message = f"Shared context {context.name} has finished running all checks."
+            logger.debug(context.status.message)
+            return True
+        return False
+
+    def __complete(self, node: _Node, passed: bool):
+        """Mark a node as done and release or cancel its dependents. Runs in the thread
+        that called run() only.
+        """
+        node.done = True
+        if node.kind == _Node.CHECK:
+            if self.__progress is not None:
+                self.__progress.add_progress()
+            if self.__on_finished is not None:
+                self.__on_finished(node.obj, node.seconds)
+        for dependent in node.dependents:
+            if dependent.done:
+                continue
+            if not passed and dependent.kind == _Node.CHECK:
+                self.__cancel(dependent, node)
+                continue
+            dependent.pending -= 1
+            if dependent.pending == 0:
+                self.__push(dependent)
+
+    def __cancel(self, node: _Node, cause: _Node):
+        check = node.obj
+        check.status.code = CheckStatus.cancelled
+        if cause.kind == _Node.SETUP:
+            check.status.message = f"Shared context {cause.obj.name} for {check.name} is not ready."
+        else:
+            check.status.message = f"Dependencies for {check.name} failed or haven't passed."
+        logger.debug(check.status.message)
+        self.__complete(node, False)
+
+    def __cancel_blocked(self):
+        """Cancel checks that can never start because of a dependency cycle."""
+        cyclic = set(check for cycle in self.__plan.cycles for check in cycle)
+        for check in self.__plan.blocked:
+            check.status.code = CheckStatus.cancelled
+            if check in cyclic:
+                check.status.message = f"Dependencies for {check.name} form a cycle."
+            else:
+                check.status.message = f"Dependencies for {check.name} failed or haven't passed."
+            logger_gui.warning(check.status.message)
+            if self.__on_finished is not None:
+                self.__on_finished(check, 0.0)
+
+if __name__ == "__main__":
+    pass
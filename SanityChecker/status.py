@@ -80,6 +80,18 @@ class CheckStatus:
             raise ImplementationError(f"Invalid status code value '{code}'.")
         return True
 
+    def reset(self, code: int):
+        """Set the code and clear the messages. The status object and its signal connections,
+        e.g.: of GUI widgets, are kept.
+
+        Args:
+            code (int): Status code to reset to.
+        """
+        if self.__is_status_valid(code):
+            self.__code = code
+            self.__message.clear()
+            self.updated()
+
     def updated(self):
         """We can't generate a signal from this class without making a QObject,
         so we use this method to emit a signal when the status is updated.
@@ -218,6 +230,18 @@ class ContextStatus:
             raise ImplementationError(f"Invalid status code value '{code}'.")
         return True
 
+    def reset(self, code: int):
+        """Set the code and clear the messages. The status object and its signal connections,
+        e.g.: of GUI widgets, are kept.
+
+        Args:
+            code (int): Status code to reset to.
+        """
+        if self.__is_status_valid(code):
+            self.__code = code
+            self.__message.clear()
+            self.updated()
+
     def updated(self):
         """We can't generate a signal from this class without making a QObject,
         so we use this method to emit a signal when the status is updated.
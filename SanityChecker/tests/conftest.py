@@ -0,0 +1,33 @@
+import sys
+import textwrap
+
+import pytest
+
+from sanitychecker.checkrepo import (
+    CHECKS_REGISTRY, SHARED_CONTEXTS_REGISTRY, compile_execution_plan
+)
+
+
+@pytest.fixture
+def make_repo(tmp_path):
+    """Write a throwaway repo of check modules, e.g.: make_repo("Repo", {"checks.py": source}).
+    Its checks and contexts are removed from the registries when the test finishes.
+    """
+    repos = []
+
+    def make(name: str, modules: dict):
+        repo_path = tmp_path / name
+        repo_path.mkdir(exist_ok=True)
+        for module_name, source in modules.items():
+            (repo_path / module_name).write_text(textwrap.dedent(source))
+        repos.append(repo_path)
+        return repo_path
+
+    yield make
+    for repo_path in repos:
+        for registry in (CHECKS_REGISTRY, SHARED_CONTEXTS_REGISTRY):
+            items = registry.checks if registry is CHECKS_REGISTRY else registry.contexts
+            for py_module in list(items.get(repo_path, {})):
+                registry.remove_module(py_module, repo_path)
+                sys.modules.pop(py_module, None)
+    compile_execution_plan()
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from sanitychecker import discovery
+from sanitychecker.batch import run_batch
+from sanitychecker.checkrepo import CHECKS_REGISTRY
+
+TARGET_MODULE = """
+import os
+
+from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.status import CheckStatus
+
+
+class BatchTarget(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "BatchTarget"
+
+    def _check(self):
+        if self.target == "crash":
+            # Kills the worker process, as a crashing DCC would
+            os._exit(1)
+        if str(self.target).startswith("bad"):
+            self.status.code = CheckStatus.not_passed
+            self.status.message = f"{self.target} is bad."
+        else:
+            self.status.code = CheckStatus.passed
+
+
+class BatchOther(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "BatchOther"
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+"""
+
+
+@pytest.fixture
+def repo(make_repo, tmp_path, monkeypatch):
+    monkeypatch.setattr(discovery, "DEFAULT_MANIFESTS_DIR", tmp_path / "manifests")
+    return make_repo("Repo", {"batch_checks.py": TARGET_MODULE})
+
+
+def test_targets_in_calling_process(repo):
+    results = {}
+    status = None
+    for result in run_batch(repo, ["good", "bad1", "bad2"], names=["BatchTarget"], processes=1):
+        results[result.target] = result
+        check = CHECKS_REGISTRY.get_check("BatchTarget", repo)
+        # Statuses are reset, not replaced, so widgets stay connected to them
+        assert status is None or check.status is status
+        status = check.status
+    assert [result["name"] for result in results["good"].results] == ["BatchTarget"]
+    assert results["good"].passed and results["good"].pid == os.getpid()
+    assert results["bad1"].results[0]["message"] == "bad1 is bad."
+    assert results["bad2"].results[0]["message"] == "bad2 is bad."
+    assert results["bad2"].summary["not_passed"] == 1
+
+
+def test_repo_error(tmp_path):
+    results = list(run_batch(tmp_path / "Missing", ["good"], processes=1))
+    assert results[0].error and not results[0].passed
+
+
+def test_dead_worker_runs_targets_again(repo):
+    targets = ["crash"] + [f"good{index}" for index in range(6)]
+    results = {}
+    for result in run_batch(repo, targets, processes=2, try_fix=False):
+        assert result.target not in results
+        results[result.target] = result
+    assert sorted(results) == sorted(targets)
+    assert results["crash"].error is not None
+    assert all(results[target].passed for target in targets[1:])
+    assert all(len(results[target].results) == 2 for target in targets[1:])
@@ -0,0 +1,112 @@
+import os
+
+from sanitychecker.checkrepo import (
+    CHECKS_REGISTRY, SHARED_CONTEXTS_REGISTRY, load_sanitycheck_repo, reload_sanitycheck_repo
+)
+
+BASE_MODULE = """
+from sanitychecker.sanitycheck import SanityCheck, SharedContext
+from sanitychecker.status import CheckStatus
+
+
+class ReloadContext(SharedContext):
+    def __init__(self):
+        super().__init__()
+        self.name = "ReloadContext"
+
+    def _setup(self):
+        pass
+
+
+class ReloadBase(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "ReloadBase"
+        self.version = {version}
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+"""
+
+DEPENDENT_MODULE = """
+from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.status import CheckStatus
+
+
+class ReloadDependent(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "ReloadDependent"
+        self.dependencies_names = ["ReloadBase"]
+        self.shared_context = "ReloadContext"
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+"""
+
+
+def names(items):
+    return sorted(item.name for item in items)
+
+
+def test_reload_changed_modules(make_repo):
+    repo = make_repo("Repo", {
+        "reload_base.py": BASE_MODULE.format(version=1),
+        "reload_dependent.py": DEPENDENT_MODULE,
+    })
+    checks, contexts = load_sanitycheck_repo(repo)
+    assert names(checks) == ["ReloadBase", "ReloadDependent"]
+    dependent = CHECKS_REGISTRY.get_check("ReloadDependent", repo)
+    assert dependent.shared_context is SHARED_CONTEXTS_REGISTRY.get_context("ReloadContext", repo)
+
+    assert reload_sanitycheck_repo(repo)[2] == []
+
+    (repo / "reload_base.py").write_text(BASE_MODULE.format(version=22))
+    checks, _, changed = reload_sanitycheck_repo(repo)
+    assert changed == [repo / "reload_base.py"]
+    base = CHECKS_REGISTRY.get_check("ReloadBase", repo)
+    assert base.version == 22
+    # Checks of unchanged modules are kept and linked to the new instances
+    assert CHECKS_REGISTRY.get_check("ReloadDependent", repo) is dependent
+    assert dependent.dependencies_instances == [base]
+    context = SHARED_CONTEXTS_REGISTRY.get_context("ReloadContext", repo)
+    assert dependent.shared_context is context
+    assert context.checks == [dependent]
+    assert names(checks) == ["ReloadBase", "ReloadDependent"]
+
+
+def test_reload_same_contents(make_repo):
+    repo = make_repo("Repo", {"reload_base.py": BASE_MODULE.format(version=1)})
+    load_sanitycheck_repo(repo)
+    base = CHECKS_REGISTRY.get_check("ReloadBase", repo)
+    stat = (repo / "reload_base.py").stat()
+    os.utime(repo / "reload_base.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert reload_sanitycheck_repo(repo)[2] == []
+    assert CHECKS_REGISTRY.get_check("ReloadBase", repo) is base
+
+
+def test_reload_removed_and_added_modules(make_repo):
+    repo = make_repo("Repo", {
+        "reload_base.py": BASE_MODULE.format(version=1),
+        "reload_dependent.py": DEPENDENT_MODULE,
+    })
+    load_sanitycheck_repo(repo)
+    context = SHARED_CONTEXTS_REGISTRY.get_context("ReloadContext", repo)
+    (repo / "reload_dependent.py").unlink()
+    checks, contexts, changed = reload_sanitycheck_repo(repo)
+    assert changed == [repo / "reload_dependent.py"]
+    assert names(checks) == ["ReloadBase"]
+    assert contexts == [context] and context.checks == []
+
+    (repo / "reload_dependent.py").write_text(DEPENDENT_MODULE)
+    checks, contexts, changed = reload_sanitycheck_repo(repo)
+    assert changed == [repo / "reload_dependent.py"]
+    assert names(checks) == ["ReloadBase", "ReloadDependent"]
+    assert names(contexts[0].checks) == ["ReloadDependent"]
+
+
+def test_reload_not_loaded_repo(make_repo):
+    repo = make_repo("Repo", {"reload_base.py": BASE_MODULE.format(version=1)})
+    checks, _, changed = reload_sanitycheck_repo(repo)
+    assert names(checks) == ["ReloadBase"]
+    assert changed == [repo / "reload_base.py"]
@@ -0,0 +1,180 @@
+import sys
+import json
+
+import pytest
+
+from sanitychecker import discovery
+
+BASE_MODULE = """
+from sanitychecker.sanitycheck import SanityCheck, SharedContext
+from sanitychecker.status import CheckStatus
+
+
+class DiscoveryContext(SharedContext):
+    def __init__(self):
+        super().__init__()
+        self.name = "DiscoveryContext"
+
+    def _setup(self):
+        pass
+
+
+class DiscoveryBase(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "DiscoveryBase"
+        self.description = "Base check"
+        self.priority = 80
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+"""
+
+DEPENDENT_MODULE = """
+import abc
+
+import discovery_base
+
+
+class AbstractCheck(discovery_base.DiscoveryBase, abc.ABC):
+    pass
+
+
+class DiscoveryDependent(discovery_base.DiscoveryBase):
+    def __init__(self):
+        super().__init__()
+        self.name = "DiscoveryDependent"
+        self.dependencies_names = ["DiscoveryBase"]
+        self.shared_context = "DiscoveryContext"
+"""
+
+UNRELATED_MODULE = """
+from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.status import CheckStatus
+
+
+class NotACheck:
+    pass
+
+
+class DiscoveryUnrelated(SanityCheck):
+    def _check(self):
+        self.status.code = CheckStatus.passed
+"""
+
+DYNAMIC_NAME_MODULE = """
+from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.status import CheckStatus
+
+
+class DynamicName(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "".join(["Discovery", "Dynamic"])
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+"""
+
+DYNAMIC_DEPENDENCIES_MODULE = """
+from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.status import CheckStatus
+
+
+class DiscoveryDynamicDependencies(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "DiscoveryDynamicDependencies"
+        self.dependencies_names = ["Discovery" + suffix for suffix in ("Base",)]
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+"""
+
+
+@pytest.fixture(autouse=True)
+def manifests_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(discovery, "DEFAULT_MANIFESTS_DIR", tmp_path / "manifests")
+    yield
+    # Imported by discovery_dependent.py, the ones loaded by checkrepo are removed by make_repo
+    sys.modules.pop("discovery_base", None)
+
+
+@pytest.fixture
+def repo(make_repo, monkeypatch):
+    repo_path = make_repo("Repo", {
+        "discovery_base.py": BASE_MODULE,
+        "discovery_dependent.py": DEPENDENT_MODULE,
+        "discovery_unrelated.py": UNRELATED_MODULE,
+    })
+    # Repo modules import each other by name, as they do when the repo is in sys.path
+    monkeypatch.syspath_prepend(str(repo_path))
+    return repo_path
+
+
+def by_name(items):
+    return {item.name: item for item in items}
+
+
+def test_discover_repo(repo):
+    checks, contexts = discovery.discover_repo(repo)
+    checks = by_name(checks)
+    assert sorted(checks) == ["DiscoveryBase", "DiscoveryDependent", "DiscoveryUnrelated"]
+    assert list(by_name(contexts)) == ["DiscoveryContext"]
+    # Attributes of bases are merged, even from other modules
+    dependent = checks["DiscoveryDependent"]
+    assert dependent.module == repo / "discovery_dependent.py"
+    assert (dependent.description, dependent.priority) == ("Base check", 80)
+    assert dependent.dependencies_names == ["DiscoveryBase"]
+    assert dependent.shared_context == "DiscoveryContext"
+    # Name defaults to the class name
+    assert checks["DiscoveryUnrelated"].class_name == "DiscoveryUnrelated"
+    assert "discovery_base.py" not in sys.modules
+
+
+def test_manifest(repo, tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    discovery.discover_repo(repo, manifest_path)
+    manifest = json.loads(manifest_path.read_text())
+    assert manifest["version"] == discovery.MANIFEST_VERSION
+    assert sorted(manifest["modules"]) == [
+        "discovery_base.py", "discovery_dependent.py", "discovery_unrelated.py"
+    ]
+    (repo / "discovery_unrelated.py").write_text(UNRELATED_MODULE.replace("Unrelated", "Renamed"))
+    (repo / "discovery_dependent.py").unlink()
+    checks, _ = discovery.discover_repo(repo, manifest_path)
+    assert sorted(by_name(checks)) == ["DiscoveryBase", "DiscoveryRenamed"]
+    assert "discovery_dependent.py" not in json.loads(manifest_path.read_text())["modules"]
+
+
+def test_dynamic_attributes():
+    raw = discovery.parse_module(DYNAMIC_NAME_MODULE + DYNAMIC_DEPENDENCIES_MODULE)
+    dynamic = {each["class_name"]: each["dynamic"] for each in raw}
+    assert dynamic == {"DynamicName": ["name"], "DiscoveryDynamicDependencies": ["dependencies_names"]}
+
+
+def test_load_selected_imports_needed_modules(repo):
+    checks, contexts = discovery.load_selected(repo, ["DiscoveryDependent"])
+    assert [check.name for check in checks] == ["DiscoveryDependent"]
+    assert checks[0].shared_context.name == "DiscoveryContext"
+    assert [each.name for each in checks[0].dependencies_instances] == ["DiscoveryBase"]
+    assert "discovery_unrelated.py" not in sys.modules
+
+
+def test_load_selected_dynamic_name(repo):
+    (repo / "dynamic_name.py").write_text(DYNAMIC_NAME_MODULE)
+    checks, _ = discovery.load_selected(repo, ["DiscoveryDynamic"])
+    assert [check.name for check in checks] == ["DiscoveryDynamic"]
+    assert "discovery_unrelated.py" not in sys.modules
+
+
+def test_load_selected_dynamic_dependencies(repo):
+    (repo / "dynamic_dependencies.py").write_text(DYNAMIC_DEPENDENCIES_MODULE)
+    checks, _ = discovery.load_selected(repo, ["DiscoveryDynamicDependencies"])
+    assert [each.name for each in checks[0].dependencies_instances] == ["DiscoveryBase"]
+    # The whole repo is loaded
+    assert "discovery_unrelated.py" in sys.modules
+
+
+def test_load_selected_missing(repo):
+    assert discovery.load_selected(repo, ["Missing"]) == ([], [])
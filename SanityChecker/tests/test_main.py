@@ -0,0 +1,93 @@
+import io
+import json
+from xml.etree import ElementTree
+
+import pytest
+
+from sanitychecker import discovery
+from sanitychecker.__main__ import (
+    main, run, EXIT_PASSED, EXIT_NOT_PASSED, EXIT_REPO_ERROR, EXIT_NOT_FOUND, FORMAT_JUNIT
+)
+
+CHECKS_MODULE = """
+from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.status import CheckStatus
+
+
+class CliPasses(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "CliPasses"
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+
+
+class CliFails(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "CliFails"
+
+    def _check(self):
+        self.status.code = CheckStatus.not_passed
+        self.status.message = "Something is wrong."
+
+
+class CliDependent(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "CliDependent"
+        self.dependencies_names = ["CliFails"]
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+"""
+
+
+@pytest.fixture
+def repo(make_repo, tmp_path, monkeypatch):
+    monkeypatch.setattr(discovery, "DEFAULT_MANIFESTS_DIR", tmp_path / "manifests")
+    return make_repo("Repo", {"cli_checks.py": CHECKS_MODULE})
+
+
+def read_json_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_passed(repo, tmp_path):
+    report = tmp_path / "report.json"
+    assert main(["run", str(repo), "--select", "CliPasses", "-o", str(report)]) == EXIT_PASSED
+    lines = read_json_lines(report)
+    assert [line.get("name") for line in lines[:-1]] == ["CliPasses"]
+    assert lines[0]["status"] == "passed"
+    assert "summary" in lines[-1]
+
+
+def test_not_passed(repo, tmp_path):
+    report = tmp_path / "report.json"
+    assert main(["run", str(repo), "--jobs", "2", "-o", str(report)]) == EXIT_NOT_PASSED
+    statuses = {line["name"]: line["status"] for line in read_json_lines(report)[:-1]}
+    assert statuses == {"CliPasses": "passed", "CliFails": "not_passed", "CliDependent": "cancelled"}
+
+
+def test_junit(repo):
+    output = io.StringIO()
+    assert run(repo, output=output, output_format=FORMAT_JUNIT) == EXIT_NOT_PASSED
+    cases = {case.get("name"): case for case in ElementTree.fromstring(output.getvalue()).iter("testcase")}
+    assert sorted(cases) == ["CliDependent", "CliFails", "CliPasses"]
+    assert cases["CliFails"].find("failure") is not None
+    assert cases["CliDependent"].find("skipped") is not None
+
+
+def test_repo_error(tmp_path):
+    assert run(tmp_path / "Missing", output=io.StringIO()) == EXIT_REPO_ERROR
+
+
+def test_not_found(repo):
+    output = io.StringIO()
+    assert run(repo, ["CliPasses", "Misspelled"], output=output) == EXIT_NOT_FOUND
+    assert output.getvalue() == ""
+
+
+def test_no_checks(make_repo):
+    assert run(make_repo("Empty", {"empty.py": "VALUE = 1\n"}), output=io.StringIO()) == EXIT_NOT_FOUND
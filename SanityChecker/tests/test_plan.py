@@ -0,0 +1,77 @@
+from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.status import CheckStatus
+from sanitychecker.plan import ExecutionPlan
+
+
+class PlanCheck(SanityCheck):
+    def __init__(self, name, *dependencies, priority=0):
+        super().__init__()
+        self.name = name
+        self.priority = priority
+        for dependency in dependencies:
+            self.add_dependency(dependency)
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+
+
+def names(checks):
+    return [check.name for check in checks]
+
+
+def test_order_and_levels():
+    base = PlanCheck("Base")
+    low = PlanCheck("Low", base, priority=10)
+    high = PlanCheck("High", base, priority=90)
+    top = PlanCheck("Top", low, high)
+    plan = ExecutionPlan([top])
+    assert names(plan.order) == ["Base", "High", "Low", "Top"]
+    assert [names(level) for level in plan.levels()] == [["Base"], ["High", "Low"], ["Top"]]
+    assert sorted(names(plan.dependents(base))) == ["High", "Low"]
+    assert len(plan) == 4 and base in plan
+
+
+def test_cycles_and_blocked():
+    free = PlanCheck("Free")
+    first = PlanCheck("First")
+    second = PlanCheck("Second", first)
+    first.add_dependency(second)
+    after = PlanCheck("After", second, free)
+    itself = PlanCheck("Itself")
+    itself.add_dependency(itself)
+    plan = ExecutionPlan([after, itself])
+    assert names(plan.order) == ["Free"]
+    assert set(names(plan.blocked)) == {"First", "Second", "After", "Itself"}
+    assert sorted(sorted(names(cycle)) for cycle in plan.cycles) == [["First", "Second"], ["Itself"]]
+    assert plan.is_blocked(after) and not plan.is_blocked(free)
+
+
+def test_critical_path():
+    base = PlanCheck("Base")
+    short = PlanCheck("Short", base)
+    long_first = PlanCheck("LongFirst", base)
+    long_second = PlanCheck("LongSecond", long_first)
+    top = PlanCheck("Top", short, long_second)
+    plan = ExecutionPlan([top])
+    assert names(plan.critical_path()) == ["Base", "LongFirst", "LongSecond", "Top"]
+    costs = {"Short": 10}
+    assert names(plan.critical_path(lambda check: costs.get(check.name, 1))) == ["Base", "Short", "Top"]
+    assert ExecutionPlan().critical_path() == []
+
+
+def test_passed_dependencies():
+    base = PlanCheck("Base")
+    base.status.code = CheckStatus.passed
+    check = PlanCheck("Check", base)
+    assert names(ExecutionPlan([check], include_passed=False).order) == ["Check"]
+    assert names(ExecutionPlan([check]).order) == ["Base", "Check"]
+    # Selected checks keep their edges even if they passed
+    plan = ExecutionPlan([check, base], include_passed=False)
+    assert names(plan.dependencies(check)) == ["Base"]
+
+
+def test_missing_dependency_names():
+    check = PlanCheck("Check")
+    check.dependencies_names = ["Base", "Unknown"]
+    check.add_dependency(PlanCheck("Base"))
+    assert ExecutionPlan([check]).missing == {check: ["Unknown"]}
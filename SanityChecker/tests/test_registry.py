@@ -0,0 +1,95 @@
+from pathlib import Path
+
+from sanitychecker.sanitycheck import SanityCheck, SharedContext
+from sanitychecker.status import CheckStatus
+from sanitychecker.registry import ChecksRegistry, SharedContextsRegistry
+
+REPO_A = Path("RepoA")
+REPO_B = Path("RepoB")
+
+
+class NamedCheck(SanityCheck):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+
+
+class NamedContext(SharedContext):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def _setup(self):
+        pass
+
+
+def test_lookups():
+    registry = ChecksRegistry()
+    first, second, other = NamedCheck("First"), NamedCheck("Second"), NamedCheck("First")
+    registry.extend_checks([first, second], "checks.py", REPO_A)
+    registry.add_check(other, "checks.py", REPO_B)
+    assert registry.get_check("First") is first
+    assert registry.get_check("First", REPO_B) is other
+    assert registry.get_check("Missing") is None
+    assert registry.get_checks_by_name("First") == [first, other]
+    assert registry.get_checks_by_repo(REPO_A) == [first, second]
+    assert registry.get_checks_by_module("checks.py", REPO_B) == [other]
+    assert registry.checks == {REPO_A: {"checks.py": [first, second]}, REPO_B: {"checks.py": [other]}}
+
+
+def test_duplicates():
+    registry = ChecksRegistry()
+    first, same_repo, other_repo = NamedCheck("Check"), NamedCheck("Check"), NamedCheck("Check")
+    registry.add_check(first, "one.py", REPO_A)
+    registry.add_check(same_repo, "two.py", REPO_A)
+    registry.add_check(other_repo, "one.py", REPO_B)
+    assert registry.duplicates() == {"Check": [first, same_repo, other_repo]}
+    assert registry.duplicates(REPO_A) == {"Check": [first, same_repo]}
+    assert registry.duplicates(REPO_B) == {}
+    # Only the first one is found by name
+    assert registry.get_check("Check", REPO_A) is first
+
+
+def test_remove_module():
+    registry = SharedContextsRegistry()
+    kept, removed = NamedContext("Kept"), NamedContext("Removed")
+    registry.add_context(kept, "kept.py", REPO_A)
+    registry.add_context(removed, "removed.py", REPO_A)
+    assert len(registry) == 2
+    registry.remove_module("removed.py", REPO_A)
+    assert registry.get_all_contexts() == [kept]
+    assert registry.get_context("Removed") is None
+    assert registry.get_contexts_by_module("removed.py", REPO_A) == []
+
+
+def test_extend_replaces_module():
+    registry = ChecksRegistry()
+    old, new = NamedCheck("Old"), NamedCheck("New")
+    registry.extend_checks([old], "checks.py", REPO_A)
+    registry.extend_checks([new], "checks.py", REPO_A)
+    assert registry.get_all_checks() == [new]
+    assert registry.get_check("Old") is None
+
+
+def test_all_items_after_changes():
+    registry = ChecksRegistry()
+    checks = [NamedCheck(f"Check{index}") for index in range(4)]
+    registry.extend_checks(checks[:2], "checks.py", REPO_A)
+    assert registry.get_all_checks() == checks[:2]
+    registry.add_check(checks[2], "more.py", REPO_A)
+    assert list(registry) == checks[:3]
+    # Removing while iterating doesn't skip items
+    seen = []
+    for check in registry:
+        seen.append(check)
+        registry.remove_check(check, REPO_A)
+    assert seen == checks[:3]
+    assert len(registry) == 0
+    registry.checks = {REPO_B: {"checks.py": [checks[3]]}}
+    assert registry.get_all_checks() == [checks[3]]
+    assert registry.get_check("Check3", REPO_B) is checks[3]
+    registry.clear_registry()
+    assert registry.get_all_checks() == []
@@ -0,0 +1,111 @@
+import hashlib
+
+from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.status import CheckStatus
+from sanitychecker.resultcache import ResultCache
+from sanitychecker.scheduler import CheckScheduler
+from sanitychecker.checkrepo import load_sanitycheck_repo, get_class_module
+
+CHECK_MODULE = """
+from sanitychecker.sanitycheck import SanityCheck
+from sanitychecker.status import CheckStatus
+
+
+class RepoCheck(SanityCheck):
+    def __init__(self):
+        super().__init__()
+        self.name = "{name}"
+
+    def fingerprint(self):
+        return "{name}"
+
+    def _check(self):
+        self.status.code = CheckStatus.passed
+"""
+
+
+class FileCheck(SanityCheck):
+    """Passes if the file doesn't contain "bad". Its fix replaces the contents."""
+    def __init__(self, path):
+        super().__init__()
+        self.name = "NoBad"
+        self.path = path
+        self.runs = 0
+
+    def fingerprint(self):
+        return self.path.read_text()
+
+    def _check(self):
+        self.runs += 1
+        if "bad" in self.path.read_text():
+            self.status.code = CheckStatus.not_passed
+        else:
+            self.status.code = CheckStatus.passed
+
+    def _fix(self):
+        self.path.write_text("good")
+
+
+def run(check, cache_path, try_fix=True):
+    CheckScheduler([check], try_fix=try_fix, cache=ResultCache(cache_path)).run()
+    return check
+
+
+def test_unchanged_inputs_are_cached(tmp_path):
+    data = tmp_path / "data.txt"
+    data.write_text("good")
+    assert run(FileCheck(data), tmp_path / "cache.json").runs == 1
+    check = run(FileCheck(data), tmp_path / "cache.json")
+    assert check.runs == 0
+    assert check.status.code == CheckStatus.passed
+
+
+def test_changed_inputs_run_again(tmp_path):
+    data = tmp_path / "data.txt"
+    data.write_text("good")
+    run(FileCheck(data), tmp_path / "cache.json")
+    data.write_text("bad")
+    check = run(FileCheck(data), tmp_path / "cache.json", try_fix=False)
+    assert check.runs == 1
+    assert check.status.code == CheckStatus.not_passed
+
+
+def test_passed_after_fix_is_stored_for_fixed_inputs(tmp_path):
+    data = tmp_path / "data.txt"
+    data.write_text("bad")
+    check = run(FileCheck(data), tmp_path / "cache.json")
+    assert (check.runs, check.status.code, check.fix_ran) == (2, CheckStatus.passed, True)
+
+    # Broken inputs are back, they must not be reported as passed
+    data.write_text("bad")
+    check = run(FileCheck(data), tmp_path / "cache.json", try_fix=False)
+    assert check.runs == 1
+    assert check.status.code == CheckStatus.not_passed
+
+
+def test_fingerprint_is_computed_once(tmp_path):
+    data = tmp_path / "data.txt"
+    data.write_text("good")
+    calls = []
+
+    class CountingCheck(FileCheck):
+        def fingerprint(self):
+            calls.append(self.name)
+            return super().fingerprint()
+
+    run(CountingCheck(data), tmp_path / "cache.json")
+    assert len(calls) == 1
+
+
+def test_code_version_of_modules_with_the_same_name(tmp_path):
+    checks = []
+    for name in ("RepoA", "RepoB"):
+        repo = tmp_path / name
+        repo.mkdir()
+        (repo / "checks.py").write_text(CHECK_MODULE.format(name=name))
+        checks.extend(load_sanitycheck_repo(repo)[0])
+    cache = ResultCache(tmp_path / "cache.json")
+    for check in checks:
+        module_file = tmp_path / check.name / "checks.py"
+        assert get_class_module(type(check)) == module_file
+        assert cache.key(check)[1] == hashlib.sha1(module_file.read_bytes()).hexdigest()
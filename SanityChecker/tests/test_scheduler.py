@@ -0,0 +1,118 @@
+import threading
+
+from sanitychecker.sanitycheck import SanityCheck, SharedContext
+from sanitychecker.status import CheckStatus, ContextStatus
+from sanitychecker.scheduler import CheckScheduler
+
+
+class LogCheck(SanityCheck):
+    """Appends (name, thread) to log when it runs and passes if passes is True."""
+    def __init__(self, name, log, passes=True, priority=0):
+        super().__init__()
+        self.name = name
+        self.priority = priority
+        self.log = log
+        self.passes = passes
+
+    def _check(self):
+        self.log.append((self.name, threading.current_thread()))
+        self.status.code = CheckStatus.passed if self.passes else CheckStatus.not_passed
+
+
+class MainThreadCheck(LogCheck):
+    MAIN_THREAD_ONLY = True
+
+
+class LogContext(SharedContext):
+    def __init__(self, name, log, fails=False):
+        super().__init__()
+        self.name = name
+        self.log = log
+        self.fails = fails
+
+    def _setup(self):
+        self.log.append((f"{self.name}.setup", threading.current_thread()))
+        if self.fails:
+            raise RuntimeError("Setup failed")
+
+    def _teardown(self):
+        self.log.append((f"{self.name}.teardown", threading.current_thread()))
+
+
+def with_context(context, *checks):
+    for check in checks:
+        check.shared_context = context
+        context.add_check(check)
+    return context
+
+
+def names(log):
+    return [name for name, _ in log]
+
+
+def test_failed_check_cancels_dependents():
+    log = []
+    first = LogCheck("First", log, passes=False)
+    second = LogCheck("Second", log)
+    third = LogCheck("Third", log)
+    second.add_dependency(first)
+    third.add_dependency(second)
+    CheckScheduler([first, second, third]).run()
+    assert names(log) == ["First"]
+    assert first.status.code == CheckStatus.not_passed
+    assert second.status.code == CheckStatus.cancelled
+    assert third.status.code == CheckStatus.cancelled
+
+
+def test_dependencies_run_first_even_if_not_selected():
+    log = []
+    dependency = LogCheck("Dependency", log)
+    check = LogCheck("Check", log, priority=100)
+    check.add_dependency(dependency)
+    checks, _ = CheckScheduler([check]).run()
+    assert names(log) == ["Dependency", "Check"]
+    assert checks == [dependency, check]
+
+
+def test_priority_order():
+    log = []
+    checks = [LogCheck(f"Check{priority}", log, priority=priority) for priority in (10, 50, 30)]
+    CheckScheduler(checks).run()
+    assert names(log) == ["Check50", "Check30", "Check10"]
+
+
+def test_context_setup_checks_teardown():
+    log = []
+    checks = [LogCheck(f"Check{index}", log) for index in range(8)]
+    context = with_context(LogContext("Context", log), *checks)
+    _, contexts = CheckScheduler([], [context], workers=4).run()
+    assert contexts == [context]
+    assert log[0][0] == "Context.setup"
+    assert log[-1][0] == "Context.teardown"
+    assert sorted(names(log[1:-1])) == sorted(check.name for check in checks)
+    assert context.status.code == ContextStatus.finished
+
+
+def test_failed_setup_cancels_checks():
+    log = []
+    check = LogCheck("Check", log)
+    with_context(LogContext("Context", log, fails=True), check)
+    CheckScheduler([check]).run()
+    # Teardown still runs to clean up what the setup left behind
+    assert names(log) == ["Context.setup", "Context.teardown"]
+    assert check.status.code == CheckStatus.cancelled
+    assert check.status.message == "Shared context Context for Check is not ready."
+
+
+def test_main_thread_only():
+    log = []
+    checks = [LogCheck(f"Check{index}", log) for index in range(8)]
+    checks.append(MainThreadCheck("Main", log))
+    finished = []
+    CheckScheduler(
+        checks, workers=4, on_finished=lambda check, _: finished.append(threading.current_thread())
+    ).run()
+    threads = dict(log)
+    assert threads["Main"] is threading.current_thread()
+    assert all(thread is threading.current_thread() for thread in finished)
+    assert len(finished) == len(checks)